@@ -0,0 +1,32 @@
+# ===============================================================
+# eeg_engine – felles sanntids-inferensmotor for live_inference*-skriptene
+# ===============================================================
+# Navnene lastes først ved bruk (PEP 562), så `import eeg_engine` / `python -m
+# eeg_engine.<modul>` ikke drar inn scipy/sklearn før de faktisk trengs.
+import importlib
+
+_EXPORTS = {
+    "EngineConfig": "config", "PRESETS": "config", "FB_BANDS": "config", "get_config": "config",
+    "Artifacts": "artifacts", "load_artifacts": "artifacts",
+    "load_bundle": "bundle", "write_bundle": "bundle",
+    "RingBuffer": "buffer", "ChannelSelect": "buffer",
+    "FilterBank": "filters",
+    "WindowPreproc": "preprocess", "FilterbankPreproc": "preprocess",
+    "StreamingPreproc": "preprocess", "make_preproc": "preprocess",
+    "filter_continuous": "preprocess", "baseline_correct": "preprocess",
+    "StreamingCovariance": "covariance", "CovHead": "covariance", "oas_from_moments": "covariance",
+    "FlatPredictor": "compiled", "compile_pipeline": "compiled",
+    "EEGNet": "eegnet",
+    "EvidenceAccumulator": "decision", "AsyncLog": "asynclog", "RDAClient": "rda",
+    "StreamEngine": "engine",
+    "MultiScaleEngine": "multiscale",
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'eeg_engine' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# python -m eeg_engine --preset multiclass
+import argparse
+
+from .config import PRESETS, get_config
+from .engine import StreamEngine
+
+ap = argparse.ArgumentParser(description="Real-time EEG inference → LSL 'MI_Pred'")
+ap.add_argument("--preset", choices=list(PRESETS), default="binary")
+ap.add_argument("--art-dir", default=None, help="override artefact directory")
+ap.add_argument("--channels", type=int, default=None, metavar="N",
+                help="reduced-channel artefacts from <art-dir>/channels_<N> (python -m eeg_train.channels)")
+ap.add_argument("--step", type=int, default=None,
+                help="step in samples (e.g. 125 → 4 decisions/s at 500 Hz); default from preproc_meta")
+ap.add_argument("--causal", action="store_true",
+                help="stateful causal SOS filtering on new samples only (recommended with --step)")
+ap.add_argument("--incremental-cov", action="store_true",
+                help="running-sum OAS covariances, O(C²·step) per window (needs --causal)")
+ap.add_argument("--flat", action="store_true",
+                help="compile the joblib pipeline to a flat NumPy predictor at startup")
+ap.add_argument("--float32", action="store_true", help="single-precision filterbank (multiclass_new)")
+ap.add_argument("--rda", default=None, metavar="HOST[:PORT]",
+                help="read the BrainVision Recorder's RDA port directly (default port 51244) instead of LSL")
+ap.add_argument("--poll", action="store_true",
+                help="old polling loop in the main thread instead of the acquisition thread")
+ap.add_argument("--metrics", default=None, metavar="FILE",
+                help="write per-stage / end-to-end latency quantiles here (Prometheus textfile format)")
+ap.add_argument("--bundle", default=None,
+                help="artefact bundle directory (default: <art-dir>/<preset>.bundle if present; 'off' = loose files)")
+ap.add_argument("--scales", type=float, nargs="+", default=None, metavar="S",
+                help="window lengths in s, one model each (<art-dir>/scale_<S>s) on one shared filtered buffer; "
+                     "needs --causal")
+ap.add_argument("--decision", choices=["window", "evidence"], default="window",
+                help="evidence: accumulate log-probabilities over windows, push only confident decisions")
+ap.add_argument("--threshold", type=float, default=None, help="posterior for an evidence decision (default 0.9)")
+ap.add_argument("--half-life", type=float, default=None, help="evidence decay half-life in s (default 1.0)")
+ap.add_argument("--dwell", type=float, default=None, help="s above threshold before a decision (default 0.25)")
+ap.add_argument("--refractory", type=float, default=None, help="s between decisions (default 1.0)")
+ap.add_argument("--overload", choices=["off", "drop", "coalesce"], default="off",
+                help="when windows fall behind by more than --max-stale: drop the stale ones, "
+                     "or coalesce the backlog into the newest window")
+ap.add_argument("--max-stale", type=float, default=0.5, metavar="S",
+                help="max s from a window's newest sample to its classification (with --overload)")
+ap.add_argument("--no-warmup", action="store_true", help="skip the synthetic warm-up windows before connecting")
+ap.add_argument("--prob-name", default=None,
+                help="float32 probability outlet (default: <out>_Prob, i.e. MI_Pred_Prob; 'off' = none)")
+ap.add_argument("--log", default=None, metavar="FILE", help="append every window to this CSV (background thread)")
+ap.add_argument("--log-hz", type=float, default=5.0, help="max console lines per second (0 = every window)")
+ap.add_argument("--quiet", action="store_true", help="no per-chunk sample counter")
+args = ap.parse_args()
+
+overrides = {"verbose": not args.quiet, "step_len": args.step,
+             "filter_mode": "causal" if args.causal else "zero_phase",
+             "cov_mode": "incremental" if args.incremental_cov else "batch",
+             "predictor": "flat" if args.flat else "pipeline",
+             "fb_dtype": "float32" if args.float32 else "float64",
+             "ingest": "poll" if args.poll else "thread",
+             "rda": args.rda, "n_channels": args.channels,
+             "metrics_file": args.metrics,
+             "bundle": args.bundle,
+             "prob_name": args.prob_name, "log_file": args.log, "log_hz": args.log_hz,
+             "decision": args.decision,
+             "overload": args.overload, "max_stale_s": args.max_stale,
+             "scales": tuple(args.scales or ())}
+for key, val in (("ev_threshold", args.threshold), ("ev_half_life", args.half_life),
+                 ("ev_dwell", args.dwell), ("ev_refractory", args.refractory)):
+    if val is not None:
+        overrides[key] = val
+if args.no_warmup:
+    overrides["warmup"] = 0
+if args.art_dir:
+    overrides["art_dir"] = args.art_dir
+cfg = get_config(args.preset, **overrides)
+if cfg.scales:
+    from .multiscale import MultiScaleEngine
+    MultiScaleEngine(cfg).run()
+else:
+    StreamEngine(cfg).run()
@@ -0,0 +1,82 @@
+# ===============================================================
+# artifacts.py – last pipeline, kanaler, preproc_meta og klasser
+# ===============================================================
+import os
+import sys
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class Artifacts:
+    """
+    One model's artefacts. The fitted pipeline is unpickled on first access
+    of `.pipe` (that is what pulls in joblib/sklearn/pyriemann), so a bundle
+    with a flat predictor can serve without ever importing them.
+    """
+    channels:  list
+    meta:      dict
+    classes:   np.ndarray
+    pipe_path: str    = None
+    flat:      object = None              # FlatPredictor from a bundle (memory-mapped arrays)
+    _pipe:     object = field(default=None, repr=False)
+
+    @property
+    def pipe(self):
+        if self._pipe is None:
+            self._pipe = load_pipeline(self.pipe_path)
+        return self._pipe
+
+    @property
+    def sfreq(self):    return self.meta["sfreq"]
+    @property
+    def win_len(self):  return self.meta["window_len"]
+    @property
+    def step_len(self): return self.meta["step_len"]
+
+
+def _register_pickle_names():
+    # Pipelines were dumped from the notebook, so the pickles reference
+    # `model_utils.CovTransport` and `__main__.BandSelector`.
+    import __main__
+    from old import model_utils
+    sys.modules.setdefault("model_utils", model_utils)
+    if not hasattr(__main__, "BandSelector"):
+        __main__.BandSelector = model_utils.BandSelector
+
+
+def load_pipeline(path):
+    if path.endswith(".npz"):                       # converted EEGNet: arrays only, no joblib/sklearn
+        from .eegnet import EEGNet
+        return EEGNet.load(path)
+    import joblib
+    _register_pickle_names()
+    return joblib.load(path)
+
+
+def load_artifacts(cfg):
+    """The preset's bundle if there is an up-to-date one (eeg_engine.bundle), else the loose files."""
+    if cfg.bundle != "off":
+        from .bundle import bundle_path, read_manifest, stale_sources, load_bundle
+        path = bundle_path(cfg)
+        if os.path.exists(os.path.join(path, "manifest.json")):
+            try:
+                stale = stale_sources(read_manifest(path), cfg)
+            except ValueError as e:                       # bygget av en annen bundle-versjon
+                stale, why = True, str(e)
+            else:
+                why = f"{path}: {', '.join(stale)} changed since it was built"
+            if not stale:
+                return load_bundle(path)
+            print(f"⚠  {why} – using the loose files "
+                  f"(rebuild: python -m eeg_engine.bundle --preset {cfg.name})")
+    with open(cfg.path(cfg.channels_file)) as f:
+        channels = json.load(f)
+    with open(cfg.path(cfg.meta_file)) as f:
+        meta = json.load(f)
+    classes = np.load(cfg.path(cfg.classes_file), allow_pickle=True)
+    art = Artifacts(channels, meta, classes, pipe_path=cfg.path(cfg.pipeline_file))
+    art.pipe                              # loose files: load eagerly, as before
+    return art
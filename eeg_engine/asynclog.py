@@ -0,0 +1,116 @@
+# ===============================================================
+# asynclog.py – konsoll/fil-logging på egen tråd, med rate-begrensning
+# ===============================================================
+"""
+Logging off the hot thread. The engine only puts raw values on a bounded
+queue: wall time, LSL time, label, a copy of the probabilities and the
+evidence posterior. Formatting and terminal/file I/O happen on a daemon
+thread:
+
+  * console: at most `console_hz` window lines per second; lines in between are
+    counted and reported as "(+N)" on the next printed line;
+  * file (optional): every window as one CSV row, written in blocks;
+  * the "… received N samples" counter is a plain attribute that the thread
+    repaints at most `status_hz` times per second.
+
+If the queue is full (the terminal or disk stalls), windows are dropped from
+the log and counted; inference never waits on I/O.
+"""
+import queue
+import sys
+import threading
+import time
+from datetime import datetime as dt
+
+import numpy as np
+
+
+class AsyncLog:
+    """Bounded queue → console (rate limited) + CSV file, on one daemon thread started on first use."""
+    def __init__(self, classes, tag="", console_hz=5.0, status_hz=2.0, path=None, maxsize=4096, console=True):
+        self.classes    = [str(c) for c in classes]
+        self.tag        = tag
+        self.console    = console
+        self.console_dt = 1.0 / console_hz if console_hz else 0.0
+        self.status_dt  = 1.0 / status_hz if status_hz else None
+        self.path       = path
+        self.received   = None             # sample counter, set by the hot thread
+        self.dropped    = 0
+        self._q      = queue.Queue(maxsize)
+        self._thread = None
+
+    # ------------------------------------------------------------- hot side
+    def window(self, label, probs, t_lsl=None, posterior=None):
+        """Queue one window (values are copied); never blocks."""
+        if self._thread is None:
+            self.start()
+        item = (time.time(), t_lsl, label, np.array(probs, copy=True),
+                None if posterior is None else np.array(posterior, copy=True))
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="asynclog", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=2.0):
+        """Flush what is queued and stop the thread."""
+        if self._thread is not None:
+            self._q.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------ I/O side
+    def _line(self, item, skipped):
+        t_wall, _, label, probs, post = item
+        ts = dt.fromtimestamp(t_wall).strftime('%H:%M:%S.%f')[:-3]
+        prob_str = "  ".join(f"p_{c}={probs[i]:.2f}" for i, c in enumerate(self.classes))
+        more = f"  (+{skipped})" if skipped else ""
+        if post is None:
+            return f"{ts}  {self.tag}{label:<8}  ({prob_str}){more}"
+        ev_str = "  ".join(f"{c}={post[i]:.2f}" for i, c in enumerate(self.classes))
+        return f"{ts}  {self.tag}{'→ ' + label if label else '·':<10}  ({prob_str})  evidence: {ev_str}{more}"
+
+    def _row(self, item):
+        t_wall, t_lsl, label, probs, _ = item
+        return ",".join([f"{t_wall:.4f}", "" if t_lsl is None else f"{t_lsl:.4f}", label or ""] +
+                        [f"{p:.5f}" for p in probs]) + "\n"
+
+    def _run(self):
+        f = None
+        if self.path:
+            f = open(self.path, "a", buffering=1 << 16)
+            if f.tell() == 0:
+                f.write(",".join(["wall_time", "lsl_time", "label"] + [f"p_{c}" for c in self.classes]) + "\n")
+        next_line = next_status = 0.0
+        skipped, shown, status_on = 0, None, False
+        try:
+            while True:
+                try:
+                    item = self._q.get(timeout=self.status_dt or 0.5)
+                except queue.Empty:
+                    item = False
+                now = time.monotonic()
+                if item is None:
+                    if self.console and skipped:
+                        print(f"{'' if not status_on else chr(10)}   … +{skipped} windows not shown (log_hz)")
+                    break
+                if item:
+                    if f is not None:
+                        f.write(self._row(item))
+                    # beslutninger (evidens-modus) vises alltid, ellers maks console_hz linjer/s
+                    if self.console and (now >= next_line or (item[4] is not None and item[2])):
+                        print(("\n" if status_on else "") + self._line(item, skipped))
+                        skipped, next_line, status_on = 0, now + self.console_dt, False
+                    else:
+                        skipped += 1
+                if self.console and self.status_dt and now >= next_status and self.received != shown:
+                    shown = self.received
+                    sys.stdout.write(f"\r… received {shown:,} samples")
+                    sys.stdout.flush()
+                    next_status, status_on = now + self.status_dt, True
+        finally:
+            if f is not None:
+                f.close()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# ===============================================================
+# bench.py – ytelsestest av live-pipelinene uten EEG-maskinvare
+# ===============================================================
+"""
+Replays a recording (or a synthetic signal) unthrottled through the engine,
+in process, and reports throughput, per-window latency and memory for every
+preset whose artefacts are present.
+
+    python -m eeg_engine.bench
+    python -m eeg_engine.bench --preset multiclass multiclass_new --step 125 --json bench.json
+    python -m eeg_engine.bench --csv csv_output/Person5Recording4.csv --variants baseline
+
+Variants: baseline = zero-phase filtfilt + joblib pipeline (the old loop),
+fast = causal filtering + incremental covariances + flat predictor (EEGNet
+presets: causal filtering only).
+Per-window latency is features + predict_proba + push for one window; with
+causal filtering the per-chunk filter cost is only in windows/s. Memory is
+the tracemalloc peak of a separate run of each variant (Python + NumPy
+allocations), so the rows are comparable; --no-memory skips that run.
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from .config import PRESETS, get_config
+from .engine import StreamEngine
+from .replay import ReplaySource, load_recording, synthetic_recording, replay_into
+
+VARIANTS = {
+    "baseline": {},
+    "fast":     {"filter_mode": "causal", "cov_mode": "incremental", "predictor": "flat"},
+}
+
+
+class _Timed(StreamEngine):
+    """Quiet engine that times every classify() call."""
+    lat = None
+
+    def classify(self, win):
+        t0 = time.perf_counter()
+        r  = super().classify(win)
+        if self.lat is None:
+            self.lat = []
+        self.lat.append(time.perf_counter() - t0)
+        return r
+
+    def report(self, label, probs):
+        pass
+
+
+def bench_one(cfg, rec, art, chunk=20, memory=True):
+    eng = _Timed(cfg, artifacts=art)
+    t0  = time.perf_counter()
+    n   = len(replay_into(eng, ReplaySource(rec, chunk, speed=0)))
+    wall = time.perf_counter() - t0
+    lat  = np.array(eng.lat or [np.nan]) * 1e3
+    row = {
+        "preset": cfg.name, "windows": n, "seconds": round(wall, 3),
+        "windows_per_s": round(n / wall, 1),
+        "realtime_x":    round(rec.data.shape[0] / rec.sfreq / wall, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+    }
+    if memory:
+        # egen runde: tracemalloc gjør Python-allokeringer tregere
+        tracemalloc.start()
+        replay_into(_Timed(cfg, artifacts=art), ReplaySource(rec, chunk, speed=0))
+        row["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+    return row
+
+
+def main():
+    from .artifacts import load_artifacts
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", nargs="+", choices=list(PRESETS), default=list(PRESETS))
+    ap.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    ap.add_argument("--csv", default=None)
+    ap.add_argument("--seconds", type=float, default=120.0, help="length of the synthetic signal")
+    ap.add_argument("--step", type=int, default=None, help="default: step_len from preproc_meta")
+    ap.add_argument("--chunk", type=int, default=20)
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--json", default=None, help="also write the rows here (for CI)")
+    args = ap.parse_args()
+
+    rows = []
+    for name in args.preset:
+        base = get_config(name, verbose=False, step_len=args.step)
+        if not os.path.exists(base.path(base.pipeline_file)):
+            print(f"⏭  {name}: no artefacts in {base.art_dir}")
+            continue
+        art = load_artifacts(base)
+        rec = (load_recording(args.csv, art.channels, art.sfreq) if args.csv
+               else synthetic_recording(art.channels, art.sfreq, args.seconds))
+        for v in args.variants:
+            over = VARIANTS[v]
+            if base.model == "eegnet":         # ingen kovarianser: bare filtreringen varierer
+                over = {k: x for k, x in over.items() if k == "filter_mode"}
+            row = bench_one(get_config(name, verbose=False, step_len=args.step, **over),
+                            rec, art, args.chunk, not args.no_memory)
+            row["variant"] = v
+            rows.append(row)
+            print(f"{name:<15} {v:<9} {row['windows']:5d} win  {row['windows_per_s']:8.1f} win/s "
+                  f"({row['realtime_x']:6.1f}× real time)  p50={row['p50_ms']:6.2f}  p95={row['p95_ms']:6.2f}  "
+                  f"p99={row['p99_ms']:6.2f} ms  peak={row.get('peak_traced_mb', float('nan')):6.1f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"💾 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
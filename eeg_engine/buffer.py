@@ -0,0 +1,98 @@
+# ===============================================================
+# buffer.py – preallokert sirkulær buffer med view-baserte vinduer
+# ===============================================================
+import numpy as np
+
+
+class ChannelSelect:
+    """
+    Source columns → model channel order for (n_samples, n_source_ch) chunks.
+    Contiguous mappings become a plain slice; anything else goes through
+    np.take into a preallocated scratch array.
+    """
+    def __init__(self, sel_idx, n_ch, max_chunk=1024, dtype=np.float32):
+        self._sel = None
+        if sel_idx is not None:
+            sel = np.asarray(sel_idx, dtype=np.intp)
+            if sel.size and np.array_equal(sel, np.arange(sel[0], sel[0] + sel.size)):
+                self._sel = slice(int(sel[0]), int(sel[0]) + sel.size)
+            else:
+                self._sel = sel
+        self.max_chunk = max_chunk
+        self._scratch  = np.empty((max_chunk, n_ch), dtype)
+
+    def __call__(self, chunk):
+        if self._sel is None:
+            return chunk
+        if isinstance(self._sel, slice):
+            return chunk[:, self._sel]
+        return np.take(chunk, self._sel, axis=1, out=self._scratch[:chunk.shape[0]])
+
+
+class RingBuffer:
+    """
+    Fixed (n_ch, capacity) circular buffer that is written in place.
+
+    Storage is mirrored: every sample lands at `i` and `i + capacity`, so the
+    newest `n` samples (n <= capacity) are always one contiguous slice and
+    `window()` can hand out a view instead of a copy. Nothing is allocated
+    after __init__.
+    """
+    def __init__(self, n_ch, capacity, max_chunk=1024, sel_idx=None, dtype=np.float32):
+        self.n_ch     = n_ch
+        self.capacity = capacity
+        self._data    = np.zeros((n_ch, 2 * capacity), dtype)
+        self._head    = 0          # next write position in [0, capacity)
+        self.total    = 0          # samples written since start/reset
+        self.set_channels(sel_idx, max_chunk)
+
+    def set_channels(self, sel_idx, max_chunk=1024):
+        """Channel mapping from source columns → buffer rows (None = identity)."""
+        self.select = ChannelSelect(sel_idx, self.n_ch, max_chunk, self._data.dtype)
+
+    def reset(self):
+        self._head = 0
+        self.total = 0
+
+    def write(self, chunk, selected=False):
+        """
+        Append `chunk` of shape (n_samples, n_source_channels) – the LSL layout.
+        Channels are selected via the mapping given in set_channels(), unless
+        `selected` says the caller already did that.
+        """
+        n, step = chunk.shape[0], self.select.max_chunk
+        if n > step:
+            for s in range(0, n, step):
+                self.write(chunk[s:s + step], selected)
+            return
+        src = chunk if selected else self.select(chunk)
+
+        cap, h = self.capacity, self._head
+        if n >= cap:                          # only the newest `cap` samples survive
+            src = src[n - cap:]
+        m = src.shape[0]
+        first = min(m, cap - h)
+        self._put(h, src[:first])
+        if m > first:
+            self._put(0, src[first:])
+        self._head  = (h + m) % cap
+        self.total += n
+
+    def _put(self, pos, block):
+        cap, m = self.capacity, block.shape[0]
+        self._data[:, pos:pos + m]             = block.T
+        self._data[:, pos + cap:pos + cap + m] = block.T
+
+    def window(self, n=None):
+        """View of the newest `n` samples (default: capacity), oldest first."""
+        n = self.capacity if n is None else n
+        end = self._head + self.capacity
+        return self._data[:, end - n:end]
+
+    def window_at(self, end_total, n):
+        """View of `n` samples ending at absolute sample index `end_total`."""
+        back = self.total - end_total
+        if back < 0 or back + n > self.capacity:
+            raise IndexError("requested window is no longer (or not yet) in the buffer")
+        end = self._head + self.capacity - back
+        return self._data[:, end - n:end]
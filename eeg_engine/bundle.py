@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# ===============================================================
+# bundle.py – én versjonert artefakt-mappe med manifest (mmap-bare arrays)
+# ===============================================================
+"""
+Packs a preset's four artefact files into one versioned directory that the
+engine picks up automatically (EngineConfig.bundle):
+
+    python -m eeg_engine.bundle --preset multiclass              # → saved_artifacts_multiclass/multiclass.bundle
+    python -m eeg_engine.bundle --preset multiclass --startup    # cold start: loose files vs bundle
+
+Layout:
+
+    multiclass.bundle/manifest.json     version, preset, channels, preproc_meta, classes, array index,
+                                        hashes of the four source files
+    multiclass.bundle/flat/<name>.npy   FlatPredictor arrays (eeg_engine.compiled), opened memory-mapped
+    multiclass.bundle/pipeline.joblib   byte copy of the fitted pipeline, unpickled only if needed
+
+With `--flat` a bundle serves from the .npy files alone: joblib, sklearn and
+pyriemann are never imported. Classes are stored as strings in the manifest,
+so nothing is loaded with allow_pickle. A bundle is ignored (with a warning)
+in favour of the loose files when any of its sources – pipeline, channels,
+preproc_meta, classes – has changed since it was built, or when it was built
+by another bundle version.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from .artifacts import Artifacts
+
+VERSION = 2
+
+# kildefilene en bundle bygges fra: rolle → EngineConfig.<rolle>_file
+SOURCES = ("pipeline", "channels", "meta", "classes")
+
+
+def bundle_path(cfg):
+    return cfg.bundle or cfg.path(f"{cfg.name}.bundle")
+
+
+def _file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_manifest(path):
+    with open(os.path.join(path, "manifest.json")) as f:
+        m = json.load(f)
+    if m["version"] != VERSION:
+        raise ValueError(f"{path}: bundle version {m['version']}, expected {VERSION}")
+    return m
+
+
+def _source(cfg, role):
+    return cfg.path(getattr(cfg, f"{role}_file"))
+
+
+def stale_sources(manifest, cfg):
+    """The preset's loose source files that exist and differ from the ones the bundle was built from."""
+    return [os.path.basename(_source(cfg, role)) for role, h in manifest["source_hashes"].items()
+            if os.path.exists(_source(cfg, role)) and _file_hash(_source(cfg, role)) != h]
+
+
+# ------------------------------------------------------------------- write
+def write_bundle(cfg, out=None, flat=True):
+    """Loose artefacts of `cfg` → bundle directory (written to a temp dir, then renamed). Returns the manifest."""
+    from .artifacts import load_artifacts
+    from dataclasses import replace
+    out = out or bundle_path(cfg)
+    art = load_artifacts(replace(cfg, bundle="off"))
+    tmp = out + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(os.path.join(tmp, "flat"))
+    shutil.copyfile(cfg.path(cfg.pipeline_file), os.path.join(tmp, "pipeline.joblib"))
+
+    arrays = {}
+    if flat:
+        from .compiled import compile_pipeline
+        try:
+            fp = compile_pipeline(art.pipe)
+        except NotImplementedError as e:
+            print(f"   ⚠ no flat predictor in the bundle: {e}")
+        else:
+            for name, a in fp.arrays().items():
+                np.save(os.path.join(tmp, "flat", f"{name}.npy"), a)
+                arrays[name] = {"shape": list(a.shape), "dtype": a.dtype.str}
+
+    manifest = {
+        "version":       VERSION,
+        "preset":        cfg.name,
+        "created":       time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "channels":      list(art.channels),
+        "meta":          art.meta,
+        "classes":       [str(c) for c in art.classes],
+        "pipeline":      "pipeline.joblib",
+        "source_hashes": {role: _file_hash(_source(cfg, role)) for role in SOURCES},
+        "flat":          arrays,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    return manifest
+
+
+# -------------------------------------------------------------------- load
+def load_bundle(path, mmap_mode="r"):
+    """Bundle directory → Artifacts; the flat arrays are memory-mapped, the pipeline is loaded lazily."""
+    m = read_manifest(path)
+    flat = None
+    if m["flat"]:
+        from .compiled import FlatPredictor
+        flat = FlatPredictor(**{name: np.load(os.path.join(path, "flat", f"{name}.npy"),
+                                              mmap_mode=mmap_mode if spec["shape"] else None)   # scalars: plain
+                                for name, spec in m["flat"].items()})
+    return Artifacts(m["channels"], m["meta"], np.array(m["classes"]),
+                     pipe_path=os.path.join(path, m["pipeline"]), flat=flat)
+
+
+# --------------------------------------------------------------------- CLI
+_STARTUP = """
+import time, numpy as np
+t0 = time.perf_counter()
+from eeg_engine.config import get_config
+from eeg_engine.engine import StreamEngine
+cfg = get_config({preset!r}, bundle={bundle!r}, predictor={predictor!r}, verbose=False, warmup=0{art})
+eng = StreamEngine(cfg)
+t1 = time.perf_counter()
+x  = np.random.default_rng(0).standard_normal((eng.win_len, len(eng.art.channels))).astype(np.float32)
+eng.report = lambda *a: None
+eng.feed(x)
+t2 = time.perf_counter()
+eng.next_end = eng.ring.total + eng.win_len
+eng.feed(x)
+t3 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2)
+"""
+
+
+def startup_times(cfg, bundle, predictor, art_dir=None):
+    """Fresh interpreter: (import + load, first window, second window) in seconds."""
+    import subprocess
+    import sys
+    code = _STARTUP.format(preset=cfg.name, bundle=bundle, predictor=predictor,
+                           art=f", art_dir={art_dir!r}" if art_dir else "")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    res = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=root,
+                         capture_output=True, text=True, check=True)
+    return [float(v) for v in res.stdout.split()[-3:]]
+
+
+def main():
+    from .config import PRESETS, get_config
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--out", default=None, help="bundle directory (default: <art_dir>/<preset>.bundle)")
+    ap.add_argument("--no-flat", action="store_true", help="pipeline only, no flat predictor arrays")
+    ap.add_argument("--startup", action="store_true",
+                    help="measure cold start in fresh interpreters: loose files vs bundle")
+    args = ap.parse_args()
+
+    cfg = get_config(args.preset, **({"art_dir": args.art_dir} if args.art_dir else {}),
+                     **({"bundle": args.out} if args.out else {}))
+    m = write_bundle(cfg, flat=not args.no_flat)
+    print(f"💾 {bundle_path(cfg)}: {len(m['channels'])} ch • classes {m['classes']} • "
+          f"{len(m['flat'])} flat arrays")
+
+    if args.startup:
+        print(f"\n{'':<24} {'import+load':>12} {'1st window':>11} {'2nd window':>11}")
+        runs = [("loose files, pipeline", "off", "pipeline"), ("bundle, pipeline", bundle_path(cfg), "pipeline")]
+        if m["flat"]:
+            runs += [("loose files, flat", "off", "flat"), ("bundle, flat", bundle_path(cfg), "flat")]
+        for label, bundle, predictor in runs:
+            t = startup_times(cfg, bundle, predictor, args.art_dir)
+            print(f"{label:<24} {t[0]*1e3:10.0f}ms {t[1]*1e3:9.1f}ms {t[2]*1e3:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
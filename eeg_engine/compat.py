@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# ===============================================================
+# compat.py – sjekk causal/overlap-modus mot zero-phase (filtfilt) som i treningen
+# ===============================================================
+"""
+Runs the same signal through a reference path (by default zero-phase
+filtfilt per window, as in the notebook) and through the causal streaming
+path, on identical window ends, and reports how far the features in front of
+the classifier (scaled tangent-space vectors) and the class probabilities
+move.
+
+    python -m eeg_engine.compat --preset multiclass --step 125
+    python -m eeg_engine.compat --preset multiclass_new --csv csv_output/Person5Recording4.csv
+    python -m eeg_engine.compat --preset multiclass --ref causal --cov incremental
+    python -m eeg_engine.compat --preset multiclass_new --fb-design sos
+
+Without --csv a synthetic 1/f signal with a 10 Hz rhythm is used. The first
+`--settle` seconds are skipped so the causal filter state has converged.
+
+--fb-design compares the zero-phase filterbank with the given coefficients
+against the ones the model was trained with (preproc_meta["fb_design"], "ba"
+for the shipped multiclass_new), i.e. how far switching the filter design
+without a retrain moves the features.
+"""
+import argparse
+from dataclasses import replace
+
+import numpy as np
+
+from .config import PRESETS, get_config
+from .engine import StreamEngine
+
+
+class _Silent(StreamEngine):
+    """No console output; keeps the pre-classifier features of every window."""
+    feats = None
+
+    def features(self, win):
+        f = super().features(win)
+        if self.feats is None:
+            self.feats = []
+        self.feats.append(f[0])
+        return f
+
+    def report(self, label, probs):
+        pass
+
+
+def synthetic_eeg(n_ch, n_samples, sfreq, seed=0):
+    """1/f noise + a 10 Hz rhythm + 50 Hz mains, (n_samples, n_ch) float32 in µV-ish scale."""
+    rng  = np.random.default_rng(seed)
+    spec = rng.standard_normal((n_ch, n_samples // 2 + 1)) + 1j * rng.standard_normal((n_ch, n_samples // 2 + 1))
+    f    = np.fft.rfftfreq(n_samples, 1 / sfreq)
+    spec /= np.maximum(f, 1.0)
+    x = np.fft.irfft(spec, n_samples, axis=1)
+    t = np.arange(n_samples) / sfreq
+    x += 0.5 * np.sin(2*np.pi*10*t) * rng.standard_normal((n_ch, 1))
+    x += 0.2 * np.sin(2*np.pi*50*t)
+    x *= 20.0 / x.std()
+    return x.T.astype(np.float32)
+
+
+def load_csv(path, channels):
+    from .replay import load_recording
+    return load_recording(path, channels).data
+
+
+def compare(cfg, data, artifacts=None, ref=None, test=None, chunk=32, settle_s=4.0):
+    """
+    Features/probabilities of two engine variants of `cfg` on the same window
+    ends → dict of summary stats. `ref`/`test` are config overrides; default
+    zero-phase vs causal.
+    """
+    ref  = ref  or {"filter_mode": "zero_phase"}
+    test = test or {"filter_mode": "causal"}
+    zp = _Silent(replace(cfg, verbose=False, **ref), artifacts=artifacts)
+    ca = _Silent(replace(cfg, verbose=False, **test), artifacts=zp.art)
+    res = {}
+    for name, eng in (("ref", zp), ("test", ca)):
+        out, ends = [], []
+        for s in range(0, data.shape[0], chunk):
+            end0 = eng.next_end
+            got  = eng.feed(data[s:s + chunk])
+            out += [p for _, p in got]
+            ends += list(range(end0, end0 + len(got) * eng.step_len, eng.step_len))
+        res[name] = (np.array(ends), np.array(out))
+
+    ends, p_zp = res["ref"]
+    keep = ends >= settle_s * zp.sfreq
+    p_zp, p_ca = p_zp[keep], res["test"][1][keep]
+    f_zp, f_ca = np.array(zp.feats)[keep], np.array(ca.feats)[keep]
+    d = np.abs(p_zp - p_ca)
+    return {
+        "windows":         int(keep.sum()),
+        "feat_rel_err":    float(np.linalg.norm(f_zp - f_ca) / np.linalg.norm(f_zp)),
+        "feat_corr":       float(np.corrcoef(f_zp.ravel(), f_ca.ravel())[0, 1]),
+        "label_agreement": float(np.mean(p_zp.argmax(1) == p_ca.argmax(1))),
+        "mean_abs_dp":     float(d.mean()),
+        "max_abs_dp":      float(d.max()),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--step", type=int, default=125)
+    ap.add_argument("--csv", default=None, help="recording in csv_output format (time/channels/annotation)")
+    ap.add_argument("--seconds", type=float, default=60.0, help="length of the synthetic signal")
+    ap.add_argument("--settle", type=float, default=4.0)
+    ap.add_argument("--ref", choices=["zero_phase", "causal"], default="zero_phase",
+                    help="reference filter mode (batch covariances)")
+    ap.add_argument("--cov", choices=["batch", "incremental"], default="batch",
+                    help="covariance mode of the causal path under test")
+    ap.add_argument("--fb-design", choices=["ba", "sos"], default=None,
+                    help="filterbank: zero-phase with these coefficients vs the trained ones (instead of causal)")
+    args = ap.parse_args()
+
+    over = {"step_len": args.step}
+    if args.art_dir:
+        over["art_dir"] = args.art_dir
+    cfg = get_config(args.preset, **over)
+    from .artifacts import load_artifacts
+    art = load_artifacts(cfg)
+    if args.csv:
+        data = load_csv(args.csv, art.channels)
+    else:
+        data = synthetic_eeg(len(art.channels), int(args.seconds * art.sfreq), art.sfreq)
+
+    if args.fb_design:
+        from .filters import fb_design
+        ref, test = ({"filter_mode": "zero_phase", "fb_design": fb_design(art.meta)},
+                     {"filter_mode": "zero_phase", "fb_design": args.fb_design})
+        what = f"fb_design {ref['fb_design']} vs {args.fb_design}"
+    else:
+        ref, test = ({"filter_mode": args.ref, "cov_mode": "batch"},
+                     {"filter_mode": "causal", "cov_mode": args.cov})
+        what = f"{args.ref} vs causal/{args.cov}"
+    r = compare(cfg, data, art, settle_s=args.settle, ref=ref, test=test)
+    print(f"\n{cfg.name} [{what}]: {r['windows']} windows @ step={args.step}  "
+          f"features rel.err={r['feat_rel_err']:.2e} corr={r['feat_corr']:.3f}  "
+          f"label agreement={r['label_agreement']:.1%}  "
+          f"|Δp| mean={r['mean_abs_dp']:.3f} max={r['max_abs_dp']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
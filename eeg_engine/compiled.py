@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# ===============================================================
+# compiled.py – fitted joblib-pipeline → flat, vektorisert NumPy-prediktor
+# ===============================================================
+"""
+Turns a fitted pipeline (cov → [CSP] → CovTransport → TangentSpace →
+StandardScaler → SelectKBest → head) into a FlatPredictor that holds only
+arrays and evaluates whole batches with einsum/matmul and one batched eigh.
+Heads: SVC (the notebook model) and the eeg_train.export heads, i.e.
+LogisticRegression with or without a Nystroem RBF map in front.
+
+    python -m eeg_engine.compiled --preset multiclass --check    # equivalence vs joblib pipeline (exit 1 above --tol)
+    python -m eeg_engine.compiled --preset multiclass --bench    # single-window / batch latency
+    python -m eeg_engine.compiled --preset multiclass --out saved_artifacts_multiclass/multiclass_flat.npz
+"""
+import argparse
+import time
+
+import numpy as np
+
+from .covariance import oas_covariances, _cov_index
+
+_MIN_PROB = 1e-7      # libsvm clamps pairwise probabilities to [1e-7, 1-1e-7]
+
+
+# ------------------------------------------------------------------ export
+def _branch_whitening(steps):
+    """
+    Collapse [CSP] → CovTransport → TangentSpace into one matrix M with
+    logm(M C Mᵀ) = tangent-space matrix, plus a check that the branch is
+    something we know how to flatten.
+    """
+    M = None
+    for name, step in steps:
+        kind = type(step).__name__
+        if kind == "CSP":
+            if step.log:
+                raise NotImplementedError("CSP(log=True) is not supported")
+            W = step.filters_
+        elif kind == "CovTransport":
+            W = step.G_inv_sqrt_
+        elif kind == "TangentSpace":
+            if step.tsupdate or step.metric not in ("riemann", None):
+                raise NotImplementedError("only TangentSpace(metric='riemann', tsupdate=False)")
+            w, V = np.linalg.eigh(step.reference_)
+            W = (V / np.sqrt(w)) @ V.T
+        else:
+            raise NotImplementedError(f"cannot flatten step '{name}' ({kind})")
+        M = W if M is None else W @ M
+    return M
+
+
+def _head_arrays(steps):
+    """StandardScaler / SelectKBest / SVC | [Nystroem →] LogisticRegression → dict of arrays."""
+    out = {}
+    for name, step in steps:
+        kind = type(step).__name__
+        if kind == "Pipeline":                   # eeg_train.export: make_pipeline(Nystroem, LogisticRegression)
+            out.update(_head_arrays(step.steps))
+        elif kind == "StandardScaler":
+            out["mean"]  = step.mean_  if step.with_mean else np.zeros(step.n_features_in_)
+            out["scale"] = step.scale_ if step.with_std  else np.ones(step.n_features_in_)
+        elif kind == "SelectKBest":
+            out["select"] = np.flatnonzero(step.get_support())
+        elif kind == "SVC":
+            if not step.probability:
+                raise NotImplementedError("SVC must be fitted with probability=True")
+            if step.kernel not in ("rbf", "linear"):
+                raise NotImplementedError(f"SVC kernel '{step.kernel}' is not supported")
+            out.update(
+                sv        = step.support_vectors_,
+                dual_coef = step._dual_coef_,          # libsvm's own sign convention
+                intercept = step._intercept_,
+                n_support = step._n_support,
+                probA     = step.probA_,
+                probB     = step.probB_,
+                gamma     = np.float64(step._gamma if step.kernel == "rbf" else 0.0),
+                classes   = step.classes_,
+            )
+        elif kind == "Nystroem":
+            if step.kernel != "rbf" or step.kernel_params:
+                raise NotImplementedError(f"Nystroem kernel '{step.kernel}' is not supported")
+            out.update(
+                landmarks    = step.components_,
+                landmark_map = step.normalization_,
+                nys_gamma    = np.float64(1.0 / step.components_.shape[1] if step.gamma is None else step.gamma),
+            )
+        elif kind == "LogisticRegression":
+            if getattr(step, "multi_class", "auto") == "ovr":
+                raise NotImplementedError("LogisticRegression(multi_class='ovr') is not supported")
+            out.update(coef=step.coef_, lr_intercept=step.intercept_, classes=step.classes_)
+        else:
+            raise NotImplementedError(f"cannot flatten step '{name}' ({kind})")
+    return out
+
+
+def compile_pipeline(pipe):
+    """Fitted sklearn/pyriemann pipeline → FlatPredictor."""
+    from sklearn.pipeline import FeatureUnion
+    first = pipe.steps[0][1]
+    if isinstance(first, FeatureUnion):
+        Ms = [_branch_whitening(br.steps[_cov_index(br) + 1:]) for _, br in first.transformer_list]
+        head = pipe.steps[1:]
+    else:
+        i = _cov_index(pipe)
+        tail = pipe.steps[i + 1:]
+        n_ts = next(k for k, (_, s) in enumerate(tail) if type(s).__name__ == "TangentSpace") + 1
+        Ms, head = [_branch_whitening(tail[:n_ts])], tail[n_ts:]
+    return FlatPredictor(whitening=np.stack(Ms), **_head_arrays(head))
+
+
+# ----------------------------------------------------------------- runtime
+class FlatPredictor:
+    """
+    Array-only replacement for the fitted pipeline's predict_proba.
+
+    whitening (n_bands, k, C): CSP ∘ CovTransport ∘ reference^{-1/2} per band.
+    Inputs are raw windows (N, C, T) / (N, n_bands, C, T), or covariances
+    (N, n_bands, C, C) from the incremental estimator.
+    """
+    def __init__(self, whitening, mean, scale, select, classes, sv=None, dual_coef=None, intercept=None,
+                 n_support=None, probA=None, probB=None, gamma=None, landmarks=None, landmark_map=None,
+                 nys_gamma=None, coef=None, lr_intercept=None):
+        self.whitening = np.asarray(whitening, np.float64)
+        self.mean, self.scale, self.select = mean, scale, np.asarray(select, np.intp)
+        self.classes_ = np.asarray(classes)
+        # SVC-hode (libsvm) …
+        self.sv, self.dual_coef, self.intercept = sv, dual_coef, intercept
+        self.n_support = None if n_support is None else np.asarray(n_support, np.intp)
+        self.probA, self.probB = probA, probB
+        self.gamma = None if gamma is None else float(gamma)
+        # … eller [Nystroem →] logistisk regresjon
+        self.landmarks, self.landmark_map = landmarks, landmark_map
+        self.nys_gamma = None if nys_gamma is None else float(nys_gamma)
+        self.coef, self.lr_intercept = coef, lr_intercept
+        if (sv is None) == (coef is None):
+            raise ValueError("FlatPredictor needs exactly one head: SVC arrays or LogisticRegression coef")
+
+        k = self.whitening.shape[1]
+        self._iu   = np.triu_indices(k)
+        self._coef = np.where(self._iu[0] == self._iu[1], 1.0, np.sqrt(2))
+        if sv is not None:
+            self._sv_sq = np.einsum("ij,ij->i", sv, sv)
+            # (i, j) class pairs in libsvm order + the SV ranges that vote in each
+            n_cls = len(self.n_support)
+            self._start = np.concatenate([[0], np.cumsum(self.n_support)])
+            self._pairs = [(i, j) for i in range(n_cls) for j in range(i + 1, n_cls)]
+        if landmarks is not None:
+            self._lm_sq = np.einsum("ij,ij->i", landmarks, landmarks)
+
+    @property
+    def head(self):
+        return "svm" if self.sv is not None else "nystroem" if self.landmarks is not None else "linear"
+
+    # ---------------------------------------------------------- features
+    def features_from_cov(self, covs):
+        covs = np.asarray(covs, np.float64)
+        if covs.ndim == 3:                       # (N, C, C) → one band
+            covs = covs[:, np.newaxis]
+        M = self.whitening
+        S = np.einsum("bkc,nbcd,bld->nbkl", M, covs, M, optimize=True)
+        w, V = np.linalg.eigh(S)                 # batched over (N, bands)
+        L = (V * np.log(w)[..., None, :]) @ np.swapaxes(V, -1, -2)
+        T = (L[..., self._iu[0], self._iu[1]] * self._coef).reshape(len(covs), -1)
+        return ((T - self.mean) / self.scale)[:, self.select]
+
+    def features(self, X):
+        X = np.asarray(X, np.float64)
+        if X.ndim == 2:
+            X = X[np.newaxis]
+        return self.features_from_cov(oas_covariances(X))
+
+    # -------------------------------------------------------- classifier
+    def decision_ovo(self, F):
+        """libsvm one-vs-one decision values, (N, n_pairs)."""
+        if self.gamma > 0:
+            d2 = np.einsum("ij,ij->i", F, F)[:, None] + self._sv_sq[None, :] - 2.0 * F @ self.sv.T
+            K = np.exp(-self.gamma * np.maximum(d2, 0.0))
+        else:
+            K = F @ self.sv.T
+        st, dc = self._start, self.dual_coef
+        dec = np.empty((len(F), len(self._pairs)))
+        for p, (i, j) in enumerate(self._pairs):
+            si, sj = slice(st[i], st[i+1]), slice(st[j], st[j+1])
+            dec[:, p] = K[:, si] @ dc[j-1, si] + K[:, sj] @ dc[i, sj] + self.intercept[p]
+        return dec
+
+    def proba_logreg(self, F):
+        """sklearn LogisticRegression.predict_proba, after the Nystroem map if there is one."""
+        if self.landmarks is not None:
+            d2 = np.einsum("ij,ij->i", F, F)[:, None] + self._lm_sq[None, :] - 2.0 * F @ self.landmarks.T
+            F = np.exp(-self.nys_gamma * np.maximum(d2, 0.0)) @ self.landmark_map.T
+        z = F @ self.coef.T + self.lr_intercept
+        if z.shape[1] == 1:                      # binær: sigmoid på én logit
+            p1 = 1.0 / (1.0 + np.exp(-z[:, 0]))
+            return np.column_stack([1.0 - p1, p1])
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        return z / z.sum(axis=1, keepdims=True)
+
+    def proba_from_features(self, F):
+        if self.coef is not None:
+            return self.proba_logreg(F)
+        dec = self.decision_ovo(F)
+        fApB = dec * self.probA + self.probB
+        # libsvm's sigmoid_predict, numerically stable on both sides
+        r = np.where(fApB >= 0, np.exp(-np.abs(fApB)) / (1.0 + np.exp(-np.abs(fApB))),
+                     1.0 / (1.0 + np.exp(-np.abs(fApB))))
+        r = np.clip(r, _MIN_PROB, 1 - _MIN_PROB)
+        k = len(self.n_support)
+        R = np.zeros((len(F), k, k))
+        for p, (i, j) in enumerate(self._pairs):
+            R[:, i, j] = r[:, p]
+            R[:, j, i] = 1 - r[:, p]
+        return _multiclass_probability(R)
+
+    def predict_proba(self, X):
+        return self.proba_from_features(self.features(X))
+
+    def predict_proba_cov(self, covs):
+        return self.proba_from_features(self.features_from_cov(covs))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # --------------------------------------------------------------- I/O
+    _FIELDS = ("whitening", "mean", "scale", "select", "sv", "dual_coef", "intercept",
+               "n_support", "probA", "probB", "gamma", "landmarks", "landmark_map", "nys_gamma",
+               "coef", "lr_intercept", "classes")
+
+    def arrays(self):
+        """name → array for every field this head uses (what save() and the bundle write)."""
+        out = {f: getattr(self, f) for f in self._FIELDS if f != "classes" and getattr(self, f) is not None}
+        out["classes"] = self.classes_.astype(str)
+        return {f: np.asarray(a) for f, a in out.items()}
+
+    def save(self, path):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        with np.load(path, allow_pickle=False, mmap_mode=mmap_mode) as z:
+            return cls(**{f: z[f] for f in z.files})
+
+
+def _multiclass_probability(R):
+    """
+    Wu, Lin & Weng pairwise coupling exactly as libsvm's multiclass_probability,
+    vectorised over the batch. R[n, i, j] = P(i | i or j).
+    """
+    N, k, _ = R.shape
+    Q = -R.transpose(0, 2, 1) * R                              # Q[t, j] = -r[j][t] r[t][j]
+    Q[:, np.arange(k), np.arange(k)] = np.einsum("njt,njt->nt", R, R)   # Σ_j r[j][t]², R[t, t] = 0
+    p   = np.full((N, k), 1.0 / k)
+    eps = 0.005 / k
+    active = np.ones(N, bool)
+    for _ in range(max(100, k)):
+        Qp  = np.einsum("ntj,nj->nt", Q, p)
+        pQp = np.einsum("nt,nt->n", p, Qp)
+        active &= np.abs(Qp - pQp[:, None]).max(axis=1) >= eps
+        if not active.any():
+            break
+        a = active
+        for t in range(k):
+            diff = (-Qp[a, t] + pQp[a]) / Q[a, t, t]
+            p[a, t] += diff
+            pQp[a] = (pQp[a] + diff * (diff * Q[a, t, t] + 2 * Qp[a, t])) / (1 + diff) / (1 + diff)
+            Qp[a] = (Qp[a] + diff[:, None] * Q[a, t, :]) / (1 + diff)[:, None]
+            p[a]  /= (1 + diff)[:, None]
+    return p
+
+
+# -------------------------------------------------------------------- CLI
+def _inputs_near_sv(flat, n, n_times, seed=0):
+    """
+    Raw windows whose tangent-space features land near the model's support
+    vectors or Nystroem landmarks, or at unit spread for a linear head
+    (synthetic noise is far outside the training distribution and gives
+    constant probabilities). Per band: SV feature row → tangent matrix L
+    → covariance C with M C Mᵀ = expm(L) → Gaussian samples with covariance C.
+    """
+    rng = np.random.default_rng(seed)
+    B, k, C = flat.whitening.shape
+    n_ts = len(flat._coef)
+    z = np.zeros((n, B * n_ts))
+    # SVC: støttevektorer; Nystroem: landemerker; lineært hode: standardiserte trekk ~ N(0, 1)
+    anchors = flat.sv if flat.sv is not None else flat.landmarks
+    centre  = 0.0 if anchors is None else anchors[rng.integers(0, len(anchors), n)]
+    z[:, flat.select] = centre + (0.3 if anchors is not None else 1.0) * rng.standard_normal((n, len(flat.select)))
+    T = (z * flat.scale + flat.mean).reshape(n, B, n_ts)
+    X = np.empty((n, B, C, n_times))
+    for b in range(B):
+        Mp   = np.linalg.pinv(flat.whitening[b])                  # (C, k)
+        null = np.eye(C) - Mp @ flat.whitening[b]
+        for t in range(n):
+            L = np.zeros((k, k))
+            L[flat._iu] = T[t, b] / flat._coef
+            L = L + np.triu(L, 1).T
+            w, V = np.linalg.eigh(L)
+            Cov = Mp @ (V * np.exp(w)) @ V.T @ Mp.T
+            Cov += null * np.trace(Cov) / C
+            X[t, b] = np.linalg.cholesky(Cov + 1e-12 * np.eye(C)) @ rng.standard_normal((C, n_times))
+    return X[:, 0] if B == 1 else X
+
+
+def _timeit(f, reps):
+    f()
+    t = time.perf_counter()
+    for _ in range(reps):
+        f()
+    return (time.perf_counter() - t) / reps * 1e3
+
+
+def main():
+    from .config import PRESETS, get_config
+    from .artifacts import load_artifacts
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--check", action="store_true", help="compare against the joblib pipeline")
+    ap.add_argument("--bench", action="store_true", help="latency, single window and batch")
+    ap.add_argument("--windows", type=int, default=32)
+    ap.add_argument("--out", default=None, help="write the flat predictor as .npz")
+    ap.add_argument("--tol", type=float, default=1e-6, help="max |Δ| of features and proba accepted by --check")
+    args = ap.parse_args()
+
+    cfg  = get_config(args.preset, **({"art_dir": args.art_dir} if args.art_dir else {}))
+    art  = load_artifacts(cfg)
+    flat = compile_pipeline(art.pipe)
+    head = (f"{len(flat.sv)} support vectors" if flat.head == "svm" else
+            f"{len(flat.landmarks)} Nystroem landmarks + logreg" if flat.head == "nystroem" else "logreg")
+    print(f"⚙  {cfg.name}: whitening {flat.whitening.shape}, {len(flat.select)} features, "
+          f"{head}, classes={list(flat.classes_)}")
+
+    ok = True
+    if args.check or args.bench:
+        X = _inputs_near_sv(flat, args.windows, art.win_len)
+    if args.check:
+        p_ref  = art.pipe.predict_proba(X)
+        p_flat = flat.predict_proba(X)
+        f_ref  = art.pipe[:-1].transform(X)
+        f_flat = flat.features(X)
+        rows = [("features", np.abs(f_ref - f_flat).max()), ("proba", np.abs(p_ref - p_flat).max())]
+        for name, err in rows:
+            print(f"   {'✅' if err <= args.tol else '❌'} {name:<9} max|Δ|={err:.2e}")
+        same = np.array_equal(p_ref.argmax(1), p_flat.argmax(1))
+        print(f"   {'✅' if same else '❌'} labels equal on all {len(X)} windows "
+              f"(spread of p over the inputs: {p_ref.std(0).max():.3f})")
+        ok = same and all(err <= args.tol for _, err in rows)
+    if args.bench:
+        x1 = X[:1]
+        for name, f1, fb in (("joblib", lambda: art.pipe.predict_proba(x1), lambda: art.pipe.predict_proba(X)),
+                             ("flat",   lambda: flat.predict_proba(x1),     lambda: flat.predict_proba(X))):
+            t1, tb = _timeit(f1, 50), _timeit(fb, 5)
+            print(f"   {name:<7} single {t1:7.2f} ms   batch({len(X)}) {tb:8.2f} ms  → {tb/len(X):6.2f} ms/window")
+    if args.out:
+        flat.save(args.out)
+        print(f"💾 {args.out}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# ===============================================================
+# config.py – artefakt-sett og engine-parametre for live inferens
+# ===============================================================
+import os
+from dataclasses import dataclass, field, replace
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# samme bånd-definisjon som under trening (filterbank_multiclass_new)
+FB_BANDS = {
+    'delta': (1,   4),
+    'theta': (4,   8),
+    'alpha': (8,  12),
+    'beta':  (12, 30),
+    'gamma': (30,100)
+}
+
+
+@dataclass
+class EngineConfig:
+    """Everything one live inference session needs: artefacts, preprocessing and LSL names."""
+    name:          str
+    art_dir:       str
+    pipeline_file: str
+    channels_file: str
+    meta_file:     str
+    classes_file:  str
+    n_channels:    int   = None              # reduced montage → artefacts in <art_dir>/channels_<N> (eeg_train.channels)
+    model:         str   = "riemann"         # "eegnet" → converted Keras EEGNet, NumPy only (eeg_engine.eegnet)
+    preproc:       str   = "bandpass"        # "bandpass" (notch + 1–40 Hz) | "filterbank"
+    bands:         dict  = field(default_factory=dict)
+    step_len:      int   = None              # None → preproc_meta["step_len"]; < window_len gives overlap
+    filter_mode:   str   = "zero_phase"      # "zero_phase" (filtfilt per window) | "causal" (stateful SOS)
+    cov_mode:      str   = "batch"           # "incremental" → running-sum OAS covariances (needs causal)
+    predictor:     str   = "pipeline"        # "flat" → compiled NumPy predictor (eeg_engine.compiled)
+    fb_dtype:      str   = "float64"         # "float32" → single-precision filterbank
+    fb_design:     str   = None              # "ba" (notebook filtfilt) | "sos"; None → preproc_meta["fb_design"]
+    ingest:        str   = "thread"          # "thread" (blocking acquisition thread) | "poll" (pull + 2 ms sleep)
+    ingest_s:      float = 30.0              # seconds of raw samples the acquisition thread can hold
+    overload:      str   = "off"             # "drop" | "coalesce" windows older than max_stale_s (engine.shed)
+    max_stale_s:   float = 0.5               # s from a window's newest sample to its classification
+    metrics_file:  str   = None              # Prometheus textfile with per-stage latency (None → off)
+    metrics_s:     float = 10.0              # export interval of metrics_file
+    budget_ms:     float = 10.0              # max single-window predict_proba p95 accepted by eeg_train.export
+    bundle:        str   = None              # None → <art_dir>/<name>.bundle if present | path | "off"
+    warmup:        int   = 3                 # synthetic windows run through the model before connecting
+    scales:        tuple = ()                # window lengths in s → eeg_engine.multiscale (needs causal)
+    fusion:        str   = "geometric"       # per-scale probabilities: "geometric" | "mean"
+    decision:      str   = "window"          # "window" (argmax per window) | "evidence" (eeg_engine.decision)
+    ev_half_life:  float = 1.0               # s, half-life of the accumulated log-probabilities
+    ev_threshold:  float = 0.9               # posterior needed for a decision
+    ev_dwell:      float = 0.25              # s the leading class must hold the threshold
+    ev_refractory: float = 1.0               # s without a new decision after the last one
+    in_name:       str   = "BrainVision RDA"
+    rda:           str   = None              # "host[:port]" → recorder's RDA port directly, no LSL inlet (eeg_engine.rda)
+    out_name:      str   = "MI_Pred"
+    prob_name:     str   = None              # float32 probability outlet; None → <out_name>_Prob | "off"
+    log_file:      str   = None              # CSV of every window (wall/LSL time, label, probabilities)
+    log_hz:        float = 5.0               # max console lines per second (decisions are always shown)
+    poll_s:        float = 1.0
+    max_chunk:     int   = 1024              # samples per pull_chunk into the preallocated buffer
+    verbose:       bool  = True
+
+    def path(self, fname):
+        return os.path.join(self.art_dir, fname)
+
+
+PRESETS = {
+    "binary": EngineConfig(
+        name          = "binary",
+        art_dir       = os.path.join(ROOT_DIR, "saved_artifacts"),
+        pipeline_file = "lda_riemann_pipeline.joblib",
+        channels_file = "eeg_channels.json",
+        meta_file     = "preproc_meta.json",
+        classes_file  = "label_classes.npy",
+    ),
+    "multiclass": EngineConfig(
+        name          = "multiclass",
+        art_dir       = os.path.join(ROOT_DIR, "saved_artifacts_multiclass"),
+        pipeline_file = "multiclass_riemann_pipeline.joblib",
+        channels_file = "eeg_channels_multiclass.json",
+        meta_file     = "preproc_meta_multiclass.json",
+        classes_file  = "label_classes_multiclass.npy",
+    ),
+    "multiclass_new": EngineConfig(
+        name          = "multiclass_new",
+        art_dir       = os.path.join(ROOT_DIR, "saved_artifacts_multiclass_new"),
+        pipeline_file = "filterbank_multiclass_new_pipeline.joblib",
+        channels_file = "eeg_channels_multiclass_new.json",
+        meta_file     = "preproc_meta_multiclass_new.json",
+        classes_file  = "label_classes_multiclass_new.npy",
+        preproc       = "filterbank",
+        bands         = dict(FB_BANDS),
+    ),
+    # EEGNet fra notebooken, konvertert fra old/best_eegnet_*.h5 (python -m eeg_engine.eegnet --convert)
+    "eegnet_binary": EngineConfig(
+        name          = "eegnet_binary",
+        art_dir       = os.path.join(ROOT_DIR, "saved_artifacts_eegnet"),
+        pipeline_file = "eegnet_binary.npz",
+        channels_file = "eeg_channels_eegnet.json",
+        meta_file     = "preproc_meta_eegnet.json",
+        classes_file  = "label_classes_eegnet_binary.npy",
+        model         = "eegnet",
+    ),
+    "eegnet_multiclass": EngineConfig(
+        name          = "eegnet_multiclass",
+        art_dir       = os.path.join(ROOT_DIR, "saved_artifacts_eegnet"),
+        pipeline_file = "eegnet_multiclass.npz",
+        channels_file = "eeg_channels_eegnet.json",
+        meta_file     = "preproc_meta_eegnet.json",
+        classes_file  = "label_classes_eegnet_multiclass.npy",
+        model         = "eegnet",
+    ),
+}
+
+
+def get_config(name, **overrides):
+    """Preset by name, with keyword overrides (e.g. art_dir=..., verbose=False)."""
+    if name not in PRESETS:
+        raise KeyError(f"unknown preset '{name}' (known: {', '.join(PRESETS)})")
+    cfg = replace(PRESETS[name], **overrides)
+    if cfg.n_channels:
+        cfg = replace(cfg, art_dir=subset_dir(cfg, cfg.n_channels))
+    return cfg
+
+
+def subset_dir(cfg, n):
+    """Artefact directory of the preset retrained on its best `n` channels (eeg_train.channels)."""
+    return cfg.path(f"channels_{n}")
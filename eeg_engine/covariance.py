@@ -0,0 +1,104 @@
+# ===============================================================
+# covariance.py – inkrementell OAS-kovarians for Riemann-pipelinene
+# ===============================================================
+import numpy as np
+
+
+def oas_shrink(emp, n):
+    """
+    OAS shrinkage of empirical covariances (..., C, C) from n samples,
+    identical to sklearn.covariance.oas, which pyriemann's Covariances('oas') calls.
+    """
+    p     = emp.shape[-1]
+    alpha = np.mean(emp**2, axis=(-2, -1))
+    mu    = np.trace(emp, axis1=-2, axis2=-1) / p
+    num   = alpha + mu**2
+    den   = (n + 1) * (alpha - mu**2 / p)
+    shrink = np.where(den == 0, 1.0, np.minimum(num / np.where(den == 0, 1.0, den), 1.0))
+    out = (1.0 - shrink)[..., None, None] * emp
+    out[..., np.arange(p), np.arange(p)] += (shrink * mu)[..., None]
+    return out
+
+
+def oas_from_moments(s1, s2, n):
+    """OAS from running sums – s1: (..., C) sum of samples, s2: (..., C, C) sum of outer products."""
+    mu_x = s1 / n
+    return oas_shrink(s2 / n - mu_x[..., :, None] * mu_x[..., None, :], n)
+
+
+def oas_covariances(X):
+    """Batched Covariances(estimator='oas') for X (..., C, T)."""
+    Xc = X - X.mean(axis=-1, keepdims=True)
+    return oas_shrink(Xc @ np.swapaxes(Xc, -1, -2) / X.shape[-1], X.shape[-1])
+
+
+class StreamingCovariance:
+    """
+    Sliding-window first/second moment sums for (n_bands * n_ch) filtered rows.
+
+    advance() adds the samples that entered the window and subtracts the ones
+    that left it, so an update costs O(C²·step) instead of O(C²·window). The
+    sums are rebuilt from the full window every `refresh` samples to keep
+    add/subtract round-off from accumulating. Baseline correction is a
+    per-channel constant and drops out of a centred covariance, so it is not
+    needed on this path.
+    """
+    def __init__(self, n_bands, n_ch, win_len, refresh=None):
+        self.n_bands, self.n_ch, self.win_len = n_bands, n_ch, win_len
+        self.refresh = refresh or 10 * win_len
+        self.s1  = np.zeros((n_bands, n_ch))
+        self.s2  = np.zeros((n_bands, n_ch, n_ch))
+        self.end = None
+        self._since_refresh = 0
+
+    def _sums(self, block):
+        x = block.reshape(self.n_bands, self.n_ch, -1).astype(np.float64, copy=False)
+        return x.sum(axis=-1), np.einsum("bct,bdt->bcd", x, x)
+
+    def advance(self, ring, end):
+        """Move the window so it ends at absolute sample `end` of `ring`."""
+        d = None if self.end is None else end - self.end
+        # etter et hopp (engine.shed) kan prøvene som forlater vinduet være overskrevet → full omregning
+        gone = d is not None and ring.total - (end - self.win_len) + d > ring.capacity
+        if d is None or d >= self.win_len or gone or self._since_refresh + d >= self.refresh:
+            self.s1[:], self.s2[:] = self._sums(ring.window_at(end, self.win_len))
+            self._since_refresh = 0
+        elif d > 0:
+            a1, a2 = self._sums(ring.window_at(end, d))
+            r1, r2 = self._sums(ring.window_at(end - self.win_len, d))
+            self.s1 += a1 - r1
+            self.s2 += a2 - r2
+            self._since_refresh += d
+        self.end = end
+
+    def covariances(self):
+        """(n_bands, n_ch, n_ch) OAS covariances of the current window."""
+        return oas_from_moments(self.s1, self.s2, self.win_len)
+
+
+def _cov_index(pipe):
+    for i, (_, step) in enumerate(pipe.steps):
+        if type(step).__name__ == "Covariances":
+            return i
+    raise ValueError("pipeline has no Covariances step")
+
+
+class CovHead:
+    """
+    The part of a fitted pipeline that comes after `Covariances`, up to (not
+    including) the classifier: (n_bands, C, C) covariances → feature row.
+    Handles both the plain pipelines and the FeatureUnion filterbank.
+    """
+    def __init__(self, pipe):
+        from sklearn.pipeline import FeatureUnion
+        first = pipe.steps[0][1]
+        if isinstance(first, FeatureUnion):
+            self.branches = [br[_cov_index(br) + 1:] for _, br in first.transformer_list]
+            self.post     = pipe[1:-1]
+        else:
+            self.branches = [pipe[_cov_index(pipe) + 1:-1]]
+            self.post     = None
+
+    def transform(self, covs):
+        f = np.hstack([br.transform(covs[k][np.newaxis]) for k, br in enumerate(self.branches)])
+        return self.post.transform(f) if self.post is not None else f
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# ===============================================================
+# decision.py – evidensakkumulering over overlappende vinduer → tidlige beslutninger
+# ===============================================================
+"""
+Decision layer on top of predict_proba. Instead of one hard argmax per
+window, every window adds its class log-probabilities to a running sum that
+decays with a half-life, and a label is pushed to MI_Pred only when the
+normalised posterior of one class crosses a threshold:
+
+    L ← 0.5^(Δt / half_life) · L + log p_window         posterior = softmax(L)
+
+Flicker is held back in two ways. The leading class must stay above the
+threshold for `dwell_s` before it is emitted. After a decision the evidence is
+cleared, and nothing is emitted for `refractory_s`. Time is the sample clock
+(window end / sfreq), so the behaviour is identical live and in replay.
+
+    python -m eeg_engine --preset multiclass --step 125 --causal --decision evidence
+    python -m eeg_engine.decision --csv csv_output/Person5Recording4.csv --preset multiclass --step 125
+
+The second command replays an annotated recording once and compares
+time-to-decision (true onset → first matching output) and flicker for the
+per-window argmax against the accumulator, for a few threshold settings.
+"""
+import argparse
+import json
+
+import numpy as np
+
+
+class EvidenceAccumulator:
+    """Decaying sum of class log-probabilities with threshold, dwell and refractory times (seconds)."""
+    def __init__(self, classes, half_life_s=1.0, threshold=0.9, dwell_s=0.25, refractory_s=1.0, floor=1e-3):
+        self.classes      = list(classes)
+        self.half_life_s  = half_life_s
+        self.threshold    = threshold
+        self.dwell_s      = dwell_s
+        self.refractory_s = refractory_s
+        self.log_floor    = np.log(floor)       # one confident window cannot veto a class for good
+        self.L         = np.zeros(len(self.classes))
+        self.posterior = np.full(len(self.classes), 1.0 / len(self.classes))
+        self.reset()
+
+    def reset(self):
+        self.L[:] = 0.0
+        self.posterior[:] = 1.0 / len(self.classes)
+        self.t          = None
+        self.lead       = -1                    # class above threshold, −1 → none
+        self.lead_since = None
+        self.last       = -np.inf               # time of the last decision
+
+    def update(self, probs, t):
+        """One window's probabilities at time `t` (s) → decided label, or None."""
+        if self.t is not None:
+            self.L *= 0.5 ** ((t - self.t) / self.half_life_s)
+        self.t = t
+        self.L += np.maximum(np.log(np.maximum(probs, 1e-300)), self.log_floor)
+        e = np.exp(self.L - self.L.max())
+        np.divide(e, e.sum(), out=self.posterior)
+
+        i = int(np.argmax(self.posterior))
+        if self.posterior[i] < self.threshold:
+            self.lead = -1
+            return None
+        if i != self.lead:
+            self.lead, self.lead_since = i, t
+        if t - self.lead_since < self.dwell_s or t - self.last < self.refractory_s:
+            return None
+        self.last = t
+        self.L[:] = 0.0
+        self.lead = -1
+        return self.classes[i]
+
+
+def make_decider(cfg, classes):
+    """EngineConfig → EvidenceAccumulator, or None for the plain per-window argmax."""
+    if cfg.decision == "window":
+        return None
+    if cfg.decision != "evidence":
+        raise ValueError(f"unknown decision mode '{cfg.decision}' (window | evidence)")
+    return EvidenceAccumulator(classes, cfg.ev_half_life, cfg.ev_threshold, cfg.ev_dwell, cfg.ev_refractory)
+
+
+# -------------------------------------------------------------- evaluation
+def segments(truth):
+    """Per-sample class (None = unlabelled) → [(onset, end, class)] runs of one labelled class."""
+    cut = [0] + [i for i in range(1, len(truth)) if truth[i] != truth[i - 1]] + [len(truth)]
+    return [(a, b, truth[a]) for a, b in zip(cut[:-1], cut[1:]) if truth[a] is not None]
+
+
+def score(events, segs, sfreq):
+    """
+    events: [(sample index, label)] in time order. → dict with median time-to-decision,
+    hit rate over segments, fraction of outputs that match the current class and
+    label changes per minute.
+    """
+    idx  = np.array([e[0] for e in events], np.int64)
+    labs = [e[1] for e in events]
+    ttd, hits, correct, n_in = [], 0, 0, 0
+    for a, b, c in segs:
+        lo, hi = np.searchsorted(idx, a), np.searchsorted(idx, b)
+        n_in += hi - lo
+        ok = [k for k in range(lo, hi) if labs[k] == c]
+        correct += len(ok)
+        if ok:
+            hits += 1
+            ttd.append((idx[ok[0]] - a) / sfreq)
+    changes = sum(1 for x, y in zip(labs[:-1], labs[1:]) if x != y)
+    minutes = (segs[-1][1] - segs[0][0]) / sfreq / 60 if segs else np.nan
+    return {"ttd_s":         float(np.median(ttd)) if ttd else np.nan,
+            "hit_rate":      hits / len(segs) if segs else np.nan,
+            "precision":     float(correct / n_in) if n_in else np.nan,
+            "outputs":       len(events),
+            "flips_per_min": changes / minutes if minutes else np.nan}
+
+
+def replay_probs(cfg, rec, chunk=20):
+    """Run a recording through the engine unthrottled → (window end sample indices, probabilities)."""
+    from dataclasses import replace
+    from .engine import StreamEngine
+    from .replay import ReplaySource, replay_into
+    eng = StreamEngine(replace(cfg, decision="window", verbose=False, warmup=0))
+    ends = []
+    eng.report = lambda label, probs: ends.append(eng.next_end)
+    P = np.array([p for _, p in replay_into(eng, ReplaySource(rec, chunk, speed=0))])
+    return np.array(ends), P, eng.art.classes
+
+
+def main():
+    from dataclasses import replace
+    from .config import PRESETS, get_config
+    from .replay import load_recording
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", required=True, help="annotated recording in csv_output format")
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--step", type=int, default=125, help="window step in samples (overlap gives earlier evidence)")
+    ap.add_argument("--causal", action="store_true")
+    ap.add_argument("--half-life", type=float, default=None)
+    ap.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9, 0.95, 0.99])
+    ap.add_argument("--dwell", type=float, default=None)
+    ap.add_argument("--refractory", type=float, default=None)
+    args = ap.parse_args()
+
+    from eeg_train.store import binary_label, multiclass_label
+    cfg = get_config(args.preset, step_len=args.step, **({"art_dir": args.art_dir} if args.art_dir else {}),
+                     filter_mode="causal" if args.causal else "zero_phase")
+    cfg = replace(cfg, **{k: v for k, v in (("ev_half_life", args.half_life), ("ev_dwell", args.dwell),
+                                            ("ev_refractory", args.refractory)) if v is not None})
+    with open(cfg.path(cfg.channels_file)) as f:
+        chans = json.load(f)
+    rec = load_recording(args.csv, chans)
+    label_fn = binary_label if args.preset == "binary" else multiclass_label
+    truth = [label_fn(a.strip().upper()) for a in rec.annotations]
+    segs  = segments(truth)
+    print(f"⚙  {rec.data.shape[0]/rec.sfreq:.0f}s • {len(segs)} labelled segments • step {cfg.step_len} samp")
+
+    ends, P, classes = replay_probs(cfg, rec)
+    rows = [("argmax / window", score([(e - 1, classes[i]) for e, i in zip(ends, P.argmax(1))], segs, rec.sfreq))]
+    for thr in args.thresholds:
+        acc = EvidenceAccumulator(classes, cfg.ev_half_life, thr, cfg.ev_dwell, cfg.ev_refractory)
+        ev  = [(e - 1, lab) for e, p in zip(ends, P) for lab in [acc.update(p, e / rec.sfreq)] if lab is not None]
+        rows.append((f"evidence p≥{thr:g}", score(ev, segs, rec.sfreq)))
+
+    print(f"\n{'':<20} {'time-to-decision':>17} {'hit rate':>9} {'precision':>10} {'outputs':>8} {'flips/min':>10}")
+    for name, r in rows:
+        ttd = f"{r['ttd_s']:.2f}s" if np.isfinite(r["ttd_s"]) else "–"
+        print(f"{name:<20} {ttd:>17} {r['hit_rate']:9.2f} {r['precision']:10.2f} "
+              f"{r['outputs']:8d} {r['flips_per_min']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# ===============================================================
+# eegnet.py – Keras EEGNet (.h5) → ren NumPy/float32-inferens, uten TensorFlow
+# ===============================================================
+"""
+The notebook's EEGNet checkpoints (old/best_eegnet_*.h5) as an array-only
+model the live engine can serve, so TensorFlow stays out of the latency-
+critical process. h5py is only needed to convert, and TensorFlow only to
+record the parity fixture.
+
+    python -m eeg_engine.eegnet --preset eegnet_multiclass --convert   # .h5 → <art_dir>/eegnet_multiclass.npz
+    python -m eeg_engine.eegnet --preset eegnet_multiclass --record    # Keras outputs → fixture (needs TF)
+    python -m eeg_engine.eegnet --preset eegnet_multiclass --check     # parity vs the fixture
+    python -m eeg_engine.eegnet --preset eegnet_multiclass --bench     # CPU latency, single window and batch
+    python -m eeg_engine --preset eegnet_multiclass                    # live
+
+Folding, per window (C channels × T samples):
+
+    Conv2D(F1, (1, K1)) → BN → DepthwiseConv2D((C, 1), D)    spatial (C, F1·D) mix first, then one K1-tap
+    → BN                                                     filter per output row; both BNs → kernel + bias
+    → ELU → AvgPool(1, 4)
+    → SeparableConv2D(F2, (1, K2)) → BN                      K2-tap filter per row, pointwise × BN scale + bias
+    → ELU → AvgPool(1, 8) → Flatten → Dense → softmax        dense rows reordered to the (F2, T') layout
+
+The spatial mix commutes with the temporal convolution (both are linear and
+the 'same' padding is zeros), so it runs first on the C raw channels: ~6 M
+instead of ~65 M multiply-adds per window. Dropout is the identity at
+inference.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# .h5 per preset, og klasse-rekkefølgen fra notebookens label_map
+SOURCES = {
+    "eegnet_binary":     ("old/best_eegnet_binary.h5",     ["REST", "IMAGERY"]),
+    "eegnet_multiclass": ("old/best_eegnet_multiclass.h5", ["REST", "MOVE", "IMAGERY"]),
+}
+_LAYERS = ("Conv2D", "BatchNormalization", "DepthwiseConv2D", "BatchNormalization", "Activation",
+           "AveragePooling2D", "SeparableConv2D", "BatchNormalization", "Activation",
+           "AveragePooling2D", "Flatten", "Dense", "Activation")
+
+
+# ------------------------------------------------------------------ convert
+def read_h5(path):
+    """Keras .h5 → (input shape (C, T, 1), [(class_name, config, {weight: array})] without InputLayer / Dropout)."""
+    import h5py
+    with h5py.File(path, "r") as f:
+        model = json.loads(f.attrs["model_config"])
+        g = f["model_weights"] if "model_weights" in f else f
+        shape, layers = None, []
+        for spec in model["config"]["layers"]:
+            kind, conf = spec["class_name"], spec["config"]
+            if kind == "InputLayer":
+                shape = tuple(conf["batch_input_shape"][1:])
+            if kind in ("InputLayer", "Dropout"):
+                continue
+            w = {}
+            if conf["name"] in g:
+                g[conf["name"]].visititems(lambda n, d: w.__setitem__(n.split("/")[-1].split(":")[0], d[()])
+                                           if hasattr(d, "shape") else None)
+            layers.append((kind, conf, w))
+    return shape, layers
+
+
+def _bn(w, eps):
+    s = w["gamma"] / np.sqrt(w["moving_variance"] + eps)
+    return s.astype(np.float64), (w["beta"] - w["moving_mean"] * s).astype(np.float64)
+
+
+def _same_pad(k):
+    # TF 'same' ved stride 1: (k-1)//2 foran, resten bak
+    return (k - 1) // 2
+
+
+def fold(shape, layers, classes):
+    """read_h5 output → EEGNet with BatchNorm folded into the convolutions."""
+    kinds = tuple(k for k, _, _ in layers)
+    if kinds != _LAYERS or len(shape) != 3 or shape[2] != 1:
+        raise NotImplementedError(f"not the notebook's EEGNet layout: input {shape}, {kinds}")
+    (_, c1, w1), (_, b1, wb1), (_, c2, w2), (_, b2, wb2), (_, a1, _), (_, p1, _), \
+        (_, c3, w3), (_, b3, wb3), (_, a2, _), (_, p2, _), (_, fl, _), (_, dn, wd), (_, a3, _) = layers
+    for conf in (c1, c2, c3, p1, p2, fl):
+        if conf.get("data_format", "channels_last") != "channels_last":
+            raise NotImplementedError(f"{conf['name']}: only channels_last")
+    for conf in (c1, c2, c3):
+        if conf.get("use_bias") or tuple(conf["strides"]) != (1, 1) or tuple(conf["dilation_rate"]) != (1, 1):
+            raise NotImplementedError(f"{conf['name']}: needs use_bias=False, stride 1, no dilation")
+        if conf["activation"] != "linear":
+            raise NotImplementedError(f"{conf['name']}: activation must be linear")
+    if c1["padding"] != "same" or c2["padding"] != "valid" or c3["padding"] != "same":
+        raise NotImplementedError("padding must be same / valid / same")
+    if (a1["activation"], a2["activation"], a3["activation"]) != ("elu", "elu", "softmax") \
+            or dn["activation"] != "linear":
+        raise NotImplementedError("activations must be elu / elu / linear dense + softmax")
+    for conf in (p1, p2):
+        if tuple(conf["pool_size"]) != tuple(conf["strides"]) or conf["pool_size"][0] != 1 \
+                or conf["padding"] != "valid":
+            raise NotImplementedError(f"{conf['name']}: only non-overlapping (1, p) pooling")
+
+    K1 = w1["kernel"][0, :, 0, :].astype(np.float64)            # (k1, F1)
+    Dw = w2["depthwise_kernel"][:, 0].astype(np.float64)        # (C, F1, D)
+    C, F1, D = Dw.shape
+    s1, o1 = _bn(wb1, b1["epsilon"])
+    s2, o2 = _bn(wb2, b2["epsilon"])
+    f_of = np.repeat(np.arange(F1), D)                          # Keras' depthwise order: row j = f·D + m
+    spatial = Dw.reshape(C, F1 * D).T                           # (F1·D, C)
+    k1   = (K1[:, f_of] * (s1[f_of] * s2)[None, :]).T           # (F1·D, k1)
+    bias1 = s2 * o1[f_of] * spatial.sum(axis=1) + o2
+
+    Dk = w3["depthwise_kernel"][0, :, :, 0].astype(np.float64)  # (k2, F1·D)
+    Pw = w3["pointwise_kernel"][0, 0].astype(np.float64)        # (F1·D, F2)
+    s3, o3 = _bn(wb3, b3["epsilon"])
+    F2 = Pw.shape[1]
+
+    W, bd = wd["kernel"].astype(np.float64), wd["bias"].astype(np.float64)
+    n_t = W.shape[0] // F2
+    dense = W.reshape(n_t, F2, -1).transpose(1, 0, 2).reshape(F2 * n_t, -1)   # Flatten (t, f) → (f, t)
+    if len(classes) != W.shape[1]:
+        raise ValueError(f"{len(classes)} class names for a {W.shape[1]}-unit dense layer")
+    return EEGNet(spatial=spatial, k1=k1, bias1=bias1, pool1=p1["pool_size"][1],
+                  k2=Dk.T, pointwise=(Pw * s3[None, :]).T, bias2=o3, pool2=p2["pool_size"][1],
+                  dense=dense, bias=bd, n_times=shape[1], classes=classes)
+
+
+def convert(h5_path, classes):
+    return fold(*read_h5(h5_path), classes)
+
+
+# ----------------------------------------------------------------- runtime
+def _conv_rows(x, k, out=None):
+    """'same' cross-correlation of every row with its own kernel: (N, R, T) × (R, K) → (N, R, T)."""
+    K, T = k.shape[1], x.shape[-1]
+    pad = _same_pad(K)
+    xp = np.zeros(x.shape[:-1] + (T + K - 1,), x.dtype)
+    xp[..., pad:pad + T] = x
+    # sliding view + einsum: ~4× raskere enn en løkke over tappene, og enn FFT ved disse lengdene
+    return np.einsum("nrtk,rk->nrt", sliding_window_view(xp, K, axis=-1), k, out=out)
+
+
+def _elu(x):
+    neg = x < 0
+    x[neg] = np.expm1(x[neg])
+    return x
+
+
+def _avg_pool(x, p):
+    n = x.shape[-1] // p
+    return x[..., :n * p].reshape(x.shape[:-1] + (n, p)).mean(axis=-1)
+
+
+class EEGNet:
+    """
+    Folded EEGNet, float32, batched over windows. Same interface as
+    FlatPredictor: features (everything up to Flatten), proba_from_features
+    (dense + softmax), predict_proba, predict, classes_, save / load.
+    Inputs are preprocessed windows (N, C, T) or (C, T); the trailing
+    Keras channel axis (N, C, T, 1) is accepted too.
+    """
+    def __init__(self, spatial, k1, bias1, pool1, k2, pointwise, bias2, pool2, dense, bias, n_times, classes):
+        f32 = lambda a: np.ascontiguousarray(a, np.float32)
+        self.spatial, self.k1, self.bias1 = f32(spatial), f32(k1), f32(bias1)[:, None]
+        self.k2, self.pointwise, self.bias2 = f32(k2), f32(pointwise), f32(bias2)[:, None]
+        self.pool1, self.pool2 = int(pool1), int(pool2)
+        self.dense, self.bias = f32(dense), f32(bias)
+        self.n_times  = int(n_times)               # window length of the Keras input layer
+        self.classes_ = np.asarray(classes)
+
+    def features(self, X):
+        X = np.asarray(X, np.float32)
+        if X.ndim == 4:
+            X = X[..., 0]
+        if X.ndim == 2:
+            X = X[np.newaxis]
+        h = np.matmul(self.spatial, X)                 # (N, F1·D, T)
+        h = _conv_rows(h, self.k1, out=np.empty_like(h))
+        h += self.bias1
+        h = _avg_pool(_elu(h), self.pool1)
+        h = np.matmul(self.pointwise, _conv_rows(h, self.k2))
+        h += self.bias2
+        F = _avg_pool(_elu(h), self.pool2).reshape(len(X), -1)
+        if F.shape[1] != self.dense.shape[0]:
+            raise ValueError(f"EEGNet was trained on {self.n_times}-sample windows, got {X.shape[-1]}")
+        return F
+
+    def proba_from_features(self, F):
+        z = F @ self.dense + self.bias
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X):
+        return self.proba_from_features(self.features(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # --------------------------------------------------------------- I/O
+    _FIELDS = ("spatial", "k1", "bias1", "pool1", "k2", "pointwise", "bias2", "pool2", "dense", "bias",
+               "n_times", "classes")
+
+    def save(self, path):
+        arrs = {f: getattr(self, f) for f in self._FIELDS if f != "classes"}
+        arrs["bias1"], arrs["bias2"] = self.bias1[:, 0], self.bias2[:, 0]
+        np.savez(path, classes=self.classes_.astype(str), **arrs)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        with np.load(path, allow_pickle=False, mmap_mode=mmap_mode) as z:
+            return cls(**{f: z[f] for f in cls._FIELDS})
+
+
+# --------------------------------------------------------------- reference
+def reference_proba(layers, X):
+    """
+    The .h5 layers evaluated literally, one Keras layer at a time in NHWC and
+    float64, nothing folded or reordered – what `fold` is checked against
+    when TensorFlow is not installed.
+    """
+    (_, _, w1), (_, b1, wb1), (_, _, w2), (_, b2, wb2), _, (_, p1, _), \
+        (_, _, w3), (_, b3, wb3), _, (_, p2, _), _, (_, _, wd), _ = layers
+    x = np.asarray(X, np.float64)[..., np.newaxis]                      # (N, C, T, 1)
+
+    def conv_w(h, k):                                                   # (N, H, W, ci) × (kw, ci, co), 'same'
+        kw, n = k.shape[0], h.shape[2]
+        hp = np.pad(h, ((0, 0), (0, 0), (_same_pad(kw), kw - 1 - _same_pad(kw)), (0, 0)))
+        return sum(np.einsum("nhwi,io->nhwo", hp[:, :, j:j + n], k[j]) for j in range(kw))
+
+    def bn(h, w, conf):
+        s, o = _bn(w, conf["epsilon"])
+        return h * s + o
+
+    def elu(h):
+        return np.where(h > 0, h, np.expm1(np.minimum(h, 0)))
+
+    def pool(h, conf):
+        p = conf["pool_size"][1]
+        n = h.shape[2] // p
+        return h[:, :, :n * p].reshape(h.shape[0], h.shape[1], n, p, h.shape[3]).mean(axis=3)
+
+    h = bn(conv_w(x, w1["kernel"][0].astype(np.float64)), wb1, b1)          # (N, C, T, F1)
+    Dw = w2["depthwise_kernel"][:, 0].astype(np.float64)                     # (C, F1, D)
+    h = np.einsum("nctf,cfm->ntfm", h, Dw).reshape(h.shape[0], 1, h.shape[2], -1)   # valid (C, 1) → H = 1
+    h = pool(elu(bn(h, wb2, b2)), p1)
+    Dk = w3["depthwise_kernel"][0].astype(np.float64)                        # (k2, F1·D, 1)
+    hd = np.stack([conv_w(h[..., j:j + 1], Dk[:, j:j + 1, :])[..., 0] for j in range(h.shape[-1])], axis=-1)
+    h = np.einsum("nhwi,io->nhwo", hd, w3["pointwise_kernel"][0, 0].astype(np.float64))
+    h = pool(elu(bn(h, wb3, b3)), p2)
+    z = h.reshape(len(h), -1) @ wd["kernel"].astype(np.float64) + wd["bias"]
+    z = np.exp(z - z.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+# -------------------------------------------------------------------- CLI
+def fixture_path(cfg):
+    return cfg.path(f"{cfg.name}_keras_fixture.npz")
+
+
+def fixture_inputs(n_ch, sfreq, n_times, n=8, seed=0):
+    """
+    Deterministic preprocessed windows for the fixture: synthetic EEG through
+    the live zero-phase chain, scaled from ~2 µV to ~6 mV RMS: the checkpoints
+    only leave their near-constant output well above the synthetic 20 µV, so
+    this covers flat, mixed and saturated softmax outputs.
+    """
+    from .compat import synthetic_eeg
+    from .preprocess import WindowPreproc
+    x = synthetic_eeg(n_ch, n * n_times, sfreq, seed)
+    X = WindowPreproc(sfreq).batch(x.T.reshape(n_ch, n, n_times).transpose(1, 0, 2))
+    X *= np.geomspace(0.1, 300.0, n)[:, None, None]
+    return X.astype(np.float32)
+
+
+def _timeit(f, reps):
+    f()
+    t = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        f()
+        t.append(time.perf_counter() - t0)
+    return np.array(t) * 1e3
+
+
+def main():
+    from .config import PRESETS, ROOT_DIR, get_config
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=[p for p in PRESETS if PRESETS[p].model == "eegnet"],
+                    default="eegnet_multiclass")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--h5", default=None, help="Keras checkpoint (default: the preset's old/best_eegnet_*.h5)")
+    ap.add_argument("--convert", action="store_true",
+                    help="write <art_dir>/<pipeline_file> + channels / preproc_meta / classes")
+    ap.add_argument("--record", action="store_true", help="run the .h5 in Keras and save the parity fixture")
+    ap.add_argument("--check", action="store_true", help="compare against the fixture and the literal forward")
+    ap.add_argument("--bench", action="store_true", help="single-window p50/p95 and batch latency")
+    ap.add_argument("--windows", type=int, default=32, help="batch size for --bench")
+    ap.add_argument("--tol", type=float, default=1e-4, help="max |Δp| accepted by --check")
+    args = ap.parse_args()
+    if not (args.convert or args.record or args.check or args.bench):
+        ap.print_help(); return
+
+    cfg = get_config(args.preset, **({"art_dir": args.art_dir} if args.art_dir else {}))
+    h5, classes = SOURCES[cfg.name]
+    h5 = args.h5 or os.path.join(ROOT_DIR, h5)
+
+    if args.convert:
+        net = convert(h5, classes)
+        os.makedirs(cfg.art_dir, exist_ok=True)
+        net.save(cfg.path(cfg.pipeline_file))
+        src = PRESETS["multiclass"]                           # EEGNet ble trent på de samme 32 kanalene
+        with open(src.path(src.channels_file)) as f:
+            channels = json.load(f)
+        if len(channels) != net.spatial.shape[1]:
+            raise ValueError(f"{len(channels)} channels in {src.channels_file}, the model has {net.spatial.shape[1]}")
+        with open(cfg.path(cfg.channels_file), "w") as f:
+            json.dump(channels, f)
+        with open(cfg.path(cfg.meta_file), "w") as f:
+            json.dump({"sfreq": 500, "window_len": net.n_times, "step_len": net.n_times}, f)
+        np.save(cfg.path(cfg.classes_file), np.array(classes))
+        print(f"💾 {h5} → {cfg.path(cfg.pipeline_file)}  (spatial {net.spatial.shape}, "
+              f"kernels {net.k1.shape[1]}/{net.k2.shape[1]} taps, {net.dense.shape[0]} features, classes={classes})")
+
+    if args.record:
+        import tensorflow as tf
+        from .preprocess import cfg_sfreq
+        model = tf.keras.models.load_model(h5, compile=False)
+        _, C, T, _ = model.input_shape
+        X = fixture_inputs(C, cfg_sfreq(cfg), T)
+        p = model.predict(X[..., np.newaxis], verbose=0)
+        np.savez(fixture_path(cfg), X=X, proba=p.astype(np.float32),
+                 versions=np.array([f"tensorflow {tf.__version__}", f"numpy {np.__version__}"]))
+        print(f"💾 {fixture_path(cfg)}: {len(X)} windows, Keras p = {np.round(p.astype(float), 3).tolist()}")
+
+    net = None
+    if args.check or args.bench:
+        from .artifacts import load_artifacts
+        net = load_artifacts(cfg).pipe
+
+    ok = True
+    if args.check:
+        with np.load(fixture_path(cfg), allow_pickle=False) as z:
+            X, p_keras, versions = z["X"], z["proba"], list(z["versions"])
+        p = net.predict_proba(X)
+        rows = [(f"numpy vs Keras fixture ({', '.join(versions)})", np.abs(p - p_keras).max())]
+        if os.path.exists(h5):
+            rows.append(("numpy vs literal layer-by-layer forward (.h5)",
+                         np.abs(p - reference_proba(read_h5(h5)[1], X)).max()))
+        rows.append(("batch vs one window at a time",
+                     np.abs(p - np.concatenate([net.predict_proba(x) for x in X])).max()))
+        for name, err in rows:
+            print(f"   {'✅' if err <= args.tol else '❌'} {name:<60} max|Δp| {err:.1e}")
+        same = np.array_equal(p.argmax(1), p_keras.argmax(1))
+        print(f"   {'✅' if same else '❌'} labels equal on all {len(X)} windows "
+              f"(p of the top class: {np.round(p_keras.max(1).astype(float), 3).tolist()})")
+        ok = same and all(err <= args.tol for _, err in rows)
+
+    if args.bench:
+        from .preprocess import cfg_sfreq
+        X = fixture_inputs(net.spatial.shape[1], cfg_sfreq(cfg), net.n_times, n=args.windows, seed=1)
+        runs = [("numpy", net.predict_proba)]
+        if os.path.exists(h5):
+            layers = read_h5(h5)[1]
+            runs.append(("literal", lambda x: reference_proba(layers, x)))
+        try:
+            import tensorflow as tf
+            model = tf.keras.models.load_model(h5, compile=False)
+            runs += [("keras", lambda x: model(x[..., np.newaxis], training=False).numpy())]
+        except ImportError:
+            pass
+        x1 = X[:1]
+        for name, f in runs:
+            t1 = _timeit(lambda: f(x1), 100 if name == "numpy" else 10)
+            tb = _timeit(lambda: f(X), 5 if name == "numpy" else 2).mean()
+            print(f"   {name:<8} single p50 {np.percentile(t1, 50):7.2f} ms  p95 {np.percentile(t1, 95):7.2f} ms   "
+                  f"batch({len(X)}) {tb:8.2f} ms  → {tb/len(X):6.2f} ms/window")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
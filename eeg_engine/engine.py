@@ -0,0 +1,461 @@
+# ===============================================================
+# engine.py – felles sanntids-løkke for alle live_inference-skript
+# ===============================================================
+import os
+import sys
+import time
+import threading
+from time import perf_counter
+from datetime import datetime as dt
+
+import numpy as np
+
+from .artifacts import load_artifacts
+from .buffer import RingBuffer, ChannelSelect
+from .filters import fb_design
+from .preprocess import make_preproc
+from .covariance import StreamingCovariance, CovHead
+from .metrics import Metrics
+from .decision import make_decider
+from .asynclog import AsyncLog
+
+
+def stream_labels(info):
+    lbl=[]; ch=info.desc().child("channels").child("channel")
+    while ch and not ch.empty():
+        lbl.append(ch.child_value("label")); ch=ch.next_sibling()
+    return lbl
+
+
+def quit_on_q():
+    if sys.stdin and sys.stdin.isatty():
+        while True:
+            if sys.stdin.readline().strip().lower() == "q":
+                print("🛑 Quit key pressed"); os._exit(0)
+
+
+class StreamEngine:
+    """
+    Artefacts + preprocessing + ring buffer + LSL in/out for one EEG stream.
+
+    Steady state does no per-sample allocation: pull_chunk writes into a
+    preallocated array, the ring buffer is filled in place and windows are
+    views into it. With cfg.ingest="thread" the pulls happen on a separate
+    acquisition thread (eeg_engine.ingest) so a slow window never delays
+    reading the inlet.
+    """
+    def __init__(self, cfg, artifacts=None):
+        self.cfg  = cfg
+        self.art  = artifacts or load_artifacts(cfg)
+        a = self.art
+        self.sfreq, self.win_len = a.sfreq, a.win_len
+        self.step_len = cfg.step_len or a.step_len
+        n_ch = len(a.channels)
+        # filterbank-koeffisientene modellen er trent med (notebookens (b, a) for eldre artefakter)
+        self.preproc = make_preproc(cfg, self.sfreq, n_ch, self.win_len, design=fb_design(a.meta))
+        self.causal  = cfg.filter_mode == "causal"
+        # plass til et helt vindu + en hel chunk, så alle vinduer i en chunk er tilgjengelige
+        cap = self.win_len + cfg.max_chunk
+        self.cov_stream = None
+        if cfg.cov_mode == "incremental":
+            if cfg.model == "eegnet":
+                raise ValueError("cov_mode='incremental' is for the covariance models; EEGNet needs the window")
+            if not self.causal:
+                raise ValueError("cov_mode='incremental' needs filter_mode='causal' "
+                                 "(filtfilt changes every sample of the window each time)")
+            n_bands = self.preproc.n_rows // n_ch
+            self.cov_stream = StreamingCovariance(n_bands, n_ch, self.win_len)
+            cap += self.step_len          # the samples leaving the window must still be there
+        if self.causal:
+            # ringen holder det filtrerte signalet; kanalvalg skjer før filteret
+            self.select = ChannelSelect(None, n_ch, cfg.max_chunk)
+            self.ring   = RingBuffer(self.preproc.n_rows, cap, cfg.max_chunk, dtype=np.float64)
+        else:
+            self.ring   = RingBuffer(n_ch, cap, cfg.max_chunk)
+        self.flat = None
+        if cfg.model == "eegnet":
+            self.flat = a.pipe                           # EEGNet: same features / proba_from_features split
+        elif cfg.predictor == "flat":
+            if a.flat is not None:                       # bundle: memory-mapped arrays, no unpickling
+                self.flat = a.flat
+            else:
+                from .compiled import compile_pipeline
+                self.flat = compile_pipeline(a.pipe)
+        else:
+            if self.cov_stream is not None:
+                self.head = CovHead(a.pipe)
+            self._feat_pipe = a.pipe[:-1]
+            self._clf       = a.pipe[-1]
+        self.decider  = make_decider(cfg, a.classes)   # None → argmax per window
+        self.next_end = self.win_len        # absolute sample index where the next window ends
+        self.first    = False
+        self.tag      = ""                  # console prefix, set per stream by the server
+        self.inlet = self.outlet = self.prob_outlet = None
+        self.rda   = None                    # RDAClient with cfg.rda, instead of the inlet
+        self.log       = None                # AsyncLog, created on first use (after the server has set tag)
+        self._prob_buf = np.zeros(len(a.classes), np.float32)
+        self._t_sample = None
+        self._pull_buf = self._pull_ts = None
+        self._clock    = None                # pylsl.local_clock once connected
+        self._chunk_ts = None                # LSL timestamps of the chunk being fed
+        self._chunk_t0 = 0                   # absolute index of its first sample
+        self.metrics = self._new_metrics()
+
+    def _new_metrics(self):
+        return Metrics(path=self.cfg.metrics_file, every_s=self.cfg.metrics_s, labels={"preset": self.cfg.name})
+
+    def warmup(self, n=None):
+        """
+        Run `n` windows of synthetic noise through filter → features →
+        predict_proba before connecting, so one-time costs (lazy imports,
+        BLAS/LAPACK set-up, first touch of the buffers and memory-mapped
+        arrays, sklearn's validation paths) are not paid by the first live
+        window. Stream state and metrics are reset afterwards. → seconds per window.
+        """
+        n = self.cfg.warmup if n is None else n
+        if n <= 0:
+            return []
+        rng = np.random.default_rng(0)
+        x = (10.0 * rng.standard_normal((self.win_len + (n - 1) * self.step_len, len(self.art.channels))))
+        x = x.astype(np.float32)
+        blk, times, self.first = min(self.step_len, self.cfg.max_chunk), [], True
+        for s in range(0, len(x), blk):
+            part = x[s:s + blk]
+            self.ring.write(self.preproc.step(part) if self.causal else part, selected=True)
+            for win in self.windows():
+                t0 = perf_counter()
+                self.predict_proba(self.features(win))
+                times.append(perf_counter() - t0)
+        self.ring.reset()
+        if self.causal:
+            self.preproc.reset()
+        if self.cov_stream is not None:
+            self.cov_stream.end = None
+        self.next_end, self.first = self.win_len, False
+        if self.decider is not None:
+            self.decider.reset()
+        self.metrics = self._new_metrics()
+        return times
+
+    # ------------------------------------------------------------------ LSL
+    def connect(self):
+        from pylsl import StreamInfo, StreamOutlet, StreamInlet, resolve_byprop, local_clock
+        self._clock = local_clock
+        cfg = self.cfg
+        if cfg.rda:
+            self.connect_rda()
+        else:
+            print(f"\n🔎 waiting for EEG stream '{cfg.in_name}' …")
+            infos = resolve_byprop("name", cfg.in_name, 1, cfg.poll_s)
+            if not infos:
+                print(f"[EEG-LSL] ⛔ Ingen stream '{cfg.in_name}'"); sys.exit(1)
+            print(f"[EEG-LSL] Connected to '{cfg.in_name}'")
+            self.inlet = StreamInlet(infos[0], max_chunklen=self.step_len)
+
+            xml_lbl = stream_labels(self.inlet.info())
+            self.map_channels(xml_lbl)
+        self.outlet = StreamOutlet(StreamInfo(cfg.out_name, "Markers", 1, 0, 'string'))
+        if cfg.prob_name != "off":
+            self.prob_outlet = StreamOutlet(self.prob_info(StreamInfo))
+
+    def connect_rda(self):
+        """Recorder's RDA port instead of the LSL bridge; channel names come from its start message."""
+        from .rda import RDAClient, parse_address
+        host, port = parse_address(self.cfg.rda)
+        print(f"\n🔎 connecting to BrainVision RDA {host}:{port} …")
+        try:
+            self.rda = RDAClient(host, port, clock=self._clock, timeout=self.cfg.poll_s * 10,
+                                 max_points=self.cfg.max_chunk).connect()
+        except OSError as e:
+            print(f"[EEG-RDA] ⛔ {e}"); sys.exit(1)
+        if self.rda.sfreq != self.sfreq:
+            print(f"[EEG-RDA] ⛔ recorder runs at {self.rda.sfreq:g} Hz, the model expects {self.sfreq:g} Hz")
+            sys.exit(1)
+        print(f"[EEG-RDA] Connected: {len(self.rda.channels)} ch @ {self.rda.sfreq:g} Hz")
+        self.map_channels(self.rda.channels)
+
+    def prob_info(self, StreamInfo):
+        """float32 outlet header: one channel per class, labelled from label_classes*.npy, irregular rate."""
+        name = self.cfg.prob_name or f"{self.cfg.out_name}_Prob"
+        info = StreamInfo(name, "Probabilities", len(self.art.classes), 0, "float32", f"{name}-{self.cfg.name}")
+        chs  = info.desc().append_child("channels")
+        for c in self.art.classes:
+            ch = chs.append_child("channel")
+            ch.append_child_value("label", str(c)); ch.append_child_value("unit", "probability")
+        info.desc().append_child_value("decision", self.cfg.decision)
+        return info
+
+    def map_channels(self, source_labels):
+        chans = self.art.channels
+        miss  = [ch for ch in chans if ch not in source_labels]
+        if miss:
+            print(f"[EEG-LSL] ⛔ Mangler kanaler: {miss}"); sys.exit(1)
+        sel_idx = [source_labels.index(ch) for ch in chans]
+        if self.causal:
+            self.select = ChannelSelect(sel_idx, len(chans), self.cfg.max_chunk)
+        else:
+            self.ring.set_channels(sel_idx, self.cfg.max_chunk)
+        self._pull_buf = np.zeros((self.cfg.max_chunk, len(source_labels)), np.float32)
+        print("[EEG-LSL] ✅ Channel mapping OK")
+
+    def pull(self):
+        """One non-blocking pull straight into the preallocated chunk buffer; returns sample count."""
+        _, self._pull_ts = self.inlet.pull_chunk(timeout=0.0, max_samples=self.cfg.max_chunk,
+                                                 dest_obj=self._pull_buf)
+        return len(self._pull_ts)
+
+    # ------------------------------------------------------------ processing
+    def feed(self, chunk, ts=None):
+        """
+        Write (n_samples, n_source_ch) into the ring and classify every window
+        it completes. `ts` (LSL timestamps of the chunk) enables end-to-end latency.
+        Chunks longer than cfg.max_chunk are fed in max_chunk slices, so no
+        pending window is overwritten before it is classified.
+        """
+        n, results = self.cfg.max_chunk, []
+        for s in range(0, chunk.shape[0], n):
+            self.write(chunk[s:s + n], None if ts is None else ts[s:s + n])
+            results += [self.classify(win) for win in self.windows()]
+        self.metrics.maybe_export()
+        return results
+
+    def write(self, chunk, ts=None):
+        """Channel selection (+ causal filtering) of one chunk into the ring."""
+        m = self.metrics
+        self._chunk_ts, self._chunk_t0 = ts, self.ring.total
+        if self.causal:
+            for s in range(0, chunk.shape[0], self.cfg.max_chunk):
+                t0   = perf_counter()
+                part = self.select(chunk[s:s + self.cfg.max_chunk])
+                t1   = perf_counter()
+                filt = self.preproc.step(part)
+                t2   = m.since("filter", t1)
+                self.ring.write(filt, selected=True)
+                m.add("ingest", (t1 - t0) + perf_counter() - t2)
+        else:
+            t0 = perf_counter()
+            self.ring.write(chunk)
+            m.since("ingest", t0)
+
+    def windows(self):
+        """Every window completed by the last write(); self.next_end is its end while it is being handled."""
+        while self.ring.total >= self.next_end:
+            if self.cfg.overload != "off" and self.shed():
+                continue
+            if not self.first:
+                print(f"\n🟢 first window ready ({self.next_end/self.sfreq:.2f}s)"); self.first = True
+            yield self.ring.window_at(self.next_end, self.win_len)
+            self.next_end += self.step_len
+
+    def shed(self):
+        """
+        Overload scheduler: skip pending windows that are older than
+        cfg.max_stale_s (or already overwritten in the ring) before one is
+        classified. "drop" skips just enough windows to get under the limit,
+        "coalesce" jumps straight to the newest complete window. Neither
+        skips past the newest complete window, so it is always classified
+        even when the transport latency alone exceeds the limit. Skipped
+        windows are counted under "shed" in the metrics. → number skipped.
+        """
+        newest = self.next_end + (self.ring.total - self.next_end) // self.step_len * self.step_len
+        # eldste vindusslutt som fortsatt ligger i ringen
+        oldest = self.ring.total - self.ring.capacity + self.win_len
+        k = 0 if self.next_end >= oldest else -(-(oldest - self.next_end) // self.step_len)
+        over = self.window_age(self.next_end + k * self.step_len) - self.cfg.max_stale_s
+        if over > 0:
+            if self.cfg.overload == "coalesce":
+                k = (newest - self.next_end) // self.step_len
+            elif self.cfg.overload == "drop":
+                # aldri forbi det nyeste komplette vinduet, selv om transportforsinkelsen alene er > max_stale_s
+                k = min(k + int(np.ceil(over * self.sfreq / self.step_len)), (newest - self.next_end) // self.step_len)
+            else:
+                raise ValueError(f"unknown overload policy '{self.cfg.overload}' (off | drop | coalesce)")
+        if k:
+            self.next_end += k * self.step_len
+            self.metrics.count("shed", k)
+        return k
+
+    def window_age(self, end):
+        """
+        Staleness of the window ending at `end` in s: local clock − LSL time of
+        its newest sample when live, the samples written after it otherwise.
+        """
+        t = self.sample_ts(end)
+        if t is None:
+            return (self.ring.total - end) / self.sfreq
+        return self._clock() - t
+
+    def sample_ts(self, end=None):
+        """LSL timestamp of sample `end` − 1 (default: newest of the current window); None offline."""
+        if self._chunk_ts is None or self._clock is None:
+            return None
+        i = (self.next_end if end is None else end) - self._chunk_t0 - 1
+        if i < 0:
+            # skrevet med en tidligere chunk (flere chunks per runde): nominell rate bakover
+            return self._chunk_ts[0] + i / self.sfreq
+        return self._chunk_ts[min(i, len(self._chunk_ts) - 1)]
+
+    def features(self, win):
+        """Feature row in front of the classifier, (1, n_features)."""
+        t0 = perf_counter()
+        if self.cov_stream is not None:
+            self.cov_stream.advance(self.ring, self.next_end)
+            covs = self.cov_stream.covariances()
+            F = (self.flat.features_from_cov(covs[np.newaxis]) if self.flat is not None
+                 else self.head.transform(covs))
+        else:
+            X  = self.preproc(win)
+            t0 = self.metrics.since("filter", t0)
+            F  = self.flat.features(X) if self.flat is not None else self._feat_pipe.transform(X)
+        self.metrics.since("features", t0)
+        return F
+
+    def predict_proba(self, F):
+        if self.flat is not None:
+            return self.flat.proba_from_features(F)
+        return self._clf.predict_proba(F)
+
+    def classify(self, win):
+        F = self.features(win)
+        t0 = perf_counter()
+        probs = self.predict_proba(F)[0]
+        self.metrics.since("predict", t0)
+        return self.emit(probs, self.sample_ts())
+
+    def emit(self, probs, t_sample=None, end=None):
+        """
+        Label → outlet + console; `t_sample` is the LSL time of the window's
+        newest sample, `end` its absolute sample index (default: the current
+        window). With a decider only its decisions are pushed; label is None otherwise.
+        """
+        if self.decider is None:
+            label = self.art.classes[np.argmax(probs)]
+        else:
+            label = self.decider.update(probs, (self.next_end if end is None else end) / self.sfreq)
+        t0 = perf_counter()
+        if self.prob_outlet is not None:
+            # stemplet med LSL-tiden til vinduets nyeste sample, ikke push-tiden
+            self._prob_buf[:] = probs
+            self.prob_outlet.push_sample(self._prob_buf, 0.0 if t_sample is None else t_sample)
+        if self.outlet is not None and label is not None:
+            self.outlet.push_sample([label])
+        if self.outlet is not None:
+            self.metrics.since("push", t0)
+        if t_sample is not None:
+            self.metrics.add("e2e", self._clock() - t_sample)
+        self._t_sample = t_sample
+        self.report(label, probs)
+        return label, probs
+
+    def report(self, label, probs):
+        """Hand the window to the logging thread; formatting and terminal/file I/O happen there."""
+        self.logger().window(label, probs, self._t_sample,
+                             None if self.decider is None else self.decider.posterior)
+
+    def logger(self):
+        if self.log is None:
+            c = self.cfg
+            self.log = AsyncLog(self.art.classes, self.tag, c.log_hz, path=c.log_file)
+        return self.log
+
+    # ------------------------------------------------------------------ loop
+    def run(self):
+        a = self.art
+        print(f"   expecting {len(a.channels)} channels • sfreq={self.sfreq}Hz • "
+              f"window={self.win_len} samp • step={self.step_len} samp • filter={self.cfg.filter_mode}")
+        if self.decider is not None:
+            d = self.decider
+            print(f"   decisions: evidence p≥{d.threshold:g} • half-life {d.half_life_s:g}s • "
+                  f"dwell {d.dwell_s:g}s • refractory {d.refractory_s:g}s")
+        threading.Thread(target=quit_on_q, daemon=True).start()
+        t = self.warmup()
+        if t:
+            print(f"🔥 warm-up: {len(t)} windows, first {t[0]*1e3:.1f} ms → last {t[-1]*1e3:.1f} ms")
+        self.connect()
+        self.logger()
+
+        print("\n⏳ Streaming – Ctrl-C eller q + Enter for å stoppe\n")
+        try:
+            if self.rda is not None:
+                self._run_rda()
+            elif self.cfg.ingest == "thread":
+                self._run_threaded()
+            else:
+                self._run_polling()
+        except KeyboardInterrupt:
+            print("\n🛑  stopped by user")
+        if self.rda is not None:
+            if self.rda.lost:
+                print(f"⚠  RDA: {self.rda.lost} data blocks lost by the recorder")
+            self.rda.close()
+        if self.log is not None:
+            self.log.close()
+            if self.log.dropped:
+                print(f"⚠  log queue full: {self.log.dropped} windows not logged")
+        print(self.metrics.summary())
+        if self.cfg.metrics_file:
+            self.metrics.write()
+
+    def _run_polling(self):
+        while True:
+            n = self.pull()
+            if not n:
+                time.sleep(0.002); continue
+            if self.cfg.verbose:
+                self.log.received = self.ring.total + n
+            self.feed(self._pull_buf[:n], self._pull_ts)
+
+    def _run_threaded(self):
+        """Acquisition thread blocks on the inlet; this thread only processes what it hands over."""
+        from .ingest import AcquisitionThread
+        acq = AcquisitionThread(self.inlet, self._pull_buf.shape[1],
+                                capacity=int(self.cfg.ingest_s * self.sfreq),
+                                max_chunk=self.cfg.max_chunk, block_s=self.cfg.poll_s)
+        acq.start()
+        try:
+            while True:
+                got = acq.next_chunk(timeout=self.cfg.poll_s)
+                if got is None:
+                    continue
+                if self.cfg.overload != "off":
+                    # etterslep: skriv alt som ligger i køen først, så velger shed() vinduene
+                    while got is not None:
+                        self.write(*got)
+                        acq.release(len(got[0]))
+                        got = acq.next_chunk(timeout=0)
+                    if self.cfg.verbose:
+                        self.log.received = self.ring.total
+                    for win in self.windows():
+                        self.classify(win)
+                    self.metrics.maybe_export()
+                    continue
+                chunk, ts = got
+                if self.cfg.verbose:
+                    self.log.received = self.ring.total + len(chunk)
+                self.feed(chunk, ts)
+                acq.release(len(chunk))
+        finally:
+            acq.stop()
+
+    def _run_rda(self):
+        """
+        Blocks on the recorder's socket; blocks not read yet wait in the kernel's
+        TCP buffer meanwhile, so no acquisition thread is needed. Each block is a
+        view of the client's receive buffer and is written before the next read.
+        """
+        rda, batched = self.rda, self.cfg.overload != "off"
+        got = rda.read()
+        while got is not None:
+            if not batched:
+                self.feed(*got)
+            else:
+                self.write(*got)
+                if rda.pending():           # etterslep: les resten før noe klassifiseres
+                    got = rda.read(); continue
+                for win in self.windows():
+                    self.classify(win)
+                self.metrics.maybe_export()
+            if self.cfg.verbose:
+                self.log.received = self.ring.total
+            got = rda.read()
+        print("\n⏹  recorder stopped sending")
@@ -0,0 +1,154 @@
+# ===============================================================
+# filters.py – forhåndsdesignet filterbank (multiclass_new), SOS eller notebookens (b, a)
+# ===============================================================
+import numpy as np
+from scipy.signal import iirnotch, butter, tf2sos, filtfilt, sosfilt, sosfilt_zi
+
+# filtfilt(b, a) pads with 3*max(len(a), len(b)) samples; keep the same edge handling
+_PAD_NOTCH = 9     # iirnotch → 3 coefficients
+_PAD_BAND  = 27    # butter(4, band) → 9 coefficients
+
+
+# ---------------------------------------------------------------- designs
+# Eneste sted filterkoeffisientene lages – trening, live og verktøy bruker disse.
+def notch_ba(sfreq, notch=50.0):
+    return iirnotch(notch, Q=30.0, fs=sfreq)
+
+
+def band_ba(sfreq, band):
+    nyq = sfreq / 2
+    return butter(4, [band[0]/nyq, band[1]/nyq], btype="band")
+
+
+def notch_sos(sfreq, notch=50.0):
+    return tf2sos(*notch_ba(sfreq, notch))
+
+
+def band_sos(sfreq, band):
+    nyq = sfreq / 2
+    return butter(4, [band[0]/nyq, band[1]/nyq], btype="band", output="sos")
+
+
+# Filterbank-koeffisienter: "ba" = notebookens filtfilt(b, a), det de leverte modellene er trent på;
+# "sos" = andre ordens seksjoner, som eeg_train trener med og skriver som preproc_meta["fb_design"].
+DESIGNS = ("ba", "sos")
+
+
+def fb_design(meta):
+    """Filterbank design a model was trained with: preproc_meta["fb_design"], "ba" for older artefacts."""
+    return meta.get("fb_design", "ba")
+
+
+class FilterBank:
+    """
+    Notch + broadband + per-band Butterworth filters, designed once.
+
+    `apply()` runs the zero-phase chain from training on one (n_ch, n_times)
+    window: notch @50 Hz, broadband, baseline correction, then every band,
+    written into a preallocated (n_bands, n_ch, n_times) array. With
+    dtype=np.float32 the whole chain runs in single precision.
+
+    design="sos" (second-order sections): the 4th-order 1–4 Hz band-pass is
+    badly conditioned as a transfer function at 500 Hz, and its filtfilt(b, a)
+    output is off by a few percent of the signal amplitude; the SOS version is
+    exact to round-off. The higher bands agree to 1e-4 or better. Because the
+    delta features move by ~3 %, "sos" is only used for models trained with it
+    (fb_design in preproc_meta); design="ba" reproduces the notebook's
+    filtfilt(b, a) chain exactly, for the shipped multiclass_new model.
+
+    The SOS forward-backward pass is sosfiltfilt's (odd extension,
+    steady-state initial conditions), with the initial-condition vectors
+    solved once here. The bands share one odd extension of the segment; the
+    recursions themselves are one sosfilt call per band (scipy takes a single
+    cascade per call), each vectorised over epochs and channels.
+    """
+    def __init__(self, sfreq, n_ch, win_len, bands, broad=(1, 100), notch=50.0,
+                 baseline_s=0.5, dtype=np.float64, design="sos"):
+        if design not in DESIGNS:
+            raise ValueError(f"unknown filter design '{design}' (known: {', '.join(DESIGNS)})")
+        self.design    = design
+        self.dtype     = np.dtype(dtype)
+        if design == "ba":
+            self.ba_notch = notch_ba(sfreq, notch)
+            self.ba_broad = band_ba(sfreq, broad)
+            self.ba_bands = [band_ba(sfreq, b) for b in bands.values()]
+        self.sos_notch = notch_sos(sfreq, notch).astype(self.dtype)
+        self.sos_broad = band_sos(sfreq, broad).astype(self.dtype)
+        self.sos_bands = np.stack([band_sos(sfreq, b) for b in bands.values()]).astype(self.dtype)
+        self.zi_notch = self._zi(self.sos_notch)
+        self.zi_broad = self._zi(self.sos_broad)
+        self.zi_bands = [self._zi(s) for s in self.sos_bands]
+        self.names  = list(bands)
+        self.n_ch   = n_ch
+        self.n_base = int(baseline_s * sfreq)
+        self.out    = np.empty((1, len(bands), n_ch, win_len), self.dtype)
+
+    def _zi(self, sos):
+        return sosfilt_zi(sos).astype(self.dtype)[:, None, :]     # (n_sections, 1, 2), broadcast over channels
+
+    @staticmethod
+    def _extend(x, padlen):
+        # odd extension at both ends, as scipy's filtfilt/sosfiltfilt; along the last axis of (…, n_times)
+        return np.concatenate((2*x[..., :1] - x[..., padlen:0:-1], x,
+                               2*x[..., -1:] - x[..., -2:-padlen-2:-1]), axis=-1)
+
+    @staticmethod
+    def _sos_pass(sos, zi, ext, padlen):
+        """Forward-backward sosfilt over an already extended (…, n_times + 2·padlen) signal."""
+        if ext.ndim > 2:
+            zi = zi.reshape(zi.shape[0], *(1,) * (ext.ndim - 1), 2)
+        y, _ = sosfilt(sos, ext, axis=-1, zi=zi * ext[None, ..., :1])
+        y = y[..., ::-1]
+        y, _ = sosfilt(sos, y, axis=-1, zi=zi * y[None, ..., :1])
+        return y[..., padlen:-padlen][..., ::-1]
+
+    @classmethod
+    def _filtfilt(cls, sos, zi, x, padlen):
+        return cls._sos_pass(sos, zi, cls._extend(x, padlen), padlen)
+
+    @classmethod
+    def from_meta(cls, meta, n_ch, bands, **kw):
+        return cls(meta["sfreq"], n_ch, meta["window_len"], bands, **kw)
+
+    def broadband(self, win):
+        """Notch + broadband + baseline on (…, n_ch, n_times) → new array in self.dtype."""
+        if self.design == "ba":
+            seg = filtfilt(*self.ba_notch, win, axis=-1)
+            seg = filtfilt(*self.ba_broad, seg, axis=-1).astype(self.dtype, copy=False)
+        else:
+            seg = self._filtfilt(self.sos_notch, self.zi_notch, win.astype(self.dtype, copy=False), _PAD_NOTCH)
+            seg = self._filtfilt(self.sos_broad, self.zi_broad, seg, _PAD_BAND)
+        seg -= seg[..., :self.n_base].mean(axis=-1, keepdims=True)
+        return seg
+
+    def apply_bands(self, seg, out=None):
+        """Every band of a broadband (n_ch, n_times) segment into out (n_bands, n_ch, n_times);
+        for (n, n_ch, n_times) segments, out is (n, n_bands, n_ch, n_times)."""
+        out = self.out[0, :, :, :seg.shape[-1]] if out is None else out
+        if self.design == "ba":
+            for k, ba in enumerate(self.ba_bands):
+                out[..., k, :, :] = filtfilt(*ba, seg, axis=-1)
+            return out
+        ext = self._extend(seg, _PAD_BAND)                 # felles for alle bånd
+        for k, (sos, zi) in enumerate(zip(self.sos_bands, self.zi_bands)):
+            out[..., k, :, :] = self._sos_pass(sos, zi, ext, _PAD_BAND)
+        return out
+
+    def apply(self, win):
+        """(n_ch, n_times) raw window → (1, n_bands, n_ch, n_times) model input (preallocated)."""
+        self.apply_bands(self.broadband(win))
+        return self.out
+
+    def batch(self, X, out=None, block=64, broadband=True):
+        """
+        (n, n_ch, n_times) raw epochs → (n, n_bands, n_ch, n_times), `block`
+        epochs per vectorised pass; equal to apply() on every epoch. With
+        broadband=False the epochs are already notch/broadband filtered and
+        baseline corrected (the training path) and only the bands are applied.
+        """
+        out = np.empty((len(X), len(self.sos_bands), *X.shape[1:]), self.dtype) if out is None else out
+        for s in range(0, len(X), block):
+            seg = self.broadband(X[s:s + block]) if broadband else X[s:s + block].astype(self.dtype, copy=False)
+            self.apply_bands(seg, out=out[s:s + block])
+        return out
+
@@ -0,0 +1,145 @@
+# ===============================================================
+# ingest.py – egen akvisisjonstråd: blokkerende LSL-pull rett i NumPy
+# ===============================================================
+import inspect
+import threading
+import time
+
+import numpy as np
+
+
+class SPSCQueue:
+    """
+    Lock-free single-producer/single-consumer queue of (start, n) sample ranges.
+
+    Slots are preallocated int arrays; the producer fills a slot and then
+    publishes it by bumping `tail`, the consumer reads up to `tail` and bumps
+    `head`. Each counter has exactly one writer, and a Python int store is
+    atomic, so neither side takes a lock. `wait()` is only there so the
+    consumer can sleep instead of spinning when the queue is empty.
+    """
+    def __init__(self, slots=4096, ready=None):
+        self.slots  = slots
+        self._start = np.zeros(slots, np.int64)
+        self._n     = np.zeros(slots, np.int64)
+        self.head   = 0
+        self.tail   = 0
+        self._ready = ready or threading.Event()    # may be shared by several queues
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def put(self, start, n):
+        """Producer side; returns False when full."""
+        if self.tail - self.head >= self.slots:
+            return False
+        i = self.tail % self.slots
+        self._start[i], self._n[i] = start, n
+        self.tail += 1                      # publish
+        self._ready.set()
+        return True
+
+    def get(self):
+        """Consumer side; (start, n) or None."""
+        if self.head == self.tail:
+            return None
+        i = self.head % self.slots
+        item = int(self._start[i]), int(self._n[i])
+        self.head += 1
+        return item
+
+    def wait(self, timeout):
+        if self.head == self.tail:
+            self._ready.clear()
+            if self.head == self.tail:      # re-check after clear – no lost wake-up
+                self._ready.wait(timeout)
+
+
+class AcquisitionThread(threading.Thread):
+    """
+    Pulls an LSL inlet into a preallocated (capacity, n_source_ch) float32 ring
+    plus LSL timestamps, independently of how long processing takes.
+
+    The thread blocks in liblsl until data is there and pulls it straight into
+    the ring (pull_chunk with dest_obj, no Python lists). Newer pylsl does the
+    wait itself (min_samples=1); with older versions it blocks in pull_sample
+    for the first sample and then drains the rest with pull_chunk. Ranges are
+    handed to the consumer through an SPSCQueue and never wrap, so the
+    consumer always gets contiguous views. If the consumer falls more than
+    `capacity` samples behind, the thread stops pulling (LSL keeps buffering)
+    and counts a stall instead of overwriting unread data.
+    """
+    def __init__(self, inlet, n_src, capacity=30_000, max_chunk=1024, block_s=0.5, ready=None):
+        super().__init__(daemon=True, name="lsl-acquisition")
+        self.inlet     = inlet
+        self.capacity  = capacity
+        self.max_chunk = max_chunk
+        self.block_s   = block_s
+        self.data      = np.zeros((capacity, n_src), np.float32)
+        self.ts        = np.zeros(capacity, np.float64)
+        self.queue     = SPSCQueue(ready=ready)
+        self.written   = 0          # producer: samples written
+        self.consumed  = 0          # consumer: samples released
+        self.stalls    = 0
+        self._stop     = threading.Event()
+        self._min1     = "min_samples" in inspect.signature(inlet.pull_chunk).parameters
+
+    # --------------------------------------------------------- producer
+    def run(self):
+        while not self._stop.is_set():
+            if self.written - self.consumed >= self.capacity or len(self.queue) >= self.queue.slots:
+                self.stalls += 1
+                time.sleep(0.001); continue
+            if self._min1:
+                self._drain(self.block_s)
+                continue
+            sample, t = self.inlet.pull_sample(timeout=self.block_s)
+            if t is None:
+                continue
+            pos = self.written % self.capacity
+            self.data[pos] = sample
+            self.ts[pos]   = t
+            self._publish(pos, 1)
+            self._drain()
+
+    def _drain(self, timeout=0.0):
+        kw = {"min_samples": 1} if self._min1 else {}
+        while True:
+            pos  = self.written % self.capacity
+            room = min(self.capacity - pos, self.capacity - (self.written - self.consumed), self.max_chunk)
+            if room <= 0:
+                return
+            _, ts = self.inlet.pull_chunk(timeout=timeout, max_samples=room,
+                                          dest_obj=self.data[pos:pos + room], **kw)
+            n = len(ts)
+            if not n:
+                return
+            self.ts[pos:pos + n] = ts
+            self._publish(pos, n)
+            if n < room:
+                return
+            timeout = 0.0
+
+    def _publish(self, pos, n):
+        self.written += n
+        while not self.queue.put(pos, n):
+            time.sleep(0.0005)
+
+    # --------------------------------------------------------- consumer
+    def next_chunk(self, timeout=0.5):
+        """(data view (n, n_src), timestamp view (n,)) or None after `timeout`."""
+        item = self.queue.get()
+        if item is None:
+            self.queue.wait(timeout)
+            item = self.queue.get()
+            if item is None:
+                return None
+        pos, n = item
+        return self.data[pos:pos + n], self.ts[pos:pos + n]
+
+    def release(self, n):
+        """Consumer is done with the oldest `n` samples; their slots may be reused."""
+        self.consumed += n
+
+    def stop(self):
+        self._stop.set()
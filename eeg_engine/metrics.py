@@ -0,0 +1,103 @@
+# ===============================================================
+# metrics.py – latens per steg + ende-til-ende fra LSL-tidsstempler
+# ===============================================================
+import os
+import time
+
+import numpy as np
+
+# ingest  : pull + channel selection + ring write (per chunk)
+# filter  : causal SOS step (per chunk) or filtfilt/filterbank (per window)
+# features: covariances → tangent space → scaler/selection (per window)
+# predict : predict_proba (per window)
+# push    : outlet push_sample (per window)
+# e2e     : pylsl.local_clock() at push − LSL timestamp of the newest sample in the window
+STAGES    = ("ingest", "filter", "features", "predict", "push", "e2e")
+# shed    : windows skipped by the overload scheduler (StreamEngine.shed) instead of classified
+COUNTERS  = ("shed",)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollingStats:
+    """Last `size` values in a preallocated array, plus running count/sum."""
+    def __init__(self, size=1024):
+        self.buf   = np.zeros(size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, v):
+        self.buf[self.count % len(self.buf)] = v
+        self.count += 1
+        self.total += v
+
+    def quantiles(self, qs=QUANTILES):
+        n = min(self.count, len(self.buf))
+        return np.quantile(self.buf[:n], qs) if n else np.full(len(qs), np.nan)
+
+
+class Metrics:
+    """
+    Rolling latency per stage (seconds, time.perf_counter) with periodic export
+    in Prometheus textfile format, e.g. for node_exporter's textfile collector.
+    """
+    def __init__(self, size=1024, path=None, every_s=10.0, labels=None):
+        self.stats   = {s: RollingStats(size) for s in STAGES}
+        self.counts  = dict.fromkeys(COUNTERS, 0)
+        self.path    = path
+        self.every_s = every_s
+        self.labels  = labels or {}
+        self._next   = time.monotonic() + every_s
+
+    def add(self, stage, seconds):
+        self.stats[stage].add(seconds)
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def since(self, stage, t0):
+        """Record perf_counter() − t0 under `stage`; returns the new time so calls can be chained."""
+        t = time.perf_counter()
+        self.stats[stage].add(t - t0)
+        return t
+
+    # --------------------------------------------------------------- output
+    def summary(self):
+        rows = []
+        for s, st in self.stats.items():
+            if st.count:
+                p = st.quantiles() * 1e3
+                rows.append(f"{s:<9} n={st.count:<7} p50={p[0]:7.2f}  p95={p[1]:7.2f}  p99={p[2]:7.2f} ms")
+        for c, n in self.counts.items():
+            if n:
+                rows.append(f"{c:<9} n={n:<7} windows skipped (stale)")
+        return "\n".join(rows)
+
+    def prometheus(self):
+        base = "".join(f',{k}="{v}"' for k, v in self.labels.items())
+        name = "eeg_engine_latency_seconds"
+        out  = [f"# HELP {name} Rolling per-stage latency of the live EEG inference engine.",
+                f"# TYPE {name} summary"]
+        for s, st in self.stats.items():
+            lbl = f'stage="{s}"{base}'
+            for q, v in zip(QUANTILES, st.quantiles()):
+                out.append(f'{name}{{{lbl},quantile="{q}"}} {v:.6g}')
+            out.append(f"{name}_sum{{{lbl}}} {st.total:.6g}")
+            out.append(f"{name}_count{{{lbl}}} {st.count}")
+        for c, n in self.counts.items():
+            cname = f"eeg_engine_windows_{c}_total"
+            out += [f"# HELP {cname} Windows skipped by the overload scheduler instead of classified.",
+                    f"# TYPE {cname} counter", f"{cname}{{{base[1:]}}} {n}"]
+        return "\n".join(out) + "\n"
+
+    def write(self, path=None):
+        """Atomic write (tmp + rename) so a scraper never reads half a file."""
+        path = path or self.path
+        tmp  = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def maybe_export(self):
+        if self.path and time.monotonic() >= self._next:
+            self._next += self.every_s
+            self.write()
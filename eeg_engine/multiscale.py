@@ -0,0 +1,138 @@
+# ===============================================================
+# multiscale.py – flere vinduslengder over én delt, filtrert ringbuffer
+# ===============================================================
+"""
+Runs one model per window length (e.g. 1 s, 2 s, 4 s) on the same stream and
+fuses their probabilities into one output per step:
+
+    python -m eeg_train.export data_store --preset multiclass --scales 1 2 4    # → <art_dir>/scale_1s, …
+    python -m eeg_engine --preset multiclass --causal --step 125 --scales 1 2 4
+
+Acquisition, channel selection and the causal notch/band-pass (or filterbank)
+run once. The ring holds the filtered signal for the longest window, and every
+scale's input is the newest `window_len` samples of that one view, baseline
+corrected, so no scale filters again. The first output comes once the
+shortest window is full; longer scales join the fusion as their windows fill.
+
+Fusion is the (geometric) mean of the per-scale log-probabilities,
+renormalised, or the plain mean with cfg.fusion="mean". The scales must share
+sfreq, channels, class order and preprocessing.
+"""
+import os
+from dataclasses import replace
+from time import perf_counter
+
+import numpy as np
+
+from .artifacts import load_artifacts
+from .engine import StreamEngine
+
+
+def scale_dir(cfg, seconds):
+    """Artefact directory of one window length, next to the preset's own artefacts."""
+    return cfg.path(f"scale_{seconds:g}s")
+
+
+def scale_artifacts(cfg):
+    """[(seconds, Artifacts)] for cfg.scales, shortest first; a missing scale directory falls back to the
+    preset's own artefacts if those have that window length."""
+    out = []
+    for s in sorted(cfg.scales):
+        d = scale_dir(cfg, s)
+        if os.path.isdir(d):
+            art = load_artifacts(replace(cfg, art_dir=d, bundle="off" if cfg.bundle == "off" else None))
+        else:
+            art = load_artifacts(cfg)
+            if art.win_len != round(s * art.sfreq):
+                raise FileNotFoundError(f"no artefacts for the {s:g} s scale in {d} "
+                                        f"(python -m eeg_train.export <store> --preset {cfg.name} --scales {s:g})")
+        out.append((s, art))
+    ref = out[-1][1]
+    for s, a in out:
+        if a.sfreq != ref.sfreq or list(a.channels) != list(ref.channels) or list(a.classes) != list(ref.classes):
+            raise ValueError(f"{s:g} s scale: sfreq/channels/classes differ from the {out[-1][0]:g} s scale")
+    return out
+
+
+class _Scale:
+    """One window length: its artefacts and either the flat predictor or the fitted pipeline."""
+    def __init__(self, seconds, art, cfg, flat=None):
+        self.seconds, self.art = seconds, art
+        self.win_len = art.win_len
+        self.flat = flat                                  # the longest scale reuses the engine's own
+        if cfg.predictor == "flat":
+            if self.flat is None and art.flat is not None:
+                self.flat = art.flat
+            elif self.flat is None:
+                from .compiled import compile_pipeline
+                self.flat = compile_pipeline(art.pipe)
+        else:
+            self._feat_pipe, self._clf = art.pipe[:-1], art.pipe[-1]
+
+    def features(self, X):
+        return self.flat.features(X) if self.flat is not None else self._feat_pipe.transform(X)
+
+    def proba(self, F):
+        return self.flat.proba_from_features(F) if self.flat is not None else self._clf.predict_proba(F)
+
+
+def fuse(P, how="geometric"):
+    """(n_scales, n_classes) probabilities → (n_classes,) fused."""
+    if how == "mean":
+        return P.mean(axis=0)
+    if how != "geometric":
+        raise ValueError(f"unknown fusion '{how}' (geometric | mean)")
+    L = np.log(np.maximum(P, 1e-12)).mean(axis=0)
+    e = np.exp(L - L.max())
+    return e / e.sum()
+
+
+class MultiScaleEngine(StreamEngine):
+    """StreamEngine whose window is the longest scale; features()/predict_proba() run every scale that fits."""
+    def __init__(self, cfg, scales=None):
+        if cfg.filter_mode != "causal":
+            raise ValueError("scales need filter_mode='causal' (the filtered signal in the ring is what is shared)")
+        if cfg.cov_mode == "incremental":
+            raise ValueError("scales do not support cov_mode='incremental' yet")
+        if cfg.model == "eegnet":
+            raise ValueError("scales need one model per window length; EEGNet is trained for one window")
+        scales = scales or scale_artifacts(cfg)
+        longest = scales[-1][1]
+        # basismotoren bygger ring og filter for det lengste vinduet (og dets modell, som gjenbrukes)
+        super().__init__(cfg, artifacts=longest)
+        self.scales = [_Scale(s, a, cfg) for s, a in scales[:-1]] + [_Scale(*scales[-1], cfg, flat=self.flat)]
+        self.next_end = self.first_end = self.scales[0].win_len
+        self._P = np.empty((len(self.scales), len(longest.classes)))
+
+    def warmup(self, n=None):
+        times = super().warmup(n)
+        self.next_end = self.first_end
+        return times
+
+    def windows(self):
+        """Newest min(longest window, samples so far) filtered samples at every step; scales slice their tail."""
+        while self.ring.total >= self.next_end:
+            if self.cfg.overload != "off" and self.shed():
+                continue
+            if not self.first:
+                print(f"\n🟢 first window ready ({self.next_end/self.sfreq:.2f}s, "
+                      f"{self.scales[0].seconds:g} s scale)"); self.first = True
+            yield self.ring.window_at(self.next_end, min(self.win_len, self.next_end))
+            self.next_end += self.step_len
+
+    def features(self, win):
+        """[(scale index, feature row)] for every scale whose window is complete."""
+        t0 = perf_counter()
+        out = []
+        for k, sc in enumerate(self.scales):
+            if sc.win_len > win.shape[1]:
+                break
+            X = self.preproc(win[:, -sc.win_len:])          # baseline only – already filtered
+            out.append((k, sc.features(X)))
+        self.metrics.since("features", t0)
+        return out
+
+    def predict_proba(self, F):
+        for i, (k, f) in enumerate(F):
+            self._P[i] = self.scales[k].proba(f)[0]
+        return fuse(self._P[:len(F)], self.cfg.fusion)[np.newaxis]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# ===============================================================
+# preprocess.py – identisk preprosess som i notebook: batch (trening) og strømmende (live)
+# ===============================================================
+"""
+The one implementation of the notebook's chain (notch @50 Hz → 4th-order
+Butterworth band-pass → baseline over the first 0.5 s). Coefficients come
+from eeg_engine.filters, so training and every live path use the same designs.
+
+    zero-phase, batch   filter_continuous(x, sfreq)              whole recording (Block 2, training)
+                        WindowPreproc(sfreq).batch(X)            every epoch at once = per-window live path
+                        FilterBank(...).batch(X)                 filterbank, every epoch at once
+    zero-phase, live    WindowPreproc / FilterbankPreproc        one window per call
+    causal, batch       filter_continuous(x, sfreq, mode="causal")
+    causal, live        StreamingPreproc.step(chunk)             new samples only, persistent state
+    baseline            baseline_correct(V, n_base)              any (…, n_times) stack of windows
+
+Parity check (the repo's stand-in for a test):
+
+    python -m eeg_engine.preprocess --check
+    python -m eeg_engine.preprocess --check --preset multiclass_new --seconds 120
+
+It asserts that the causal stream, fed in random chunk sizes, equals the causal
+batch filter over the whole recording. It also asserts that every live window
+equals the matching batch epoch, and that the batch forms equal the per-window
+live calls, for both the band-pass and the filterbank. It prints the largest
+deviations and the batch vs per-window speed-up. One more row compares the
+zero-phase path against the notebook code written out with scipy's filtfilt
+and the notebook's coefficients (notebook_window).
+"""
+import argparse
+import json
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import filtfilt, sosfilt, sosfilt_zi
+
+from .filters import FilterBank, notch_ba, band_ba, notch_sos, band_sos
+
+
+def baseline_correct(V, n_base, out=None):
+    """V − mean of the first n_base samples per window and channel, in one broadcast (any leading axes)."""
+    base = V[..., :n_base].mean(axis=-1, keepdims=True, dtype=np.float64)
+    return np.subtract(V, base, out=out, casting="unsafe")
+
+
+@lru_cache(maxsize=None)
+def _designs(sfreq, band, notch):
+    return notch_ba(sfreq, notch), band_ba(sfreq, band)
+
+
+def zero_phase(x, sfreq, band=(1, 40), notch=50.0, axis=-1):
+    """filtfilt notch, then filtfilt band-pass, along `axis` – one window, a stack of epochs or a recording."""
+    (b_n, a_n), (b_b, a_b) = _designs(float(sfreq), tuple(band), float(notch))
+    return filtfilt(b_b, a_b, filtfilt(b_n, a_n, x, axis=axis), axis=axis)
+
+
+def filter_continuous(x, sfreq, band=(1, 40), notch=50.0, mode="zero_phase", bands=None):
+    """
+    A whole recording (n_samples, n_ch) → (n_samples, n_rows) float64.
+    zero_phase is Block 2 of the notebook. causal is exactly what
+    StreamingPreproc produces when the same samples are streamed through it,
+    so a model trained on it sees the live --causal features. With `bands`
+    (causal only) the rows are band-major, as in the ring buffer.
+    """
+    if mode == "causal":
+        return StreamingPreproc(sfreq, x.shape[1], band, notch, bands=bands).step(x)
+    if bands:
+        raise ValueError("zero-phase filterbank is per epoch: FilterBank.batch()")
+    return zero_phase(np.asarray(x, np.float64), sfreq, band, notch, axis=0)
+
+
+# ------------------------------------------------------------------ live
+class WindowPreproc:
+    """Zero-phase notch @50 Hz + Butterworth band-pass + baseline, on one (n_ch, n_times) window."""
+    def __init__(self, sfreq, band=(1, 40), notch=50.0, baseline_s=0.5):
+        self.sfreq, self.band, self.notch = sfreq, band, notch
+        self.n_base = int(baseline_s * sfreq)
+
+    def __call__(self, win):
+        # ingen CAR (ble ikke brukt i treningen)
+        return self.batch(win[np.newaxis])
+
+    def batch(self, X):
+        """(n, n_ch, n_times) raw epochs → (n, n_ch, n_times), all in one vectorised filtfilt."""
+        seg = zero_phase(X, self.sfreq, self.band, self.notch)
+        return baseline_correct(seg, self.n_base, out=seg)
+
+
+class FilterbankPreproc:
+    """Notch + 1–100 Hz broadband + baseline, then one band-pass per band → (1, n_bands, n_ch, n_times)."""
+    def __init__(self, sfreq, bands, n_ch, win_len, dtype=np.float64, design="sos"):
+        self.fb = FilterBank(sfreq, n_ch, win_len, bands, dtype=dtype, design=design)
+
+    def __call__(self, win):
+        # NB: returns the filterbank's preallocated output – valid until the next call
+        return self.fb.apply(win)
+
+    def batch(self, X):
+        return self.fb.batch(X)
+
+
+class StreamingPreproc:
+    """
+    Causal, stateful variant of the chain above for overlapping windows.
+
+    Notch + band-pass run as second-order sections with persistent per-channel
+    state (zi) and only ever see the new samples, so filtering cost per
+    decision scales with the step, not the window. The filtered signal goes
+    into the ring buffer; per window only the baseline is subtracted.
+
+    Compatibility with the zero-phase training path: every SOS chain is run
+    twice in cascade, so the magnitude response is |H|², the same as
+    filtfilt. Only the phase differs, and since every channel gets the same
+    filter the cross-spectra (and therefore the covariances the Riemann
+    pipelines use) are unchanged in expectation. What does differ: filtfilt on
+    a 4 s window has edge transients that the continuous filter does not, and
+    for the filterbank the band filters run on the continuous broadband signal
+    instead of per baseline-corrected epoch. `python -m eeg_engine.compat`
+    measures how much this moves the probabilities for a given artefact set;
+    training on filter_continuous(..., mode="causal") removes the difference.
+    """
+    def __init__(self, sfreq, n_ch, band=(1, 40), notch=50.0, baseline_s=0.5, bands=None):
+        sos = np.vstack([notch_sos(sfreq, notch), band_sos(sfreq, band)])
+        self.sos      = np.vstack([sos, sos])           # forward twice → |H|² like filtfilt
+        self.band_sos = [np.vstack([s, s]) for s in (band_sos(sfreq, b) for b in (bands or {}).values())]
+        self.n_ch   = n_ch
+        self.n_base = int(baseline_s * sfreq)
+        self.n_rows = n_ch * max(1, len(self.band_sos))  # rows written to the ring buffer
+        self.reset()
+
+    def reset(self):
+        self.zi = None
+        self.band_zi = [None] * len(self.band_sos)
+
+    @staticmethod
+    def _zi(sos, x0):
+        # steady state for a step of height x0 → no start-up transient from DC offsets
+        return sosfilt_zi(sos)[:, None, :] * x0[None, :, None]
+
+    def step(self, block):
+        """Filter new samples (n_samples, n_ch) → (n_samples, n_rows), advancing the state."""
+        x = np.asarray(block, np.float64).T
+        if self.zi is None:
+            self.zi = self._zi(self.sos, x[:, 0])
+        y, self.zi = sosfilt(self.sos, x, axis=1, zi=self.zi)
+        if not self.band_sos:
+            return y.T
+        out = np.empty((len(self.band_sos) * self.n_ch, y.shape[1]))
+        for k, sos in enumerate(self.band_sos):
+            if self.band_zi[k] is None:
+                self.band_zi[k] = self._zi(sos, y[:, 0])
+            out[k*self.n_ch:(k+1)*self.n_ch], self.band_zi[k] = sosfilt(sos, y, axis=1, zi=self.band_zi[k])
+        return out.T
+
+    def __call__(self, win):
+        """Filtered (n_rows, n_times) ring view → model input."""
+        seg = baseline_correct(win, self.n_base)
+        if self.band_sos:
+            return seg.reshape(len(self.band_sos), self.n_ch, -1)[np.newaxis, ...]
+        return seg[np.newaxis, ...]
+
+
+def make_preproc(cfg, sfreq, n_ch=None, win_len=None, design="ba"):
+    if cfg.filter_mode == "causal":
+        bands = cfg.bands if cfg.preproc == "filterbank" else None
+        band  = (1, 100) if cfg.preproc == "filterbank" else (1, 40)
+        return StreamingPreproc(sfreq, n_ch, band=band, bands=bands)
+    if cfg.preproc == "filterbank":
+        return FilterbankPreproc(sfreq, cfg.bands, n_ch, win_len, dtype=np.dtype(cfg.fb_dtype),
+                                 design=cfg.fb_design or design)
+    return WindowPreproc(sfreq)
+
+
+# ----------------------------------------------------------------- check
+def _max_rel(a, b):
+    return float(np.abs(a - b).max() / max(np.abs(b).max(), 1e-30))
+
+
+def cfg_meta(cfg):
+    with open(cfg.path(cfg.meta_file)) as f:
+        return json.load(f)
+
+
+def cfg_sfreq(cfg):
+    return float(cfg_meta(cfg)["sfreq"])
+
+
+def notebook_window(w, sfreq, bands=None, design="ba"):
+    """
+    One raw (n_ch, n_times) window through the notebook code as written – scipy
+    designs, filtfilt, no eeg_engine helpers: Block 2/4 for the band-pass, the
+    old live_inference_multiclass_new loop for the filterbank. design="sos"
+    is the same chain with butter(output="sos") + sosfiltfilt (retrained models).
+    """
+    from scipy.signal import iirnotch, butter, sosfiltfilt
+    nyq = sfreq / 2
+    b_n, a_n = iirnotch(50.0, Q=30.0, fs=sfreq)
+    seg = filtfilt(b_n, a_n, w, axis=1)
+    if not bands:
+        b, a = butter(4, [1/nyq, 40/nyq], btype="band")
+        seg = filtfilt(b, a, seg, axis=1)
+        return seg - seg[:, :int(0.5 * sfreq)].mean(axis=1, keepdims=True)
+    if design == "sos":
+        seg = sosfiltfilt(butter(4, [1/nyq, 100/nyq], btype="band", output="sos"), seg, axis=1)
+    else:
+        b, a = butter(4, [1/nyq, 100/nyq], btype="band")
+        seg = filtfilt(b, a, seg, axis=1)
+    seg = seg - seg[:, :int(0.5 * sfreq)].mean(axis=1, keepdims=True)
+    out = []
+    for l, h in bands.values():
+        if design == "sos":
+            out.append(sosfiltfilt(butter(4, [l/nyq, h/nyq], btype="band", output="sos"), seg, axis=1))
+        else:
+            b, a = butter(4, [l/nyq, h/nyq], btype="band")
+            out.append(filtfilt(b, a, seg, axis=1))
+    return np.stack(out)
+
+
+def check(cfg, x, step=125, seed=0, tol=1e-9):
+    """Parity of batch vs streaming / per-window forms on one recording x (n_samples, n_ch) → rows."""
+    import time
+    from numpy.lib.stride_tricks import sliding_window_view
+    from .filters import fb_design
+    meta = cfg_meta(cfg)
+    sfreq, n_ch = float(meta["sfreq"]), x.shape[1]
+    win  = int(4 * sfreq)
+    fb   = cfg.preproc == "filterbank"
+    band = (1, 100) if fb else (1, 40)
+    rows = []
+
+    # causal: strømmet i tilfeldige biter == hele opptaket på én gang
+    sp = StreamingPreproc(sfreq, n_ch, band, bands=cfg.bands if fb else None)
+    rng, parts, s = np.random.default_rng(seed), [], 0
+    while s < len(x):
+        k = int(rng.integers(1, 300)); parts.append(sp.step(x[s:s + k])); s += k
+    stream = np.concatenate(parts)
+    batch  = filter_continuous(x, sfreq, band, mode="causal", bands=cfg.bands if fb else None)
+    rows.append(("causal: stream (random chunks) vs batch", _max_rel(stream, batch)))
+
+    ends = np.arange(win, len(x) + 1, step)
+    live = np.stack([sp(stream[e - win:e].T)[0] for e in ends])
+    V = sliding_window_view(batch, win, axis=0)[::step]
+    ep = baseline_correct(V, sp.n_base)
+    if fb:
+        ep = ep.reshape(len(ep), len(cfg.bands), n_ch, win)
+    rows.append(("causal: live windows vs batch epochs", _max_rel(live, ep)))
+
+    # zero-phase: vektorisert over alle epoker == ett kall per vindu (live)
+    X  = np.ascontiguousarray(sliding_window_view(x, win, axis=0)[::step * 4]).astype(np.float64)
+    design = cfg.fb_design or fb_design(meta)
+    wp = FilterbankPreproc(sfreq, cfg.bands, n_ch, win, design=design) if fb else WindowPreproc(sfreq)
+    t0 = time.perf_counter()
+    one = np.stack([wp(w)[0].copy() for w in X])
+    t1 = time.perf_counter()
+    many = wp.batch(X)
+    t2 = time.perf_counter()
+    rows.append((f"zero-phase: batch vs per window ({(t1 - t0) / (t2 - t1):.1f}× faster)",
+                 _max_rel(many, one)))
+    # og mot notebook-koden slik den står (scipy filtfilt med notebookens koeffisienter)
+    ref = np.stack([notebook_window(w, sfreq, cfg.bands if fb else None, design) for w in X])
+    rows.append((f"zero-phase: batch vs notebook {'filtfilt(b, a)' if design == 'ba' or not fb else 'sosfiltfilt'}",
+                 _max_rel(many, ref)))
+    for name, err in rows:
+        print(f"   {'✅' if err <= tol else '❌'} {name:<52} max rel. dev {err:.1e}")
+    return all(err <= tol for _, err in rows)
+
+
+def main():
+    from .config import PRESETS, get_config
+    from .compat import synthetic_eeg
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--check", action="store_true", help="run the batch vs streaming parity check")
+    ap.add_argument("--preset", nargs="+", choices=list(PRESETS), default=["multiclass", "multiclass_new"])
+    ap.add_argument("--csv", default=None, help="recording in csv_output format; default: synthetic")
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--step", type=int, default=125)
+    args = ap.parse_args()
+    if not args.check:
+        ap.print_help(); return
+
+    ok = True
+    for name in args.preset:
+        cfg = get_config(name)
+        sfreq = cfg_sfreq(cfg)
+        if args.csv:
+            from .replay import load_recording
+            x = load_recording(args.csv).data
+        else:
+            x = synthetic_eeg(8, int(args.seconds * sfreq), sfreq)
+        print(f"🔬 {name}: {x.shape[1]} ch × {x.shape[0]/sfreq:.0f}s")
+        ok &= check(cfg, x, args.step)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
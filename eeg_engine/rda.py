@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# ===============================================================
+# rda.py – BrainVision Recorder RDA direkte over TCP (uten LSL-broen)
+# ===============================================================
+"""
+Client for the BrainVision Recorder's Remote Data Access port. It replaces
+BrainVisionRDA_x64/BrainVisionRDA.exe → LSL → engine with one TCP
+connection, and a mock server that replays recorded data the same way:
+
+    python -m eeg_engine --preset multiclass --step 125 --causal --rda 127.0.0.1:51244
+    python -m eeg_engine.rda --serve --csv csv_output/Person5Recording4.csv      # mock recorder
+    python -m eeg_engine.rda --connect 127.0.0.1 --seconds 5                     # what the recorder sends
+    python -m eeg_engine.rda --check                                             # mock → client → engine
+
+Protocol (little endian, 32-bit port 51244): every message starts with
+a 24 byte header, GUID + uint32 size (including the header) + uint32 type.
+    1  start   uint32 n_channels, double sampling interval (µs),
+               double resolution[n_channels], NUL-terminated channel names
+    4  data    uint32 block, uint32 n_points, uint32 n_markers,
+               float32 data[n_points][n_channels] (µV), then markers
+    3  stop
+Anything else (e.g. the recorder's keep-alive) is skipped.
+
+Each message body is read with recv_into into one preallocated buffer, and
+the data block is handed on as a float32 (n_points, n_channels) view of that
+buffer. The engine's ChannelSelect/ring write is the only copy. RDA carries
+no timestamps; samples are stamped with the local clock when the block
+arrives, backdated at the nominal rate, so e2e latency starts at arrival.
+"""
+import argparse
+import select
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+GUID     = bytes.fromhex("8e45584396c9864caf4a98bbf6c91450")
+HEADER   = struct.Struct("<16sII")
+DEFAULT_PORT = 51244                 # 32-bit float data; 51234 is the 16-bit port (not supported)
+START, DATA16, STOP, DATA32 = 1, 2, 3, 4
+
+
+def parse_address(addr, port=DEFAULT_PORT):
+    """'host[:port]' → (host, port)."""
+    host, _, p = addr.rpartition(":") if ":" in addr else (addr, "", "")
+    return host or "127.0.0.1", int(p) if p else port
+
+
+class RDAClient:
+    """One recorder connection: start message → channels/sfreq, then read() per data block."""
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, clock=None, timeout=10.0, max_points=1024):
+        self.host, self.port = host, port
+        self.clock    = clock or time.perf_counter
+        self.timeout  = timeout
+        self.sock     = None
+        self.channels = self.sfreq = self.resolutions = None
+        self.block    = None               # last block number
+        self.lost     = 0                  # blocks missing in the sequence (recorder overflow)
+        self._hdr  = bytearray(HEADER.size)
+        self._body = bytearray(12 + 4 * 64 * max_points)
+        self._ts   = np.empty(max_points)
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            kind, body = self._message()
+            if kind == START:
+                break
+            if kind is None:
+                raise ConnectionError(f"RDA {self.host}:{self.port} closed before the start message")
+        n = struct.unpack_from("<I", body, 0)[0]
+        interval_us = struct.unpack_from("<d", body, 4)[0]
+        self.resolutions = np.frombuffer(bytes(body[12:12 + 8 * n]), "<f8")
+        names = bytes(body[12 + 8 * n:]).split(b"\0")[:n]
+        self.channels = [s.decode("latin-1") for s in names]
+        self.sfreq = 1e6 / interval_us
+        self.sock.settimeout(None)
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    # ----------------------------------------------------------------- wire
+    def _recv_into(self, view):
+        got = 0
+        while got < len(view):
+            n = self.sock.recv_into(view[got:])
+            if not n:
+                return False
+            got += n
+        return True
+
+    def _message(self):
+        """Next (type, body memoryview) – the body is valid until the next call; (None, None) when closed."""
+        if not self._recv_into(memoryview(self._hdr)):
+            return None, None
+        guid, size, kind = HEADER.unpack(self._hdr)
+        if guid != GUID:
+            raise ConnectionError("RDA stream out of sync (bad GUID)")
+        n = size - HEADER.size
+        if n > len(self._body):
+            self._body = bytearray(n)      # bare første gang en blokk er større enn antatt
+        body = memoryview(self._body)[:n]
+        if not self._recv_into(body):
+            return None, None
+        return kind, body
+
+    def pending(self):
+        """True if more bytes are already waiting on the socket."""
+        return bool(select.select([self.sock], [], [], 0)[0])
+
+    def read(self):
+        """
+        Block until the next data block → ((n_points, n_channels) float32 view, timestamps),
+        or None when the recorder stops or disconnects.
+        """
+        while True:
+            kind, body = self._message()
+            if kind is None or kind == STOP:
+                return None
+            if kind == START:
+                raise ConnectionError("RDA recording restarted (new start message) – reconnect")
+            if kind == DATA16:
+                raise ConnectionError(f"16-bit RDA data on port {self.port}; use the float32 port {DEFAULT_PORT}")
+            if kind == DATA32:
+                break
+        t = self.clock()
+        block, n, _ = struct.unpack_from("<III", body, 0)
+        if self.block is not None and block != self.block + 1:
+            self.lost += block - self.block - 1
+        self.block = block
+        data = np.frombuffer(body, "<f4", n * len(self.channels), 12).reshape(n, len(self.channels))
+        if n > len(self._ts):
+            self._ts = np.empty(n)
+        ts = self._ts[:n]
+        # ingen tidsstempler i RDA: siste sample = ankomst, resten bakover med nominell rate
+        np.multiply(np.arange(n - 1, -1, -1), -1.0 / self.sfreq, out=ts)
+        ts += t
+        return data, ts
+
+    def __iter__(self):
+        while True:
+            got = self.read()
+            if got is None:
+                return
+            yield got
+
+
+# --------------------------------------------------------------- mock
+def start_message(channels, sfreq, resolution=1.0):
+    names = b"".join(c.encode("latin-1") + b"\0" for c in channels)
+    body  = struct.pack(f"<Id{len(channels)}d", len(channels), 1e6 / sfreq, *[resolution] * len(channels)) + names
+    return HEADER.pack(GUID, HEADER.size + len(body), START) + body
+
+
+def data_message(block, part, markers=()):
+    """float32 data block; markers are (position, description) pairs of type 'Stimulus'."""
+    mk = b""
+    for pos, desc in markers:
+        text = b"Stimulus\0" + desc.encode("latin-1") + b"\0"
+        mk += struct.pack("<IIIi", 16 + len(text), pos, 1, -1) + text
+    body = struct.pack("<III", block, len(part), len(markers))
+    size = HEADER.size + len(body) + part.size * 4 + len(mk)
+    return b"".join([HEADER.pack(GUID, size, DATA32), body, np.ascontiguousarray(part, "<f4").tobytes(), mk])
+
+
+def _markers(ann, start, n):
+    """Annotation changes in samples [start, start + n) of a (looped) recording → [(position, text)]."""
+    if ann is None:
+        return ()
+    i0 = start % len(ann)
+    prev = ann[i0 - 1] if i0 else ""
+    out = []
+    for i, a in enumerate(ann[i0:i0 + n]):
+        if a and a != prev:
+            out.append((i, a))
+        prev = a
+    return out
+
+
+def serve_rda(src, host="127.0.0.1", port=DEFAULT_PORT, once=False, ready=None, verbose=True):
+    """
+    Mock recorder: replays a ReplaySource to every client that connects (one
+    at a time), as start message → data blocks → stop. Annotation changes in
+    the recording are sent as markers. `ready` (threading.Event) is set with
+    the bound port in `.port` once it listens (port 0 → any free port).
+    """
+    rec = src.rec
+    with socket.create_server((host, port)) as srv:
+        if ready is not None:
+            ready.port = srv.getsockname()[1]
+            ready.set()
+        if verbose:
+            print(f"📡 mock RDA on {host}:{srv.getsockname()[1]} – {len(rec.channels)} ch @ {rec.sfreq:g} Hz, "
+                  f"{rec.data.shape[0]/rec.sfreq:.0f}s, speed={src.speed or '∞'}")
+        while True:
+            conn, peer = srv.accept()
+            if verbose:
+                print(f"   client {peer[0]}:{peer[1]}")
+            sent = 0
+            try:
+                with conn:
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    conn.sendall(start_message(rec.channels, rec.sfreq))
+                    for block, (part, _) in enumerate(src):
+                        conn.sendall(data_message(block, part, _markers(rec.annotations, sent, len(part))))
+                        sent += len(part)
+                    conn.sendall(HEADER.pack(GUID, HEADER.size, STOP))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            if verbose:
+                print(f"   … {sent:,} samples sent, client gone")
+            if once:
+                return
+
+
+# ---------------------------------------------------------------- check
+def check(cfg, rec, chunk=20):
+    """
+    mock server → RDAClient must reproduce the recording bit for bit, and an
+    engine fed from the client (recording channels shuffled plus extras, so the
+    mapping is exercised) must give the same probabilities as replay_into. → bool
+    """
+    from dataclasses import replace
+    from .engine import StreamEngine
+    from .replay import Recording, ReplaySource, replay_into
+
+    rng   = np.random.default_rng(0)
+    extra = rng.standard_normal((rec.data.shape[0], 3)).astype(np.float32)
+    order = rng.permutation(len(rec.channels))
+    sent  = Recording(np.hstack([rec.data[:, order], extra]),
+                      [rec.channels[i] for i in order] + ["EOG", "ECG", "Aux1"], rec.sfreq, rec.annotations)
+    ready = threading.Event()
+    threading.Thread(target=serve_rda, args=(ReplaySource(sent, chunk, speed=0),),
+                     kwargs=dict(port=0, once=True, ready=ready, verbose=False), daemon=True).start()
+    ready.wait(5)
+
+    cfg = replace(cfg, verbose=False, warmup=0)
+    eng = StreamEngine(cfg); eng.report = lambda *a: None
+    cli = RDAClient(port=ready.port).connect()
+    eng.map_channels(cli.channels)
+    eng._clock = cli.clock
+    t0 = time.perf_counter()
+    got, P = [], []
+    for data, ts in cli:
+        got.append(data.copy())
+        P += [p for _, p in eng.feed(data, ts)]
+    dt_s = time.perf_counter() - t0
+    cli.close()
+    got = np.concatenate(got)
+
+    ref = StreamEngine(cfg); ref.report = lambda *a: None
+    R = [p for _, p in replay_into(ref, ReplaySource(rec, chunk, speed=0))]
+    rows = [(f"channels + sfreq from the start message ({len(cli.channels)} ch @ {cli.sfreq:g} Hz)",
+             cli.channels == sent.channels and cli.sfreq == rec.sfreq),
+            (f"samples bit-exact ({len(got):,} in {dt_s:.2f}s, {cli.lost} blocks lost)",
+             got.shape == sent.data.shape and np.array_equal(got, sent.data)),
+            (f"engine probabilities = replay ({len(P)} windows)",
+             len(P) == len(R) and np.array_equal(np.array(P), np.array(R)))]
+    for name, ok in rows:
+        print(f"   {'✅' if ok else '❌'} {name}")
+    return all(ok for _, ok in rows)
+
+
+def main():
+    import json
+    from .config import PRESETS, get_config
+    from .replay import load_recording, synthetic_recording, ReplaySource
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--serve", action="store_true", help="run the mock recorder")
+    ap.add_argument("--connect", default=None, metavar="HOST[:PORT]", help="print what a recorder sends")
+    ap.add_argument("--check", action="store_true", help="mock → client → engine round trip")
+    ap.add_argument("--csv", default=None, help="recording in csv_output format; default: synthetic")
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass",
+                    help="channel set/sfreq of the synthetic signal (and model for --check)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = real time, 0 = unthrottled")
+    ap.add_argument("--chunk", type=int, default=20, help="points per data block")
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--loop", action="store_true")
+    args = ap.parse_args()
+
+    if args.connect:
+        cli = RDAClient(*parse_address(args.connect, args.port)).connect()
+        print(f"✅ {len(cli.channels)} ch @ {cli.sfreq:g} Hz: {', '.join(cli.channels)}")
+        t0, n, blocks = time.perf_counter(), 0, 0
+        for data, _ in cli:
+            n += len(data); blocks += 1
+            if time.perf_counter() - t0 >= args.seconds:
+                break
+        dt_s = time.perf_counter() - t0
+        print(f"   {blocks} blocks • {n:,} samples in {dt_s:.1f}s ({n/dt_s:.0f} Hz) • {cli.lost} blocks lost")
+        cli.close()
+        return
+
+    cfg = get_config(args.preset)
+    if args.csv:
+        rec = load_recording(args.csv)
+    else:
+        with open(cfg.path(cfg.channels_file)) as f:
+            chans = json.load(f)
+        with open(cfg.path(cfg.meta_file)) as f:
+            sfreq = json.load(f)["sfreq"]
+        rec = synthetic_recording(chans, sfreq, args.seconds if args.serve else min(args.seconds, 20))
+
+    if args.check:
+        print(f"🔬 {args.preset}: {len(rec.channels)} ch × {rec.data.shape[0]/rec.sfreq:.0f}s over TCP")
+        raise SystemExit(0 if check(cfg, rec, args.chunk) else 1)
+    if args.serve:
+        try:
+            serve_rda(ReplaySource(rec, args.chunk, args.speed, loop=args.loop), args.host, args.port)
+        except KeyboardInterrupt:
+            print("\n⏹  mock RDA stopped")
+        return
+    ap.print_help()
+
+
+if __name__ == "__main__":
+    main()
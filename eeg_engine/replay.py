@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# ===============================================================
+# replay.py – spill av innspilte CSV-er som om de kom fra BrainVision RDA
+# ===============================================================
+"""
+Replays a recording in the csv_output format (Person/Recording/time/channels/
+annotation) either as a local LSL outlet that stands in for the BrainVision
+RDA connector, or straight into an in-process StreamEngine.
+
+    python -m eeg_engine.replay --csv csv_output/Person5Recording4.csv --lsl            # 1× RDA stand-in
+    python -m eeg_engine.replay --csv csv_output/Person5Recording4.csv --preset multiclass --speed 0
+    python -m eeg_engine.replay --preset multiclass_new --seconds 60 --speed 4          # synthetic signal
+    python -m eeg_engine.replay --preset multiclass --step 125 --check-overload       # overload never starves
+
+--speed 1 is real time, N is N× faster, 0 is as fast as possible.
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+META_COLS = ("Person", "Recording", "time", "annotation", "label")
+
+
+@dataclass
+class Recording:
+    data:        np.ndarray      # (n_samples, n_ch) float32
+    channels:    list
+    sfreq:       float
+    annotations: np.ndarray = None
+
+
+def load_recording(path, channels=None, sfreq=None):
+    """CSV → Recording; `channels` picks (and orders) columns, otherwise every non-metadata column."""
+    import pandas as pd
+    df = pd.read_csv(path)
+    channels = list(channels) if channels else [c for c in df.columns if c not in META_COLS]
+    data = df[channels].apply(pd.to_numeric, errors="coerce").to_numpy(np.float32)
+    if sfreq is None:
+        sfreq = float(round(1.0 / np.median(np.diff(df["time"].to_numpy()[:1000]))))
+    ann = df["annotation"].fillna("").astype(str).to_numpy() if "annotation" in df else None
+    return Recording(data, channels, sfreq, ann)
+
+
+def synthetic_recording(channels, sfreq, seconds, seed=0):
+    from .compat import synthetic_eeg
+    return Recording(synthetic_eeg(len(channels), int(seconds * sfreq), sfreq, seed), list(channels), sfreq)
+
+
+class ReplaySource:
+    """
+    Yields (chunk (n, n_ch) view, LSL-style timestamps) in blocks of `chunk`
+    samples, paced to `speed` × real time (0 → unthrottled).
+
+    Timestamps are on `clock` (pylsl.local_clock when given, else
+    time.perf_counter) and are the time each sample would have been acquired,
+    so end-to-end latency measured against the same clock is meaningful; in
+    unthrottled mode the whole chunk is stamped with its release time.
+    """
+    def __init__(self, rec, chunk=20, speed=1.0, clock=None, loop=False):
+        self.rec   = rec
+        self.chunk = chunk
+        self.speed = speed
+        self.clock = clock or time.perf_counter
+        self.loop  = loop
+
+    def __iter__(self):
+        data, fs = self.rec.data, self.rec.sfreq
+        n  = data.shape[0]
+        dt = 1.0 / (fs * self.speed) if self.speed else 0.0
+        offs = np.arange(self.chunk, dtype=np.float64) * dt
+        t0 = self.clock(); done = 0
+        while True:
+            for s in range(0, n, self.chunk):
+                part = data[s:s + self.chunk]
+                k = len(part)
+                if dt:
+                    due = t0 + (done + k) * dt      # last sample of the chunk has been "recorded"
+                    lag = due - self.clock()
+                    if lag > 0:
+                        time.sleep(lag)
+                    ts = t0 + done * dt + offs[:k]
+                else:
+                    ts = np.full(k, self.clock())
+                done += k
+                yield part, ts
+            if not self.loop:
+                return
+
+
+def serve_lsl(src, name="BrainVision RDA", verbose=True):
+    """Local LSL outlet with the channel labels in the stream header, as the RDA connector sends them."""
+    from pylsl import StreamInfo, StreamOutlet
+    rec  = src.rec
+    info = StreamInfo(name, "EEG", len(rec.channels), rec.sfreq, "float32", f"replay-{name}")
+    chs  = info.desc().append_child("channels")
+    for ch in rec.channels:
+        c = chs.append_child("channel")
+        c.append_child_value("label", ch); c.append_child_value("unit", "microvolts")
+    out = StreamOutlet(info, chunk_size=src.chunk)
+    print(f"📡 replaying {rec.data.shape[0]/rec.sfreq:.0f}s as LSL '{name}' "
+          f"({len(rec.channels)} ch @ {rec.sfreq:g} Hz, speed={src.speed or '∞'})")
+    sent = 0
+    for part, _ in src:
+        out.push_chunk(part)
+        sent += len(part)
+        if verbose and sent % int(rec.sfreq * 10) < src.chunk:
+            print(f"\r… sent {sent:,} samples", end="")
+    print("\n⏹  replay finished")
+
+
+def replay_into(engine, src):
+    """Feed a ReplaySource straight into a StreamEngine (no LSL) → list of (label, probs)."""
+    rec = src.rec
+    engine.map_channels(rec.channels)
+    engine._clock = src.clock
+    out = []
+    for part, ts in src:
+        out += engine.feed(part, ts)
+    return out
+
+
+def check_overload(cfg, rec, latency=0.6, chunk=20):
+    """
+    Constant transport latency above cfg.max_stale_s: with either overload
+    policy every chunk that completes a window must still get a
+    classification – the newest complete window – however many older ones
+    are shed. → True if it passes.
+    """
+    from dataclasses import replace
+    from .artifacts import load_artifacts
+    from .asynclog import AsyncLog
+    from .engine import StreamEngine
+    art = load_artifacts(cfg)
+    t_rec, ok = np.arange(rec.data.shape[0]) / rec.sfreq, True
+    for policy in ("drop", "coalesce"):
+        eng = StreamEngine(replace(cfg, overload=policy, verbose=False, warmup=0), artifacts=art)
+        eng.log = AsyncLog(eng.art.classes, console=False)
+        eng.map_channels(rec.channels)
+        now = [0.0]
+        eng._clock = lambda: now[0]
+        due = served = n_win = 0
+        for s in range(0, len(t_rec), chunk):
+            ts = t_rec[s:s + chunk]
+            now[0] = ts[-1] + latency                    # hver chunk kommer `latency` s etter siste sample
+            newer = eng.ring.total + len(ts) >= eng.next_end
+            res = eng.feed(rec.data[s:s + chunk], ts)
+            due, served, n_win = due + newer, served + (newer and len(res) > 0), n_win + len(res)
+        eng.log.close()
+        good = served == due > 0
+        ok &= good
+        print(f"   {'✅' if good else '❌'} {policy:<9} latency {latency:g}s > max_stale {cfg.max_stale_s:g}s: "
+              f"{served} of {due} chunks with a new window classified one "
+              f"({n_win} windows, {eng.metrics.counts['shed']} shed)")
+    return ok
+
+
+def main():
+    from .config import PRESETS, get_config
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", default=None, help="recording in csv_output format; without it a synthetic signal")
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass",
+                    help="in-process: model to run; --lsl without --csv: channel set of the synthetic signal")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--lsl", action="store_true", help="publish as an LSL outlet instead of running a model")
+    ap.add_argument("--name", default="BrainVision RDA", help="LSL stream name with --lsl")
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N× faster, 0 = unthrottled")
+    ap.add_argument("--chunk", type=int, default=20, help="samples per chunk (RDA sends 20 @ 500 Hz)")
+    ap.add_argument("--seconds", type=float, default=60.0, help="length of the synthetic signal")
+    ap.add_argument("--step", type=int, default=None)
+    ap.add_argument("--loop", action="store_true")
+    ap.add_argument("--check-overload", action="store_true",
+                    help="assert that --overload drop/coalesce still classify the newest window "
+                         "when the latency alone exceeds max_stale_s")
+    ap.add_argument("--latency", type=float, default=0.6, help="constant transport latency in s for --check-overload")
+    args = ap.parse_args()
+
+    cfg = get_config(args.preset, **({"art_dir": args.art_dir} if args.art_dir else {}),
+                     step_len=args.step, in_name=args.name)
+    if args.csv:
+        rec = load_recording(args.csv)
+    else:
+        import json
+        with open(cfg.path(cfg.channels_file)) as f:
+            chans = json.load(f)
+        with open(cfg.path(cfg.meta_file)) as f:
+            sfreq = json.load(f)["sfreq"]
+        rec = synthetic_recording(chans, sfreq, args.seconds)
+
+    if args.check_overload:
+        raise SystemExit(0 if check_overload(cfg, rec, args.latency, args.chunk) else 1)
+    if args.lsl:
+        from pylsl import local_clock
+        serve_lsl(ReplaySource(rec, args.chunk, args.speed, local_clock, args.loop), args.name)
+        return
+
+    from .engine import StreamEngine
+    eng = StreamEngine(cfg)
+    t0  = time.perf_counter()
+    res = replay_into(eng, ReplaySource(rec, args.chunk, args.speed, loop=False))
+    dt_s = time.perf_counter() - t0
+    if eng.log is not None:
+        eng.log.close()
+    print(f"\n✅ {len(res)} windows in {dt_s:.1f}s ({len(res)/dt_s:.1f} windows/s)")
+    print(eng.metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
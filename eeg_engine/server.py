@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# ===============================================================
+# server.py – flere EEG-strømmer på én maskin, batchet klassifisering
+# ===============================================================
+"""
+Serves several LSL inlets (headsets/subjects) from one process. Every stream
+has its own artefacts, ring buffer, filter state and MI_Pred outlet.
+
+    python -m eeg_engine.server --stream "RDA 1=multiclass" --stream "RDA 2=multiclass_new:MI_Pred_2"
+
+Each tick, preprocessing and feature extraction of the streams with new data
+run on a thread pool (scipy/NumPy release the GIL in the heavy parts and the
+engine state stays in this process); all windows that became ready in the tick
+are then stacked and classified with one predict_proba call per model.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import numpy as np
+
+from .artifacts import load_artifacts
+from .config import PRESETS, get_config
+from .engine import StreamEngine, quit_on_q
+from .ingest import AcquisitionThread
+
+
+def parse_stream(spec, i, n):
+    """'INLET=PRESET[:OUTLET]' → EngineConfig; outlets default to MI_Pred_1, MI_Pred_2, … (MI_Pred if only one)"""
+    inlet, _, rest = spec.partition("=")
+    preset, _, out = (rest or "multiclass").partition(":")
+    out = out or ("MI_Pred" if n == 1 else f"MI_Pred_{i + 1}")
+    return get_config(preset, in_name=inlet, out_name=out)
+
+
+def model_key(cfg):
+    return (cfg.art_dir, cfg.pipeline_file, cfg.predictor)
+
+
+class StreamServer:
+    """N StreamEngines; artefacts are loaded once per model and shared."""
+    def __init__(self, cfgs, workers=None):
+        arts, self.engines = {}, []
+        for cfg in cfgs:
+            k = model_key(cfg)
+            if k not in arts:
+                arts[k] = load_artifacts(cfg)
+            eng = StreamEngine(cfg, artifacts=arts[k])
+            eng.tag = f"[{cfg.in_name}] "
+            self.engines.append(eng)
+        self.groups = {}
+        for i, eng in enumerate(self.engines):
+            self.groups.setdefault(model_key(eng.cfg), []).append(i)
+        self.pool  = ThreadPoolExecutor(workers or len(self.engines), thread_name_prefix="preproc")
+        self.ready = threading.Event()
+        self.acqs  = []
+
+    # ------------------------------------------------------------ processing
+    @staticmethod
+    def collect(eng, chunks):
+        """Write chunks into one engine → [(window end, LSL time of newest sample, feature row)] per finished window."""
+        out = []
+        # med overload: alle chunks inn først, så klassifiseres bare vinduene shed() slipper gjennom
+        batched = eng.cfg.overload != "off"
+        for k, (chunk, ts) in enumerate(chunks):
+            eng.write(chunk, ts)
+            if batched and k < len(chunks) - 1:
+                continue
+            for win in eng.windows():
+                out.append((eng.next_end, eng.sample_ts(), eng.features(win)[0]))
+        return out
+
+    def process(self, chunks_per_stream):
+        """
+        One tick: {stream index: [(chunk, ts), …]} → {stream index: [(label, probs), …]}.
+        Features per stream in the pool, then one predict_proba per model.
+        """
+        futs  = {i: self.pool.submit(self.collect, self.engines[i], c) for i, c in chunks_per_stream.items() if c}
+        ready = {i: f.result() for i, f in futs.items()}
+        out   = {i: [] for i in ready}
+        for idx in self.groups.values():
+            rows = [(i, e, t, F) for i in idx if i in ready for e, t, F in ready[i]]
+            if not rows:
+                continue
+            head = self.engines[idx[0]]
+            t0 = time.perf_counter()
+            P  = head.predict_proba(np.stack([F for *_, F in rows]))
+            dt_each = (time.perf_counter() - t0) / len(rows)
+            for (i, e, t, _), p in zip(rows, P):
+                self.engines[i].metrics.add("predict", dt_each)
+                out[i].append(self.engines[i].emit(p, t, e))
+        for eng in self.engines:
+            eng.metrics.maybe_export()
+        return out
+
+    # ------------------------------------------------------------------ LSL
+    def connect(self):
+        for eng in self.engines:
+            eng.connect()
+            acq = AcquisitionThread(eng.inlet, eng._pull_buf.shape[1],
+                                    capacity=int(eng.cfg.ingest_s * eng.sfreq),
+                                    max_chunk=eng.cfg.max_chunk, block_s=eng.cfg.poll_s, ready=self.ready)
+            self.acqs.append(acq)
+        for acq in self.acqs:
+            acq.start()
+
+    def _drain(self, acq):
+        chunks = []
+        while True:
+            item = acq.queue.get()
+            if item is None:
+                return chunks
+            pos, n = item
+            chunks.append((acq.data[pos:pos + n], acq.ts[pos:pos + n]))
+
+    def run(self):
+        for eng in self.engines:
+            print(f"   {eng.cfg.in_name} → {eng.cfg.out_name}: {eng.cfg.name} • {len(eng.art.channels)} ch • "
+                  f"window={eng.win_len} • step={eng.step_len} • filter={eng.cfg.filter_mode}")
+        print(f"   {len(self.groups)} model(s), {self.pool._max_workers} preprocessing worker(s)")
+        threading.Thread(target=quit_on_q, daemon=True).start()
+        for eng in self.engines:
+            eng.warmup()
+        self.connect()
+        print("\n⏳ Streaming – Ctrl-C eller q + Enter for å stoppe\n")
+        try:
+            while True:
+                self.ready.clear()
+                chunks = {i: self._drain(acq) for i, acq in enumerate(self.acqs)}
+                if not any(chunks.values()):
+                    self.ready.wait(0.5); continue
+                self.process(chunks)
+                for i, c in chunks.items():
+                    self.acqs[i].release(sum(len(x) for x, _ in c))
+        except KeyboardInterrupt:
+            print("\n🛑  stopped by user")
+        finally:
+            for acq in self.acqs:
+                acq.stop()
+        for eng in self.engines:
+            if eng.log is not None:
+                eng.log.close()
+            print(f"\n{eng.cfg.in_name}:\n{eng.metrics.summary()}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--stream", action="append", required=True, metavar="INLET=PRESET[:OUTLET]",
+                    help=f"one per headset; presets: {', '.join(PRESETS)}")
+    ap.add_argument("--workers", type=int, default=None, help="preprocessing threads (default: one per stream)")
+    ap.add_argument("--step", type=int, default=None)
+    ap.add_argument("--causal", action="store_true")
+    ap.add_argument("--incremental-cov", action="store_true")
+    ap.add_argument("--flat", action="store_true")
+    ap.add_argument("--decision", choices=["window", "evidence"], default="window")
+    ap.add_argument("--overload", choices=["off", "drop", "coalesce"], default="off")
+    ap.add_argument("--max-stale", type=float, default=0.5, metavar="S")
+    args = ap.parse_args()
+
+    over = {"verbose": False, "step_len": args.step,
+            "filter_mode": "causal" if args.causal else "zero_phase",
+            "cov_mode": "incremental" if args.incremental_cov else "batch",
+            "predictor": "flat" if args.flat else "pipeline",
+            "decision": args.decision, "overload": args.overload, "max_stale_s": args.max_stale}
+    cfgs = [replace(parse_stream(s, i, len(args.stream)), **over) for i, s in enumerate(args.stream)]
+    StreamServer(cfgs, args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
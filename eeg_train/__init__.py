@@ -0,0 +1,4 @@
+# ===============================================================
+# eeg_train – treningsdata og modellverktøy (csv_output → modeller)
+# ===============================================================
+# Modulene har egne CLI-er (python -m eeg_train.<modul>), så pakken importerer ingenting selv.
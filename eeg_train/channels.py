@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# ===============================================================
+# channels.py – rangering av kanaler + reduserte modeller (nøyaktighet vs latens)
+# ===============================================================
+"""
+Ranks the montage's channels, retrains the preset's pipeline on the best N
+for several N, and reports GroupKFold accuracy against single-window
+predict_proba latency. With --export every size that fits the latency budget
+is written as an ordinary artefact set in <art_dir>/channels_<N>:
+
+    python -m eeg_train.channels data_store --preset multiclass --sizes 32 24 16 12 8
+    python -m eeg_train.channels data_store --preset multiclass --rank backward --sizes 16 8 --export
+    python -m eeg_engine --preset multiclass --channels 16          # or CHANNELS = 16 in live_inference_*.py
+
+Rankings (both on the full-montage OAS covariances; a subset is the
+sub-block of those, so no epoch is filtered twice):
+    weights   recursive elimination on a tangent space + logistic regression probe:
+              a channel's weight is the summed |coefficient| of every tangent
+              feature (i, j) it takes part in, summed over bands; the weakest
+              one is dropped and the probe refitted (fast, one fit per channel)
+    backward  greedy backward elimination under GroupKFold: drop the channel
+              whose removal costs the least probe accuracy (slow, ~C²/2 × folds
+              fits, parallel over candidates)
+
+Each reported size is then evaluated properly: OAS covariances recomputed on
+the subset, the preset's feature stages + --head under GroupKFold
+(eeg_train.search; default svm, the deployed head, so the table only shows
+the effect of dropping channels), and the fitted raw-epoch pipeline timed like
+eeg_train.export (p50/p95 of one window, after a warm-up call). The ranking
+itself sees every epoch, so small-subset accuracies lean slightly optimistic;
+rank on one store (--out ranking.json) and evaluate on another
+(--ranking ranking.json) to avoid that.
+"""
+import json
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from .features import FeatureCache, covariances, training_epochs, FILTERS
+from .search import feature_steps, search
+from .export import HEADS, make_head, measure_latency, export_artifacts, LatencyBudgetExceeded
+
+RANKINGS = ("weights", "backward")
+
+
+# ------------------------------------------------------------- probe
+def _sub(C, idx):
+    """Covariance sub-blocks of the channels in idx: (n, bands, C, C) → (n, bands, k, k)."""
+    return C[:, :, idx][:, :, :, idx]
+
+
+def _tangent(C_tr, C_te=None):
+    """Riemann tangent space per band, reference fitted on C_tr → features (train[, test])."""
+    from pyriemann.tangentspace import TangentSpace
+    F_tr, F_te = [], []
+    for b in range(C_tr.shape[1]):
+        ts = TangentSpace(metric="riemann").fit(C_tr[:, b])
+        F_tr.append(ts.transform(C_tr[:, b]))
+        if C_te is not None:
+            F_te.append(ts.transform(C_te[:, b]))
+    return np.hstack(F_tr), (np.hstack(F_te) if C_te is not None else None)
+
+
+def _probe():
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LogisticRegression
+    return make_pipeline(StandardScaler(), LogisticRegression(C=1.0, max_iter=1000, class_weight="balanced",
+                                                              random_state=42))
+
+
+def probe_accuracy(C, y, splits, idx):
+    """Mean balanced accuracy of the probe on channels idx over the folds."""
+    from sklearn.metrics import balanced_accuracy_score
+    Cs, acc = _sub(C, idx), []
+    for tr, te in splits:
+        F_tr, F_te = _tangent(Cs[tr], Cs[te])
+        acc.append(balanced_accuracy_score(y[te], _probe().fit(F_tr, y[tr]).predict(F_te)))
+    return float(np.mean(acc))
+
+
+def channel_weights(C, y, idx):
+    """Probe fitted on every epoch → one weight per channel in idx (summed |coef| of its tangent features)."""
+    k = len(idx)
+    F, _ = _tangent(_sub(C, idx))
+    coef = np.abs(_probe().fit(F, y)[-1].coef_).sum(axis=0).reshape(C.shape[1], -1).sum(axis=0)
+    # pyriemann: upper triangle incl. diagonal, rad for rad
+    rows, cols = np.triu_indices(k)
+    w = np.zeros(k)
+    np.add.at(w, rows, coef)
+    np.add.at(w, cols, np.where(rows == cols, 0.0, coef))
+    return w
+
+
+def rank_channels(C, y, groups, method="weights", n_splits=5, n_jobs=-1, min_keep=2, verbose=True):
+    """
+    C: full-montage covariances (n, [bands,] C, C). → (channel indices best first,
+    probe accuracy after each removal or None) – the last index is the first one dropped.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import GroupKFold
+    C = C[:, np.newaxis] if C.ndim == 3 else C
+    keep, dropped, curve = list(range(C.shape[-1])), [], []
+    if method == "weights":
+        while len(keep) > min_keep:
+            w = channel_weights(C, y, keep)
+            dropped.append(keep.pop(int(np.argmin(w))))
+        return keep[::-1] + dropped[::-1], None
+    if method != "backward":
+        raise ValueError(f"unknown ranking '{method}' (known: {', '.join(RANKINGS)})")
+
+    splits = list(GroupKFold(n_splits=min(n_splits, len(np.unique(groups)))).split(C, y, groups))
+    par = Parallel(n_jobs=n_jobs)
+    while len(keep) > min_keep:
+        t0 = time.perf_counter()
+        acc = par(delayed(probe_accuracy)(C, y, splits, [c for c in keep if c != d]) for d in keep)
+        best = int(np.argmax(acc))
+        dropped.append(keep.pop(best)); curve.append(acc[best])
+        if verbose:
+            print(f"   {len(keep):3d} left • probe bal.acc {acc[best]:.3f} • {time.perf_counter() - t0:.1f}s")
+    return keep[::-1] + dropped[::-1], curve[::-1]
+
+
+# -------------------------------------------------------------- sizes
+def evaluate_size(X, y, groups, idx, cfg, head, n_splits=5, n_jobs=-1, cache=None, params=None):
+    """
+    The preset's pipeline on the channels idx: GroupKFold accuracy of the head on
+    recomputed subset covariances, then one fit on every epoch and its single-window
+    latency. → (row dict, fitted pipeline, one subset epoch)
+    """
+    fb   = cfg.preproc == "filterbank"
+    Xs   = X[:, :, idx] if fb else X[:, idx]
+    Cs   = np.asarray(covariances(Xs, groups, cache=cache, n_jobs=n_jobs, params=params))
+    feat = feature_steps("filterbank" if fb else "csp", len(cfg.bands) or 5)
+    res  = search(Cs, y, groups, feat, {head: make_head(head)}, None, n_splits, n_jobs, verbose=False)[0]
+
+    pipe = feature_steps("filterbank" if fb else "csp", len(cfg.bands) or 5, with_cov=True)
+    pipe.steps.append(("clf", make_head(head)))
+    x_one = Xs[:1].astype(np.float64)
+    pipe.fit(Xs.astype(np.float64, copy=False), y)
+    p50, p95 = measure_latency(pipe, x_one)
+    return {"n_channels": len(idx), "bal_acc": res["bal_acc"], "bal_acc_std": res["bal_acc_std"],
+            "p50_ms": p50, "p95_ms": p95}, pipe, x_one
+
+
+def print_table(rows):
+    full = rows[0]
+    print(f"\n{'channels':>8} {'bal.acc':>14} {'Δacc':>7} {'p50':>9} {'p95':>9} {'speed-up':>9}  artefacts")
+    for r in rows:
+        print(f"{r['n_channels']:8d} {r['bal_acc']:.3f} ± {r['bal_acc_std']:.3f} {r['bal_acc'] - full['bal_acc']:+7.3f} "
+              f"{r['p50_ms']:7.2f}ms {r['p95_ms']:7.2f}ms {full['p95_ms'] / r['p95_ms']:8.1f}×  {r.get('written', '')}")
+
+
+def main():
+    import argparse
+    from eeg_engine.config import PRESETS, get_config, subset_dir
+    from .store import Store, binary_label, multiclass_label
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("store")
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass")
+    ap.add_argument("--rank", choices=RANKINGS, default="weights")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[32, 24, 16, 12, 8],
+                    help="subset sizes to retrain and time (the full montage is always included)")
+    ap.add_argument("--ranking", default=None, metavar="JSON",
+                    help="reuse the ranking of an earlier --out (e.g. made on another store) instead of ranking")
+    ap.add_argument("--head", choices=HEADS, default="svm",
+                    help="classifier for every size, the full montage included (default: the deployed SVC)")
+    ap.add_argument("--filter", choices=FILTERS, default="continuous",
+                    help="where filtering happens: continuous (notebook), window (= engine), causal (= engine --causal)")
+    ap.add_argument("--splits", type=int, default=5)
+    ap.add_argument("--jobs", type=int, default=-1)
+    ap.add_argument("--cache", default="feature_cache")
+    ap.add_argument("--export", action="store_true", help="write <art-dir>/channels_<N> for every size within budget")
+    ap.add_argument("--art-dir", default=None, help="parent of the channels_<N> directories (default: the preset's)")
+    ap.add_argument("--budget-ms", type=float, default=None, help="default: EngineConfig.budget_ms")
+    ap.add_argument("--force", action="store_true", help="export even when over budget")
+    ap.add_argument("--out", default=None, help="ranking + table as JSON")
+    args = ap.parse_args()
+
+    src = get_config(args.preset)
+    cfg = get_config(args.preset, **({"art_dir": args.art_dir} if args.art_dir else {}))
+    with open(src.path(src.meta_file)) as f:
+        meta = json.load(f)
+    st = Store(args.store)
+    meta = dict(meta, sfreq=st.sfreq)
+    label_fn = binary_label if args.preset == "binary" else multiclass_label
+    fb = cfg.preproc == "filterbank"
+    n_min = 4 if fb else 6                    # CSP(nfilter=4 | 6) trenger minst så mange kanaler
+
+    t0 = time.perf_counter()
+    X, y, groups, classes = training_epochs(st, label_fn, meta, cfg, args.filter)
+    chans = list(st.channels)
+    print(f"⚙  {len(X)} epochs {X.shape[1:]} • {len(np.unique(groups))} groups • classes {classes} • "
+          f"{time.perf_counter() - t0:.1f}s")
+    cache  = FeatureCache(args.cache)
+    params = dict(meta, band=(1, 100) if fb else (1, 40), filterbank=cfg.bands if fb else None,
+                  **({"filter": args.filter} if args.filter != "continuous" else {}))
+    C = np.asarray(covariances(X, groups, cache=cache, n_jobs=args.jobs, params=params))
+
+    t0 = time.perf_counter()
+    if args.ranking:
+        with open(args.ranking) as f:
+            prev = json.load(f)
+        order, curve = [chans.index(c) for c in prev["ranking"] if c in chans], prev.get("probe_curve")
+        order += [i for i in range(len(chans)) if i not in order]
+        args.rank = f"{prev['rank']} (from {args.ranking})"
+    else:
+        order, curve = rank_channels(C, y, groups, args.rank, args.splits, args.jobs,
+                                     min_keep=min(n_min, len(chans)))
+    print(f"🏷  {args.rank} ranking in {time.perf_counter() - t0:.1f}s: {', '.join(chans[i] for i in order)}")
+
+    sizes = sorted({len(chans)} | {n for n in args.sizes if n_min <= n < len(chans)}, reverse=True)
+    skipped = [n for n in args.sizes if n < n_min or n > len(chans)]
+    if skipped:
+        print(f"   sizes {skipped} skipped (need {n_min} ≤ N ≤ {len(chans)})")
+    budget = cfg.budget_ms if args.budget_ms is None else args.budget_ms
+    rows = []
+    for n in sizes:
+        idx = sorted(order[:n])               # montasjerekkefølge, som eeg_channels*.json
+        t0 = time.perf_counter()
+        row, pipe, x_one = evaluate_size(X, y, groups, idx, cfg, args.head, args.splits, args.jobs, cache, params)
+        row["channels"] = [chans[i] for i in idx]
+        print(f"   {n:3d} ch • bal.acc {row['bal_acc']:.3f} • p95 {row['p95_ms']:.2f} ms • "
+              f"{time.perf_counter() - t0:.1f}s")
+        if args.export and n < len(chans):
+            out_cfg = replace(cfg, art_dir=subset_dir(cfg, n))
+            try:
+                export_artifacts(out_cfg, pipe, row["channels"], meta, classes, x_one, budget, args.force)
+                row["written"] = out_cfg.art_dir
+            except LatencyBudgetExceeded:
+                row["written"] = f"over budget ({budget:g} ms)"
+        rows.append(row)
+    print_table(rows)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"preset": args.preset, "rank": args.rank, "head": args.head,
+                       "ranking": [chans[i] for i in order], "probe_curve": curve, "sizes": rows}, f, indent=2)
+        print(f"💾 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
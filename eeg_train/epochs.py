@@ -0,0 +1,105 @@
+# ===============================================================
+# epochs.py – vektorisert epoking per opptak (strided views)
+# ===============================================================
+"""
+Replaces the per-epoch Python loop of Block 4:
+
+    from eeg_train.store import Store, multiclass_label
+    from eeg_train.epochs import epoch_store
+    X, y, groups, classes = epoch_store(Store("data_store"), multiclass_label, meta)
+
+Windows never straddle two recordings. Like the notebook, samples without a
+class label are dropped before epoching (per recording); window, step and
+baseline come from preproc_meta, so overlapping windows are just a smaller
+step_len. Majority labels tie-break to the first class in sorted order, the
+same as pd.Series.mode()[0].
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from eeg_engine.preprocess import baseline_correct        # samme baseline som live
+
+
+def window_params(meta, baseline_s=0.5):
+    """preproc_meta → (window_len, step_len, n_baseline)."""
+    win = int(meta["window_len"])
+    return win, int(meta.get("step_len") or win), int(baseline_s * meta["sfreq"])
+
+
+def n_windows(n_samples, win, step):
+    return max(0, (n_samples - win) // step + 1)
+
+
+def epoch_views(x, win, step):
+    """(n_samples, n_ch) → (n_windows, n_ch, win) strided view, no copy."""
+    return sliding_window_view(x, win, axis=0)[::step]
+
+
+def majority_labels(y, win, step, n_classes):
+    """
+    Majority class per window from integer labels (n_samples,), via cumulative
+    per-class counts. -1 (unlabelled) lands in an extra column that never
+    wins; windows with no labelled sample at all get -1.
+    """
+    cum = np.zeros((len(y) + 1, n_classes + 1), np.int32)
+    np.cumsum(np.eye(n_classes + 1, dtype=np.int32)[y], axis=0, out=cum[1:])
+    starts = np.arange(n_windows(len(y), win, step)) * step
+    counts = (cum[starts + win] - cum[starts])[:, :n_classes]
+    return np.where(counts.any(axis=1), counts.argmax(axis=1), -1)
+
+
+def _recording(store, i, label_fn, classes, preprocess, channels, drop_unlabeled):
+    x = store.eeg(i, channels)
+    y, classes = store.labels(i, label_fn, classes)
+    if drop_unlabeled and (y < 0).any():
+        keep = y >= 0
+        x, y = x[keep], y[keep]
+    if preprocess is not None:
+        x = preprocess(x)
+    return x, y.astype(np.intp), classes
+
+
+def iter_epochs(store, label_fn, meta, preprocess=None, epoch_fn=None, channels=None,
+                batch=256, dtype=np.float32, drop_unlabeled=True, baseline_s=0.5):
+    """
+    Generator for out-of-core use: yields (X (≤batch, n_ch, win), y, group)
+    one recording at a time. `preprocess` runs on the continuous recording
+    (n_samples, n_ch), `epoch_fn` on every baseline-corrected batch (e.g. the
+    filterbank).
+    """
+    win, step, n_base = window_params(meta, baseline_s)
+    classes = None
+    for i, r in enumerate(store.recordings):
+        x, y, classes = _recording(store, i, label_fn, classes, preprocess, channels, drop_unlabeled)
+        V  = epoch_views(x, win, step)
+        yw = majority_labels(y, win, step, len(classes))
+        group = f"{r['person']}__{r['recording']}"
+        for s in range(0, len(V), batch):
+            X = baseline_correct(V[s:s + batch], n_base).astype(dtype, copy=False)
+            yield (epoch_fn(X) if epoch_fn else X), yw[s:s + batch], group
+
+
+def epoch_store(store, label_fn, meta, preprocess=None, channels=None, dtype=np.float32,
+                drop_unlabeled=True, baseline_s=0.5, n_rows=None):
+    """
+    All windows of all recordings → (X (n, n_rows, win), y int, groups, classes).
+    Window counts come from the labels alone, so X is allocated once and then
+    filled recording by recording (only one recording is in memory at a time).
+    n_rows is what `preprocess` returns per sample (default n_ch; bands × n_ch
+    for the causal filterbank).
+    """
+    win, step, n_base = window_params(meta, baseline_s)
+    counts = []
+    for i in range(len(store)):
+        y, classes = store.labels(i, label_fn)
+        counts.append(n_windows(int((y >= 0).sum()) if drop_unlabeled else len(y), win, step))
+    n_ch = n_rows or len(channels or store.channels)
+    X = np.empty((sum(counts), n_ch, win), dtype)
+    y_all, groups, o = np.empty(sum(counts), np.intp), [], 0
+    for i, (k, r) in enumerate(zip(counts, store.recordings)):
+        x, y, _ = _recording(store, i, label_fn, classes, preprocess, channels, drop_unlabeled)
+        baseline_correct(epoch_views(x, win, step), n_base, out=X[o:o + k])
+        y_all[o:o + k] = majority_labels(y, win, step, len(classes))
+        groups += [f"{r['person']}__{r['recording']}"] * k
+        o += k
+    return X, y_all, np.array(groups), classes
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# ===============================================================
+# export.py – tren + eksporter artefakter med latensbudsjett
+# ===============================================================
+"""
+Fits the preset's pipeline on a store and writes the artefact set the engine
+loads (pipeline, channels, preproc_meta, classes) – but only if one window
+through `predict_proba` stays within the latency budget:
+
+    python -m eeg_train.export data_store --preset multiclass                    # deployed SVC head
+    python -m eeg_train.export data_store --preset multiclass --head linear --art-dir exports/multiclass_linear
+    python -m eeg_train.export data_store --preset multiclass --head nystroem --art-dir exports/multiclass_nystroem
+    python -m eeg_train.export data_store --preset multiclass --scales 1 2 4     # eeg_engine.multiscale
+
+Heads for the tangent-space features:
+    svm       RBF SVC with Platt probabilities (default: the deployed notebook model; cost grows
+              with #support vectors)
+    linear    multinomial logistic regression – calibrated by construction, one matrix-vector product
+    nystroem  RBF approximated with a fixed number of landmarks + logistic regression
+
+The budget (EngineConfig.budget_ms, or --budget-ms) is checked on the p95 of
+single-window predict_proba calls on a real training epoch, single-threaded,
+as in the engine. Over budget → LatencyBudgetExceeded and nothing is written.
+Without --art-dir the preset's own artefacts are replaced, so try the fast
+heads in a directory of their own.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+HEADS = ("svm", "linear", "nystroem")
+
+
+class LatencyBudgetExceeded(RuntimeError):
+    pass
+
+
+def make_head(kind, n_components=200):
+    """Classifier head by name, with class weights balanced like the deployed SVC."""
+    from sklearn.svm import SVC
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.pipeline import make_pipeline
+    logreg = LogisticRegression(C=1.0, max_iter=1000, class_weight="balanced", random_state=42)
+    if kind == "svm":
+        return SVC(kernel="rbf", C=1.0, gamma="scale", probability=True, class_weight="balanced", random_state=42)
+    if kind == "linear":
+        return logreg
+    if kind == "nystroem":
+        return make_pipeline(Nystroem(kernel="rbf", n_components=n_components, random_state=42), logreg)
+    raise ValueError(f"unknown head '{kind}' (known: {', '.join(HEADS)})")
+
+
+def measure_latency(pipe, x_one, reps=100):
+    """predict_proba on one model input (1, …) → (p50, p95) in ms, after one warm-up call."""
+    pipe.predict_proba(x_one)
+    t = np.empty(reps)
+    for i in range(reps):
+        t0 = time.perf_counter(); pipe.predict_proba(x_one); t[i] = time.perf_counter() - t0
+    return float(np.percentile(t, 50) * 1e3), float(np.percentile(t, 95) * 1e3)
+
+
+def export_artifacts(cfg, pipe, channels, meta, classes, x_one, budget_ms=None, force=False):
+    """
+    Gate + write. `x_one` is one model input as the engine passes it
+    ((1, ch, T) or (1, bands, ch, T)). Returns (p50, p95) ms; raises
+    LatencyBudgetExceeded (writing nothing) when p95 > budget and not force.
+    """
+    import joblib
+    budget = cfg.budget_ms if budget_ms is None else budget_ms
+    p50, p95 = measure_latency(pipe, x_one)
+    if p95 > budget and not force:
+        raise LatencyBudgetExceeded(f"predict_proba p95 {p95:.2f} ms > budget {budget:.2f} ms "
+                                    f"(p50 {p50:.2f} ms) – {cfg.pipeline_file} not written")
+    if cfg.preproc == "filterbank":
+        meta = dict(meta, fb_design="sos")     # trent med SOS-filterbanken (eeg_engine.filters)
+    os.makedirs(cfg.art_dir, exist_ok=True)
+    tmp = cfg.path(cfg.pipeline_file) + ".tmp"
+    joblib.dump(pipe, tmp)
+    os.replace(tmp, cfg.path(cfg.pipeline_file))
+    with open(cfg.path(cfg.channels_file), "w") as f:
+        json.dump(list(channels), f)
+    with open(cfg.path(cfg.meta_file), "w") as f:
+        json.dump(meta, f, indent=2)
+    np.save(cfg.path(cfg.classes_file), np.asarray(classes))
+    return p50, p95
+
+
+def main():
+    import argparse
+    from eeg_engine.config import PRESETS, get_config
+    from .store import Store, binary_label, multiclass_label
+    from .features import FILTERS, training_epochs
+    from .search import feature_steps
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("store")
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass")
+    ap.add_argument("--head", choices=HEADS, default="svm",
+                    help="classifier head (default: svm, as deployed); linear/nystroem are the fast options")
+    ap.add_argument("--components", type=int, default=200, help="landmarks of the nystroem head")
+    ap.add_argument("--art-dir", default=None, help="output directory (default: the preset's)")
+    ap.add_argument("--meta", default=None, help="preproc_meta to train with (default: the preset's)")
+    ap.add_argument("--budget-ms", type=float, default=None, help="default: EngineConfig.budget_ms")
+    ap.add_argument("--force", action="store_true", help="write even when over budget")
+    ap.add_argument("--filter", choices=FILTERS, default="continuous",
+                    help="where filtering happens: continuous (notebook), window (= engine), causal (= engine --causal)")
+    ap.add_argument("--scales", type=float, nargs="+", default=None, metavar="S",
+                    help="one model per window length in s, into <art-dir>/scale_<S>s; "
+                         "the latency budget is split evenly between them")
+    args = ap.parse_args()
+
+    src = get_config(args.preset)
+    cfg = get_config(args.preset, **({"art_dir": args.art_dir} if args.art_dir else {}))
+    with open(args.meta or src.path(src.meta_file)) as f:
+        meta = json.load(f)
+    st = Store(args.store)
+    meta = dict(meta, sfreq=st.sfreq)
+    label_fn = binary_label if args.preset == "binary" else multiclass_label
+    budget = cfg.budget_ms if args.budget_ms is None else args.budget_ms
+
+    # én modell per vinduslengde, hver i sin egen mappe (eeg_engine.multiscale)
+    targets = [(cfg, meta)]
+    if args.scales:
+        from dataclasses import replace
+        from eeg_engine.multiscale import scale_dir
+        budget /= len(args.scales)
+        targets = []
+        for sec in args.scales:
+            win = int(round(sec * st.sfreq))
+            targets.append((replace(cfg, art_dir=scale_dir(cfg, sec)),
+                            dict(meta, window_len=win, step_len=min(int(meta.get("step_len") or win), win))))
+
+    fb = cfg.preproc == "filterbank"
+    for out_cfg, out_meta in targets:
+        t0 = time.perf_counter()
+        X, y, groups, classes = training_epochs(st, label_fn, out_meta, cfg, args.filter)
+        X = X.astype(np.float64, copy=False)
+        print(f"⚙  {len(X)} epochs {X.shape[1:]} • classes {classes} • {time.perf_counter() - t0:.1f}s")
+
+        pipe = feature_steps("filterbank" if fb else "csp", len(cfg.bands) or 5, with_cov=True)
+        pipe.steps.append(("clf", make_head(args.head, args.components)))
+        t0 = time.perf_counter()
+        pipe.fit(X, y)
+        print(f"   fit {args.head} in {time.perf_counter() - t0:.1f}s")
+
+        try:
+            p50, p95 = export_artifacts(out_cfg, pipe, st.channels, out_meta, classes, X[:1],
+                                        budget_ms=budget, force=args.force)
+        except LatencyBudgetExceeded as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        print(f"✅ predict_proba p50 {p50:.2f} ms • p95 {p95:.2f} ms → {out_cfg.path(out_cfg.pipeline_file)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# ===============================================================
+# features.py – disk-cache for kovarianser/tangentvektorer + prosesspool
+# ===============================================================
+"""
+Covariances are the expensive, label-free part of every Riemann pipeline in
+the notebook, and each entry of the `pipelines` dict recomputes them. Here
+they are computed once per (epoch data, preprocessing, estimator), in a
+process pool over recordings, and stored on disk; the rest of each pipeline
+(CovTransport → TangentSpace → scaler → selection) runs with sklearn's
+Pipeline(memory=...) so fitted feature stages are reused too. Changing only
+the classifier head then does no feature work.
+
+    from eeg_train.features import FeatureCache, covariances, from_covariances
+    cache = FeatureCache("feature_cache")
+    C = covariances(X, groups, cache=cache, params=meta)            # (n, C, C) or (n, bands, C, C)
+    pipe = from_covariances(pipelines["SVM (RBF)"], cache.memory)   # same pipeline minus Covariances
+    pipe.fit(C[tr], y[tr])
+
+    python -m eeg_train.features data_store --preset multiclass     # fill the cache for a store
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+# ---------------------------------------------------------------- keys
+def fingerprint(X, block=1 << 24):
+    """Content hash of an array (shape, dtype, bytes), read in blocks so memmaps are not loaded whole."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{X.shape}{X.dtype.str}".encode())
+    flat = X.reshape(-1) if X.flags.c_contiguous else np.ascontiguousarray(X).reshape(-1)
+    step = max(1, block // X.itemsize)
+    for s in range(0, flat.size, step):
+        h.update(memoryview(np.ascontiguousarray(flat[s:s + step])).cast("B"))
+    return h.hexdigest()
+
+
+def cache_key(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update((p if isinstance(p, str) else json.dumps(p, sort_keys=True, default=str)).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """Directory of <key>.npy files (opened memory-mapped) plus a joblib.Memory for fitted pipeline stages."""
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._memory = None
+
+    @property
+    def memory(self):
+        if self._memory is None:
+            from joblib import Memory
+            self._memory = Memory(os.path.join(self.root, "pipeline"), verbose=0)
+        return self._memory
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.npy")
+
+    def load(self, key):
+        p = self.path(key)
+        return np.load(p, mmap_mode="r") if os.path.exists(p) else None
+
+    def save(self, key, arr):
+        tmp = self.path(key) + ".tmp.npy"
+        np.save(tmp, arr)
+        os.replace(tmp, self.path(key))
+
+    def get(self, key, compute):
+        arr = self.load(key)
+        if arr is None:
+            self.save(key, compute())
+            arr = self.load(key)
+        return arr
+
+
+# ---------------------------------------------------------- covariances
+def _cov_chunk(X, estimator):
+    from pyriemann.estimation import Covariances
+    lead = X.shape[:-2]
+    C = Covariances(estimator=estimator).transform(X.reshape(-1, *X.shape[-2:]))
+    return C.reshape(*lead, *C.shape[-2:])
+
+
+def _group_slices(groups, n):
+    """Contiguous runs of equal group ids (epoch_store output is ordered by recording)."""
+    if groups is None:
+        return [slice(0, n)]
+    groups = np.asarray(groups)
+    cut = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+    edges = np.concatenate(([0], cut, [n]))
+    return [slice(a, b) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def covariances(X, groups=None, estimator="oas", n_jobs=-1, cache=None, params=None):
+    """
+    (n, C, T) or (n, bands, C, T) epochs → (n, [bands,] C, C) covariances,
+    one job per recording in a process pool (joblib/loky memory-maps X to the
+    workers instead of pickling it). With `cache`, the result is keyed by the
+    epoch data, `params` (e.g. preproc_meta + filter settings) and the
+    estimator, and returned memory-mapped on a hit.
+    """
+    def compute():
+        from joblib import Parallel, delayed
+        parts = Parallel(n_jobs=n_jobs)(delayed(_cov_chunk)(X[s], estimator)
+                                        for s in _group_slices(groups, len(X)))
+        return np.concatenate(parts)
+    if cache is None:
+        return compute()
+    return cache.get(cache_key("covariances", fingerprint(X), estimator, params or {}), compute)
+
+
+# ------------------------------------------------------------ pipelines
+def from_covariances(pipe, memory=None):
+    """
+    Copy of a notebook pipeline without its Covariances step(s), to be fed
+    covariances() output. Filterbank FeatureUnion branches keep their
+    BandSelector, which picks the band from (n, bands, C, C) just as from
+    (n, bands, C, T). `memory` caches the fitted transformer stages.
+    """
+    from sklearn.base import clone
+    from sklearn.pipeline import FeatureUnion, Pipeline
+
+    def strip(p):
+        steps = [(n, s) for n, s in p.steps if type(s).__name__ != "Covariances"]
+        return [(n, FeatureUnion([(bn, Pipeline(strip(b))) for bn, b in s.transformer_list])
+                 if isinstance(s, FeatureUnion) else s) for n, s in steps]
+
+    return Pipeline(strip(clone(pipe)), memory=memory)
+
+
+def bandpass_continuous(sfreq, band=(1, 40), notch=50.0, mode="zero_phase"):
+    """
+    Block 2 of the notebook: notch + band-pass over a whole recording
+    (n_samples, n_ch), zero-phase. mode="causal" is the live --causal filter
+    instead (eeg_engine.preprocess.filter_continuous).
+    """
+    from eeg_engine.preprocess import filter_continuous
+    def run(x):
+        return filter_continuous(x, sfreq, band, notch, mode=mode)
+    return run
+
+
+# Hvor filteret sitter i treningen – velg det som matcher live-modusen modellen skal kjøre i:
+#   continuous  notebook: hele opptaket filtreres, så epokes (default)
+#   window      epoker av rå data, filtfilt per vindu – nøyaktig engine uten --causal
+#   causal      kausalt filter over hele opptaket – nøyaktig engine med --causal
+FILTERS = ("continuous", "window", "causal")
+
+
+def training_epochs(store, label_fn, meta, cfg, filter="continuous", block=256):
+    """
+    Store → (X, y, groups, classes) for the preset `cfg`, filtered at the
+    place `filter` says. X is (n, ch, T) or (n, bands, ch, T) for the filterbank.
+    """
+    from eeg_engine.preprocess import WindowPreproc
+    from eeg_engine.filters import FilterBank
+    from .epochs import epoch_store
+    from .search import filterbank_epochs
+    if filter not in FILTERS:
+        raise ValueError(f"unknown filter placement '{filter}' (known: {', '.join(FILTERS)})")
+    sfreq = store.sfreq
+    fb    = cfg.preproc == "filterbank"
+    band  = (1, 100) if fb else (1, 40)
+    if filter == "causal" and fb:
+        # som live --causal: kausalt bredbånd 1–100 Hz, så hvert bånd på det kontinuerlige signalet
+        # (rader bånd-major, som i ringbufferen), baseline per rad, så (n, bands, ch, T)
+        from eeg_engine.preprocess import filter_continuous
+        n_b, n_ch = len(cfg.bands), len(store.channels)
+        X, y, groups, classes = epoch_store(
+            store, label_fn, meta, n_rows=n_b * n_ch,
+            preprocess=lambda x: filter_continuous(x, sfreq, band, mode="causal", bands=cfg.bands))
+        return X.reshape(len(X), n_b, n_ch, X.shape[-1]), y, groups, classes
+    pre = None if filter == "window" else bandpass_continuous(sfreq, band,
+                                                               mode="causal" if filter == "causal" else "zero_phase")
+    X, y, groups, classes = epoch_store(store, label_fn, meta, preprocess=pre)
+    if filter == "window":
+        if fb:
+            f = FilterBank(sfreq, X.shape[1], X.shape[2], cfg.bands)
+            return f.batch(X, out=np.empty((len(X), len(cfg.bands), *X.shape[1:]), X.dtype)), y, groups, classes
+        wp = WindowPreproc(sfreq)
+        for s in range(0, len(X), block):
+            X[s:s + block] = wp.batch(X[s:s + block].astype(np.float64))
+    elif fb:
+        X = filterbank_epochs(X, sfreq, cfg.bands)
+    return X, y, groups, classes
+
+
+def main():
+    import argparse
+    import time
+    from eeg_engine.config import PRESETS, get_config
+    from .store import Store, binary_label, multiclass_label
+    from .epochs import epoch_store
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("store")
+    ap.add_argument("--preset", choices=[p for p in PRESETS if PRESETS[p].preproc == "bandpass"],
+                    default="multiclass", help="preproc_meta to epoch with (notch + 1–40 Hz chain)")
+    ap.add_argument("--step", type=int, default=None, help="override step_len (overlapping windows)")
+    ap.add_argument("--cache", default="feature_cache")
+    ap.add_argument("--jobs", type=int, default=-1)
+    args = ap.parse_args()
+
+    cfg = get_config(args.preset)
+    with open(cfg.path(cfg.meta_file)) as f:
+        meta = json.load(f)
+    if args.step:
+        meta["step_len"] = args.step
+    st = Store(args.store)
+    t0 = time.perf_counter()
+    X, y, groups, classes = epoch_store(st, binary_label if args.preset == "binary" else multiclass_label, meta,
+                                        preprocess=bandpass_continuous(st.sfreq))
+    print(f"   epochs {X.shape} in {time.perf_counter() - t0:.2f}s")
+    cache = FeatureCache(args.cache)
+    params = dict(meta, filter="notch50+bp1-40")
+    for run in ("first", "second"):
+        t0 = time.perf_counter()
+        C = covariances(X, groups, cache=cache, params=params, n_jobs=args.jobs)
+        print(f"   covariances ({run} call) {C.shape} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# ===============================================================
+# search.py – parallell GroupKFold-modellsøk med delt forberegning
+# ===============================================================
+"""
+Compares the notebook's classifier heads with GroupKFold over the
+Person__Recording groups, using every core:
+
+    python -m eeg_train.search data_store --preset multiclass --splits 5
+    python -m eeg_train.search data_store --preset multiclass_new --models "SVM (RBF)" LDA --out results.csv
+
+Work is shared wherever the models agree:
+  * covariances: label-free and per epoch → once for all folds (eeg_train.features, disk cache);
+  * the feature stages (CSP/CovTransport/TangentSpace/scaler/SelectKBest) are the same for
+    every head → fitted once per fold, in parallel over folds;
+  * fold × head jobs then only fit the classifier, in parallel.
+
+The table has balanced accuracy over the folds and the measured latency of one window at
+inference (covariance + feature stages + head), single-threaded, after the search.
+"""
+import json
+import time
+
+import numpy as np
+
+from .features import FeatureCache, covariances, training_epochs, FILTERS
+
+
+# -------------------------------------------------------------- models
+def feature_steps(kind, n_bands=5, with_cov=False):
+    """
+    Shared stages between Covariances and the classifier, as in the saved
+    pipelines. with_cov=True puts Covariances('oas') in front (in every band
+    branch for the filterbank), i.e. the full raw-epoch pipeline minus the head.
+    """
+    from sklearn.pipeline import Pipeline, FeatureUnion
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.feature_selection import SelectKBest, mutual_info_classif
+    from pyriemann.spatialfilters import CSP
+    from pyriemann.tangentspace import TangentSpace
+    from pyriemann.estimation import Covariances
+    from old.model_utils import CovTransport, BandSelector
+    cov = [("cov", Covariances(estimator="oas"))] if with_cov else []
+    if kind == "csp":                   # multiclass_riemann_pipeline
+        return Pipeline(cov + [("csp", CSP(nfilter=6, log=False)), ("align", CovTransport()),
+                               ("ts", TangentSpace(metric="riemann")), ("scaler", StandardScaler()),
+                               ("fs", SelectKBest(mutual_info_classif, k="all"))])
+    if kind == "plain":                 # first notebook comparison (no CSP)
+        return Pipeline(cov + [("align", CovTransport()), ("ts", TangentSpace(metric="riemann")),
+                               ("scaler", StandardScaler()), ("fs", SelectKBest(mutual_info_classif, k=50))])
+    if kind == "filterbank":            # filterbank_multiclass_new_pipeline
+        branches = [(f"band{i}", Pipeline([("sel", BandSelector(i))] + cov +
+                                          [("csp", CSP(nfilter=4, log=False)), ("align", CovTransport()),
+                                           ("ts", TangentSpace(metric="riemann"))]))
+                    for i in range(n_bands)]
+        return Pipeline([("union", FeatureUnion(branches)), ("scaler", StandardScaler()),
+                         ("fs", SelectKBest(mutual_info_classif, k=50))])
+    raise ValueError(f"unknown feature set '{kind}'")
+
+
+def heads(n_components=200):
+    """
+    The notebook's `pipelines` dict, classifier part only, plus a budgeted
+    RBF head: a Nyström map onto `n_components` landmarks + multinomial
+    logistic regression, so predict_proba cost no longer grows with the
+    number of support vectors (and needs no internal Platt CV at fit time).
+    """
+    from sklearn.svm import SVC
+    from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.pipeline import make_pipeline
+    return {
+        "SVM (RBF)":        SVC(kernel="rbf", C=1.0, gamma="scale", probability=True,
+                                class_weight="balanced", random_state=42),
+        "LDA":              LinearDiscriminantAnalysis(solver="lsqr", shrinkage="auto"),
+        "LogReg":           LogisticRegression(C=1.0, max_iter=1000, random_state=42),
+        "RBF-Nystroem":     make_pipeline(Nystroem(kernel="rbf", n_components=n_components, random_state=42),
+                                          LogisticRegression(C=1.0, max_iter=1000, class_weight="balanced",
+                                                             random_state=42)),
+        "kNN (k=5)":        KNeighborsClassifier(n_neighbors=5),
+        "RandomForest":     RandomForestClassifier(n_estimators=100, class_weight="balanced", random_state=42),
+        "GradientBoosting": GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, random_state=42),
+        "MLP (100)":        MLPClassifier(hidden_layer_sizes=(100,), max_iter=300, early_stopping=True,
+                                          random_state=42),
+    }
+
+
+def cov_heads():
+    """Heads that work on the covariances directly (no shared feature stages)."""
+    from pyriemann.classification import MDM
+    return {"MDM (Riemann)": MDM(metric="riemann")}
+
+
+# ---------------------------------------------------------------- jobs
+def _fold_features(feat, C, y, tr, te):
+    from sklearn.base import clone
+    f = clone(feat)
+    F_tr = f.fit_transform(C[tr], y[tr])
+    return f, F_tr, f.transform(C[te])
+
+
+def _fit_head(est, A_tr, y_tr, A_te, y_te):
+    from sklearn.base import clone
+    from sklearn.metrics import balanced_accuracy_score
+    t0 = time.perf_counter()
+    m  = clone(est).fit(A_tr, y_tr)
+    fit_s = time.perf_counter() - t0
+    return m, balanced_accuracy_score(y_te, m.predict(A_te)), fit_s
+
+
+def _latency_ms(fn, reps=50):
+    fn()
+    t = np.empty(reps)
+    for i in range(reps):
+        t0 = time.perf_counter(); fn(); t[i] = time.perf_counter() - t0
+    return float(np.median(t) * 1e3)
+
+
+def search(C, y, groups, feat, models, cov_models=None, n_splits=5, n_jobs=-1, X_one=None, verbose=True):
+    """
+    C: covariances (n, [bands,] ch, ch); feat: shared feature Pipeline; models / cov_models:
+    {name: estimator} on features / on covariances. X_one: one raw epoch, to time the
+    covariance step. → list of result rows (dicts), best first.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import GroupKFold
+    cov_models = cov_models or {}
+    n_splits = min(n_splits, len(np.unique(groups)))
+    splits = list(GroupKFold(n_splits=n_splits).split(C, y, groups))
+    par = Parallel(n_jobs=n_jobs)
+
+    t0 = time.perf_counter()
+    folds = par(delayed(_fold_features)(feat, C, y, tr, te) for tr, te in splits)
+    if verbose:
+        print(f"   feature stages: {n_splits} folds in {time.perf_counter() - t0:.1f}s")
+
+    jobs = [(name, k) for name in models for k in range(n_splits)] + \
+           [(name, k) for name in cov_models for k in range(n_splits)]
+    t0 = time.perf_counter()
+    out = par(delayed(_fit_head)(models[name], folds[k][1], y[splits[k][0]], folds[k][2], y[splits[k][1]])
+              if name in models else
+              delayed(_fit_head)(cov_models[name], C[splits[k][0]], y[splits[k][0]], C[splits[k][1]], y[splits[k][1]])
+              for name, k in jobs)
+    if verbose:
+        print(f"   {len(jobs)} fold × model fits in {time.perf_counter() - t0:.1f}s")
+
+    # latens måles etterpå, én tråd, én vindu – som live
+    cov_ms = 0.0
+    if X_one is not None:
+        from .features import _cov_chunk
+        cov_ms = _latency_ms(lambda: _cov_chunk(X_one[np.newaxis], "oas"))
+    feat0, c1 = folds[0][0], C[splits[0][1][:1]]
+    feat_ms = _latency_ms(lambda: feat0.transform(c1))
+    f1 = folds[0][2][:1]
+
+    rows = []
+    for name in list(models) + list(cov_models):
+        res = [r for (n, _), r in zip(jobs, out) if n == name]
+        m0  = res[0][0]
+        one = f1 if name in models else c1
+        pred = m0.predict_proba if hasattr(m0, "predict_proba") else m0.predict
+        head_ms = _latency_ms(lambda: pred(one))
+        acc = np.array([r[1] for r in res])
+        rows.append({"model": name, "bal_acc": float(acc.mean()), "bal_acc_std": float(acc.std()),
+                     "fit_s": float(np.mean([r[2] for r in res])),
+                     "head_ms": head_ms,
+                     "latency_ms": cov_ms + (feat_ms if name in models else 0.0) + head_ms})
+    return sorted(rows, key=lambda r: -r["bal_acc"])
+
+
+def print_table(rows):
+    print(f"\n{'model':<18} {'bal.acc':>14} {'fit/fold':>9} {'head':>9} {'latency':>9}")
+    for r in rows:
+        print(f"{r['model']:<18} {r['bal_acc']:.3f} ± {r['bal_acc_std']:.3f} {r['fit_s']:8.2f}s "
+              f"{r['head_ms']:7.2f}ms {r['latency_ms']:7.2f}ms")
+
+
+# ---------------------------------------------------------------- data
+def filterbank_epochs(X, sfreq, bands):
+    """Baseline-corrected broadband epochs (n, ch, T) → (n, bands, ch, T), as the notebook's filterbank block."""
+    from eeg_engine.filters import FilterBank
+    fb = FilterBank(sfreq, X.shape[1], X.shape[2], bands)
+    return fb.batch(X, out=np.empty((len(X), len(bands), X.shape[1], X.shape[2]), X.dtype), broadband=False)
+
+
+def main():
+    import argparse
+    from eeg_engine.config import PRESETS, get_config
+    from .store import Store, binary_label, multiclass_label
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("store")
+    ap.add_argument("--preset", choices=list(PRESETS), default="multiclass",
+                    help="preproc_meta and feature stages of this artefact set")
+    ap.add_argument("--features", choices=["csp", "plain", "filterbank"], default=None,
+                    help="default: csp for bandpass presets, filterbank for multiclass_new")
+    ap.add_argument("--models", nargs="+", default=None, help="subset of the heads (default: all)")
+    ap.add_argument("--step", type=int, default=None, help="override step_len (overlapping windows)")
+    ap.add_argument("--filter", choices=FILTERS, default="continuous",
+                    help="where filtering happens: continuous (notebook), window (= engine), causal (= engine --causal)")
+    ap.add_argument("--splits", type=int, default=5)
+    ap.add_argument("--jobs", type=int, default=-1)
+    ap.add_argument("--cache", default="feature_cache")
+    ap.add_argument("--out", default=None, help="results as CSV")
+    args = ap.parse_args()
+
+    cfg = get_config(args.preset)
+    with open(cfg.path(cfg.meta_file)) as f:
+        meta = json.load(f)
+    if args.step:
+        meta["step_len"] = args.step
+    fb   = cfg.preproc == "filterbank"
+    kind = args.features or ("filterbank" if fb else "csp")
+    st   = Store(args.store)
+    label_fn = binary_label if args.preset == "binary" else multiclass_label
+
+    t0 = time.perf_counter()
+    band = (1, 100) if fb else (1, 40)
+    X, y, groups, classes = training_epochs(st, label_fn, meta, cfg, args.filter)
+    print(f"⚙  {len(X)} epochs {X.shape[1:]} • {len(np.unique(groups))} groups • "
+          f"classes {classes} • {time.perf_counter() - t0:.1f}s")
+    C = np.asarray(covariances(X, groups, cache=FeatureCache(args.cache), n_jobs=args.jobs,
+                               params=dict(meta, band=band, filterbank=cfg.bands if fb else None,
+                                           **({"filter": args.filter} if args.filter != "continuous" else {}))))
+
+    models = heads()
+    cmods  = {} if fb else cov_heads()
+    if args.models:
+        models = {k: v for k, v in models.items() if k in args.models}
+        cmods  = {k: v for k, v in cmods.items() if k in args.models}
+    rows = search(C, y, groups, feature_steps(kind, len(cfg.bands) or 5), models, cmods,
+                  args.splits, args.jobs, X_one=np.asarray(X[0], np.float64))
+    print_table(rows)
+    if args.out:
+        import csv
+        with open(args.out, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader(); w.writerows(rows)
+        print(f"💾 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
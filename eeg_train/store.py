@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# ===============================================================
+# store.py – kolonnevis, minnemappet treningsdata (én mappe per opptak)
+# ===============================================================
+"""
+Converts csv_output/*.csv once into a directory of float32 .npy arrays that
+training code memory-maps instead of read_csv + concat every session.
+
+    python -m eeg_train.store convert csv_output data_store
+    python -m eeg_train.store info data_store
+
+Layout:
+
+    data_store/manifest.json            channels, sfreq, annotation vocabulary, recordings
+    data_store/P5_R4/eeg.npy            (n_samples, n_ch) float32, C order
+    data_store/P5_R4/time.npy           (n_samples,) float64
+    data_store/P5_R4/annotation.npy     (n_samples,) int16 → manifest["annotations"]
+
+Annotations are stored upper-cased and stripped (as Block 1 does). Class
+labels are derived from the small annotation vocabulary, not per sample:
+`store.labels(i, multiclass_label)`.
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+VERSION   = 1
+META_COLS = ("Person", "Recording", "time", "annotation")
+
+
+def eeg_columns(columns):
+    """Notebook rule: everything except metadata, without AUX/DIR channels."""
+    return [c for c in columns if c not in META_COLS and "AUX" not in c.upper() and "DIR" not in c.upper()]
+
+
+def binary_label(ann):
+    if "IMAGERY" in ann: return "IMAGERY"
+    if "REST"    in ann: return "REST"
+    return None
+
+
+def multiclass_label(ann):
+    if "MOVE"    in ann: return "MOVE"
+    if "IMAGERY" in ann: return "IMAGERY"
+    if "REST"    in ann: return "REST"
+    return None
+
+
+# ------------------------------------------------------------------ convert
+def _rec_id(path, df):
+    if "Person" in df and "Recording" in df:
+        return int(df["Person"].iloc[0]), int(df["Recording"].iloc[0])
+    m = re.search(r"Person(\d+)Recording(\d+)", os.path.basename(path))
+    return (int(m.group(1)), int(m.group(2))) if m else (None, None)
+
+
+def convert(csv_dir, out_dir, channels=None, verbose=True):
+    """csv_output directory → store directory; returns the manifest."""
+    import pandas as pd
+    files = sorted(os.path.join(csv_dir, f) for f in os.listdir(csv_dir) if f.endswith(".csv"))
+    if not files:
+        raise FileNotFoundError(f"no .csv files in {csv_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+    if channels is None:
+        channels = eeg_columns(pd.read_csv(files[0], nrows=0).columns)
+    vocab, recs, sfreq = {"": 0}, [], None
+
+    for path in files:
+        df = pd.read_csv(path, dtype={c: np.float32 for c in channels}, low_memory=False)
+        person, rec = _rec_id(path, df)
+        ann = df["annotation"].fillna("").astype(str).str.upper().str.strip() if "annotation" in df \
+              else pd.Series([""] * len(df))
+        codes = np.array([vocab.setdefault(a, len(vocab)) for a in ann.unique()], np.int16)
+        ann_codes = codes[pd.Categorical(ann, categories=ann.unique()).codes]
+        t = df["time"].to_numpy(np.float64)
+        fs = float(round(1.0 / np.median(np.diff(t[:1000]))))
+        if sfreq is None:
+            sfreq = fs
+        elif fs != sfreq:
+            raise ValueError(f"{path}: sfreq {fs} differs from {sfreq}")
+
+        name = f"P{person}_R{rec}" if person is not None else os.path.splitext(os.path.basename(path))[0]
+        d = os.path.join(out_dir, name)
+        os.makedirs(d, exist_ok=True)
+        np.save(os.path.join(d, "eeg.npy"), np.ascontiguousarray(df[channels].to_numpy(np.float32)))
+        np.save(os.path.join(d, "time.npy"), t)
+        np.save(os.path.join(d, "annotation.npy"), ann_codes)
+        recs.append({"name": name, "person": person, "recording": rec, "n_samples": len(df),
+                     "source": os.path.basename(path)})
+        if verbose:
+            print(f"   {os.path.basename(path)} → {name}  ({len(df):,} samples)")
+        del df
+
+    manifest = {"version": VERSION, "sfreq": sfreq, "channels": list(channels),
+                "annotations": sorted(vocab, key=vocab.get), "recordings": recs}
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# --------------------------------------------------------------------- load
+class Store:
+    """Lazy view of a converted store; arrays are opened memory-mapped on first use."""
+    def __init__(self, root, mmap_mode="r"):
+        self.root = root
+        self.mmap_mode = mmap_mode
+        with open(os.path.join(root, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest["version"] != VERSION:
+            raise ValueError(f"store version {self.manifest['version']}, expected {VERSION}")
+        self.channels    = self.manifest["channels"]
+        self.sfreq       = self.manifest["sfreq"]
+        self.annotations = np.array(self.manifest["annotations"])
+        self.recordings  = self.manifest["recordings"]
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.recordings)
+
+    def _load(self, i, what):
+        key = (i, what)
+        if key not in self._cache:
+            path = os.path.join(self.root, self.recordings[i]["name"], f"{what}.npy")
+            self._cache[key] = np.load(path, mmap_mode=self.mmap_mode)
+        return self._cache[key]
+
+    def eeg(self, i, channels=None):
+        """(n_samples, n_ch) float32 memmap; `channels` → fancy-indexed copy in that order."""
+        x = self._load(i, "eeg")
+        if channels is None:
+            return x
+        return x[:, [self.channels.index(c) for c in channels]]
+
+    def time(self, i):
+        return self._load(i, "time")
+
+    def annotation_codes(self, i):
+        return self._load(i, "annotation")
+
+    def annotation(self, i):
+        return self.annotations[self.annotation_codes(i)]
+
+    def labels(self, i, label_fn, classes=None):
+        """
+        Per-sample integer labels via `label_fn(annotation) → class or None`
+        applied to the vocabulary only; -1 where label_fn returns None.
+        Returns (labels int8, classes).
+        """
+        names   = [label_fn(a) for a in self.annotations]
+        classes = classes or sorted({n for n in names if n is not None})
+        lut = np.array([classes.index(n) if n is not None else -1 for n in names], np.int8)
+        return lut[self.annotation_codes(i)], classes
+
+    def groups(self):
+        """(person, recording) per recording, e.g. for GroupKFold."""
+        return [(r["person"], r["recording"]) for r in self.recordings]
+
+    def nbytes(self):
+        return sum(r["n_samples"] for r in self.recordings) * len(self.channels) * 4
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="csv_output → store")
+    c.add_argument("csv_dir"); c.add_argument("out_dir")
+    c.add_argument("--channels", default=None, help="JSON channel list (e.g. eeg_channels_multiclass.json)")
+    i = sub.add_parser("info", help="summary of a store")
+    i.add_argument("store")
+    args = ap.parse_args()
+
+    if args.cmd == "convert":
+        chans = None
+        if args.channels:
+            with open(args.channels) as f:
+                chans = json.load(f)
+        m = convert(args.csv_dir, args.out_dir, chans)
+        print(f"💾 {args.out_dir}: {len(m['recordings'])} recordings, {len(m['channels'])} channels, "
+              f"{len(m['annotations'])} annotation values")
+    else:
+        s = Store(args.store)
+        print(f"{args.store}: {len(s)} recordings • {len(s.channels)} ch @ {s.sfreq:g} Hz • "
+              f"{s.nbytes()/2**20:.0f} MB EEG")
+        for k, r in enumerate(s.recordings):
+            y, cls = s.labels(k, multiclass_label)
+            counts = "  ".join(f"{c}={int((y == j).sum())}" for j, c in enumerate(cls))
+            print(f"   {r['name']:<10} {r['n_samples']:>9,} samples  {counts}")
+
+
+if __name__ == "__main__":
+    main()
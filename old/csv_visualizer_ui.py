@@ -3,23 +3,399 @@
 csv_visualizer_ui.py
 
 Et Tkinter-basert GUI for å:
-1) Velge en CSV-fil med EEG-data.
+1) Velge en CSV-fil med EEG-data (eller en opptaksmappe fra eeg_train.store).
 2) Justere parametere: FPS, vindusstørrelse og gain.
 3) Velge hvilke kanaler som skal plottes (hver kanal i sitt eget subplot).
 4) Starte interaktiv avspilling med Play/Pause og en knapp for å vise annotasjoner.
 
+Dataene lastes én gang til float32 (store-mapper memory-mappes), vindusgrensene
+finnes med searchsorted, hver kanal min/max-desimeres til pikselbredden og de
+eksisterende Line2D-objektene oppdateres med blitting – så timeslange
+32-kanalsopptak spilles av jevnt.
+
+Live-modus (--live, eller knappen i skjemaet) abonnerer på EEG-strømmen og
+MI_Pred-markørene, holder de siste sekundene i en ring per kanal og tegner med
+fast FPS; prediksjonene vises som skraverte felt etter LSL-tidsstempel.
+
 Kjør:
   python csv_visualizer_ui.py
+  python csv_visualizer_ui.py csv_output/Person5Recording4.csv --channels C3 Cz C4 --fps 30
+  python csv_visualizer_ui.py --live --channels C3 Cz C4 --window 10 --fps 15
 """
 
+import argparse
+import json
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
+import threading
 import time
+from collections import namedtuple
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.patches import Polygon
 from matplotlib.widgets import Slider, Button
 
+META_COLS = ("time", "annotation", "Person", "Recording")
+
+# time (n,) float64 • data (n, n_ch) float32 • annotasjoner som heltallskoder + navn
+EEGData = namedtuple("EEGData", "time data channels ann_codes ann_names")
+
+
+# ---------------------------------------------------------------- data
+def list_channels(path):
+    """Kanalnavn uten å lese selve dataene (CSV-header eller store-manifest)."""
+    if os.path.isdir(path):
+        with open(os.path.join(os.path.dirname(os.path.abspath(path)), "manifest.json")) as f:
+            return json.load(f)["channels"]
+    return [c for c in pd.read_csv(path, nrows=0).columns if c not in META_COLS]
+
+
+def load_data(path, channels=None):
+    """
+    CSV → EEGData med bare de valgte kanalene som float32, lest én gang.
+    En opptaksmappe fra eeg_train.store (P5_R4/) memory-mappes i stedet.
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(os.path.dirname(os.path.abspath(path)), "manifest.json")) as f:
+            man = json.load(f)
+        data = np.load(os.path.join(path, "eeg.npy"), mmap_mode="r")
+        if channels and list(channels) != man["channels"]:
+            data = data[:, [man["channels"].index(c) for c in channels]]
+        ann = os.path.join(path, "annotation.npy")
+        codes = np.load(ann) if os.path.exists(ann) else None
+        return EEGData(np.load(os.path.join(path, "time.npy")), data, list(channels or man["channels"]),
+                       codes, np.array(man["annotations"]))
+
+    channels = list(channels or list_channels(path))
+    cols = pd.read_csv(path, nrows=0).columns
+    use  = channels + [c for c in ("time", "annotation") if c in cols]
+    df = pd.read_csv(path, usecols=use, dtype={c: np.float32 for c in channels}, low_memory=False)
+    if "time" not in df:
+        raise ValueError("CSV-filen mangler 'time'-kolonne!")
+    codes, names = None, np.array([""])
+    if "annotation" in df:
+        codes, names = pd.factorize(df["annotation"].fillna("").astype(str))
+        names = np.asarray(names)
+    data = np.ascontiguousarray(df[channels].to_numpy(np.float32))
+    return EEGData(df["time"].to_numpy(np.float64), data, channels, codes, names)
+
+
+def minmax_decimate(t, X, i0, i1, width):
+    """
+    Samples i0:i1 av X (n, n_ch) → (x, lo, hi): min og maks per kanal for hver
+    av høyst `width` pikselkolonner, så topper aldri forsvinner. Binnene ligger
+    på et fast rutenett i opptaket, så kurven ikke flimrer under avspilling.
+    Er det ikke flere samples enn 2·width, returneres de rå (lo is hi).
+    """
+    n = i1 - i0
+    if n <= 2 * width:
+        raw = np.asarray(X[i0:i1])
+        return t[i0:i1], raw, raw
+    b  = -(-n // int(width))
+    i0 = (i0 // b) * b
+    nb = (i1 - i0) // b
+    blk = np.asarray(X[i0:i0 + nb * b]).reshape(nb, b, -1)
+    return t[i0:i0 + nb * b:b], blk.min(axis=1), blk.max(axis=1)
+
+
+def channel_scale(X, n_probe=200_000):
+    """Robust senter og halv y-utstrekning per kanal fra et jevnt utvalg (billig også for memmaps)."""
+    s = np.asarray(X[::max(1, len(X) // n_probe)], np.float64)
+    center = np.median(s, axis=0)
+    lo, hi = np.percentile(s - center, [0.5, 99.5], axis=0)
+    half = np.maximum(np.maximum(-lo, hi) * 1.2, 1e-6)
+    return center, half
+
+
+class Traces:
+    """
+    Én animert linje og én min/max-konvolutt per kanal. Rå samples tegnes som
+    linje, desimerte som fylt polygon (langt billigere å rasterisere enn en
+    sikksakk-linje med to punkter per piksel).
+    """
+    def __init__(self, axes, channels, legend=True):
+        self.lines, self.envelopes = [], []
+        for ax, ch in zip(axes, channels):
+            ln, = ax.plot([], [], lw=0.8, label=ch, animated=True)
+            env = Polygon(np.zeros((0, 2)), closed=True, lw=0.8, fc=ln.get_color(), ec=ln.get_color(),
+                          animated=True, visible=False)
+            ax.add_patch(env)
+            self.lines.append(ln)
+            self.envelopes.append(env)
+            if legend:
+                ax.legend(loc='upper right', fontsize='x-small')
+
+    def set(self, x, lo, hi, center, gain):
+        """x (m,), lo/hi (m, n_ch) fra minmax_decimate; gain skalerer rundt kanalens senter."""
+        decimated = lo is not hi
+        if decimated:
+            xy = np.empty((2 * len(x), 2))
+            xy[:len(x), 0], xy[len(x):, 0] = x, x[::-1]
+        for i, (ln, env) in enumerate(zip(self.lines, self.envelopes)):
+            ln.set_visible(not decimated)
+            env.set_visible(decimated)
+            if decimated:
+                xy[:len(x), 1] = center[i] + (lo[:, i] - center[i]) * gain
+                xy[len(x):, 1] = center[i] + (hi[::-1, i] - center[i]) * gain
+                env.set_xy(xy)
+            else:
+                ln.set_data(x, center[i] + (lo[:, i] - center[i]) * gain)
+
+    def artists(self):
+        return [env if env.get_visible() else ln for ln, env in zip(self.lines, self.envelopes)]
+
+
+class Blitter:
+    """
+    En full tegning (resize, nye akser, titler) lagrer bakgrunnen uten de
+    animerte artistene; hver frame etterpå er update() + restore_region +
+    draw_artist + blit.
+    """
+    def __init__(self, fig, update, artists):
+        self.fig, self.update, self.artists = fig, update, artists
+        self.background = None
+        fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.update()
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for a in self.artists():
+            (a.axes or self.fig).draw_artist(a)
+
+    def frame(self):
+        if self.background is None:
+            return
+        canvas = self.fig.canvas
+        self.update()
+        canvas.restore_region(self.background)
+        self._draw_artists()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+
+# ---------------------------------------------------------------- live
+PRED_COLORS = {"REST": "0.6", "IMAGERY": "tab:orange", "MOVE": "tab:green"}
+
+
+def _stream_labels(info, n):
+    lbl, ch = [], info.desc().child("channels").child("channel")
+    while ch and not ch.empty():
+        lbl.append(ch.child_value("label")); ch = ch.next_sibling()
+    return lbl if len(lbl) == n else [f"ch{i + 1}" for i in range(n)]
+
+
+class LiveBuffer:
+    """
+    EEG-inlet → ring per kanal (float32) med LSL-tidsstempler, fylt av en egen
+    tråd som blokkerer i pull_chunk. Lagringen er speilet (hvert sample skrives
+    på i og i + cap), så de nyeste n samplene alltid er ett sammenhengende
+    view. Tegningen leser bare `total`; ingen låser, ingen kopier.
+    """
+    def __init__(self, inlet, seconds=30.0, channels=None, max_chunk=1024):
+        info = inlet.info()
+        labels = _stream_labels(info, info.channel_count())
+        self.channels = list(channels or labels)
+        self.sel = [labels.index(c) for c in self.channels]
+        self.sfreq = info.nominal_srate() or 500.0
+        self.cap = int(seconds * self.sfreq)
+        self.data = np.zeros((2 * self.cap, len(self.sel)), np.float32)
+        self.ts = np.zeros(2 * self.cap)
+        self.total = 0
+        self.inlet = inlet
+        self._buf = np.zeros((max_chunk, len(labels)), np.float32)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="lsl-eeg")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # timeout 50 ms: returnerer det som har kommet, så tråden våkner høyst ~20×/s
+            _, ts = self.inlet.pull_chunk(timeout=0.05, max_samples=len(self._buf), dest_obj=self._buf)
+            n = len(ts)
+            if n:
+                self._write(self._buf[:n, self.sel], np.asarray(ts))
+
+    def _write(self, x, ts):
+        cap = self.cap
+        if len(x) > cap:
+            x, ts = x[-cap:], ts[-cap:]
+        h = self.total % cap
+        first = min(len(x), cap - h)
+        for dst, src in ((h, slice(0, first)), (0, slice(first, len(x)))):
+            m = src.stop - src.start
+            if m:
+                self.data[dst:dst + m] = self.data[dst + cap:dst + cap + m] = x[src]
+                self.ts[dst:dst + m] = self.ts[dst + cap:dst + cap + m] = ts[src]
+        self.total += len(x)            # publiseres sist
+
+    def latest(self):
+        """(ts, data) view over alt som er i ringen, eldst først."""
+        total = self.total
+        n = min(total, self.cap)
+        end = total % self.cap + self.cap
+        return self.ts[end - n:end], self.data[end - n:end]
+
+
+class PredictionLog:
+    """MI_Pred-markører (LSL-tid, klasse), hentet uten blokkering fra tegne-løkka."""
+    def __init__(self, inlet, seconds=60.0):
+        self.inlet, self.seconds = inlet, seconds
+        self.t, self.labels = [], []
+
+    def poll(self):
+        if self.inlet is None or not self.inlet.samples_available():
+            return False
+        samples, ts = self.inlet.pull_chunk(timeout=0.0, max_samples=64)
+        if not ts:
+            return False
+        self.t += list(ts)
+        self.labels += [str(s[0]) for s in samples]
+        k = np.searchsorted(self.t, self.t[-1] - self.seconds)
+        if k:
+            del self.t[:k], self.labels[:k]
+        return True
+
+
+def open_streams(eeg_name="BrainVision RDA", pred_name="MI_Pred", timeout=5.0):
+    """Begge inlets med clocksync (EEG også dejitter), så tidsstemplene er i lokal LSL-tid."""
+    from pylsl import StreamInlet, resolve_byprop, proc_clocksync, proc_dejitter
+    print(f"🔎 waiting for EEG stream '{eeg_name}' …")
+    infos = resolve_byprop("name", eeg_name, 1, timeout)
+    if not infos:
+        raise RuntimeError(f"Ingen stream '{eeg_name}'")
+    eeg = StreamInlet(infos[0], max_buflen=30, processing_flags=proc_clocksync | proc_dejitter)
+    infos = resolve_byprop("name", pred_name, 1, 1.0)
+    pred = StreamInlet(infos[0], processing_flags=proc_clocksync) if infos else None
+    if pred is None:
+        print(f"⚠  ingen '{pred_name}'-stream – viser bare EEG")
+    else:
+        pred.open_stream(timeout)           # samples_available() er først gyldig når strømmen er åpnet
+    return eeg, pred
+
+
+def visualize_live(eeg_name="BrainVision RDA", pred_name="MI_Pred", channels=None, fps=15.0,
+                   init_window=10.0, init_gain=1.0, buffer_s=30.0):
+    """
+    Live-monitor: de nyeste `vindu` sekundene av EEG-strømmen (x = tid før
+    siste sample) med MI_Pred-prediksjonene som skraverte felt bak kurvene,
+    plassert etter LSL-tidsstempel – hvert felt varer til neste prediksjon.
+    Tegningen går på en fast FPS-timer med blitting, uavhengig av når
+    samples kommer, og hopper over frames uten nye data.
+    """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.patches import Patch
+
+    eeg_inlet, pred_inlet = open_streams(eeg_name, pred_name)
+    buf   = LiveBuffer(eeg_inlet, buffer_s, channels).start()
+    preds = PredictionLog(pred_inlet, buffer_s)
+    channels = buf.channels
+    n_channels = len(channels)
+
+    fig, axes = plt.subplots(n_channels, 1, figsize=(10, min(2*n_channels, 14)), sharex=True)
+    if n_channels == 1:
+        axes = [axes]
+    plt.subplots_adjust(bottom=0.2, top=0.95, hspace=0.5 if n_channels <= 8 else 0.15)
+    traces = Traces(axes, channels, legend=n_channels <= 8)
+    shades = []
+    for ax, ch in zip(axes, channels):
+        pc = PolyCollection([], transform=ax.get_xaxis_transform(), alpha=0.25, lw=0, animated=True, zorder=0)
+        ax.add_collection(pc)
+        shades.append(pc)
+        ax.set_ylabel(ch)
+    axes[-1].set_xlim(-init_window, 0)
+    axes[-1].set_xlabel("Tid før siste sample (s)")
+    t_text = fig.text(0.01, 0.97, "", animated=True)
+
+    ax_slider_win = plt.axes([0.15, 0.09, 0.5, 0.03])
+    slider_win = Slider(ax_slider_win, 'Vindu (s)', 1.0, buffer_s, valinit=init_window, valstep=1.0)
+    ax_slider_gain = plt.axes([0.15, 0.04, 0.5, 0.03])
+    slider_gain = Slider(ax_slider_gain, 'Gain', 0.1, 5.0, valinit=init_gain, valstep=0.1)
+    ax_button_scale = plt.axes([0.75, 0.05, 0.15, 0.06])
+    button_scale = Button(ax_button_scale, "Autoskaler")
+
+    center = np.zeros(n_channels)
+    half = np.ones(n_channels)
+    state = {"total": -1, "scaled": False, "classes": []}
+    canvas = fig.canvas
+    extra = {}
+
+    def color_of(label):
+        if label.upper() in PRED_COLORS:
+            return PRED_COLORS[label.upper()]
+        return extra.setdefault(label, f"C{3 + len(extra) % 7}")
+
+    def rescale(event=None):
+        ts, X = buf.latest()
+        if len(ts) < buf.sfreq:                 # vent på ett sekund med data
+            return
+        center[:], half[:] = channel_scale(X[-int(slider_win.val * buf.sfreq):])
+        for i, ax in enumerate(axes):
+            ax.set_ylim(center[i] - half[i], center[i] + half[i])
+        state["scaled"] = True
+        canvas.draw_idle()
+
+    def update_lines():
+        ts, X = buf.latest()
+        if not len(ts):
+            return
+        t_now, win = ts[-1], slider_win.val
+        i0 = np.searchsorted(ts, t_now - win, side="left")
+        x, lo, hi = minmax_decimate(ts, X, i0, len(ts), max(1, int(axes[0].bbox.width)))
+        traces.set(x - t_now, lo, hi, center, slider_gain.val)
+
+        # prediksjon k gjelder fra sin tid til neste prediksjon (den siste til nå)
+        t = np.asarray(preds.t) - t_now
+        keep = np.flatnonzero(np.r_[t[1:], 0.0] > -win) if len(t) else []
+        verts = [[(t[k], 0), (t[k], 1), (t[k + 1] if k + 1 < len(t) else 0.0, 1),
+                  (t[k + 1] if k + 1 < len(t) else 0.0, 0)] for k in keep]
+        colors = [color_of(preds.labels[k]) for k in keep]
+        for pc in shades:
+            pc.set_verts(verts)
+            pc.set_facecolor(colors)
+        last = f" • siste: {preds.labels[-1]} ({t[-1]:+.2f} s)" if len(t) else ""
+        t_text.set_text(f"{eeg_name}: {buf.total:,} samples @ {buf.sfreq:g} Hz{last}")
+
+    blitter = Blitter(fig, update_lines, lambda: shades + traces.artists() + [t_text])
+    slider_win.on_changed(lambda val: (axes[-1].set_xlim(-val, 0), canvas.draw_idle()))
+    slider_gain.on_changed(lambda val: blitter.frame())
+    button_scale.on_clicked(rescale)
+
+    def tick(_):
+        new_pred = preds.poll()
+        if not state["scaled"]:
+            rescale()
+        new_cls = [c for c in preds.labels if c not in state["classes"]]
+        if new_cls:                            # ny klasse → forklaring, full tegning
+            state["classes"] += sorted(set(new_cls))
+            fig.legend(handles=[Patch(color=color_of(c), alpha=0.25, label=c)
+                                for c in state["classes"]], loc="upper right", fontsize="small",
+                       ncol=len(state["classes"]))
+            canvas.draw_idle()
+        if buf.total != state["total"] or new_pred:
+            state["total"] = buf.total
+            blitter.frame()
+
+    timer = canvas.new_timer(interval=int(1000 / fps))
+    timer.add_callback(tick, None)
+    timer.start()
+    try:
+        plt.show()
+    finally:
+        buf.stop()
+
+
 class CSVVisualizerApp:
     def __init__(self, root):
         self.root = root
@@ -60,6 +436,8 @@ class CSVVisualizerApp:
 
         # Start-knapp for avspilling
         tk.Button(main_frame, text="Start avspilling", command=self.start_playback, width=30, pady=5).pack(pady=10)
+        tk.Button(main_frame, text="Live (LSL)", command=self.start_live, width=30, pady=5).pack()
+        self._loaded = None     # (sti, kanaler) → EEGData, så samme fil ikke leses på nytt
 
     def browse_csv(self):
         filename = filedialog.askopenfilename(title="Velg CSV-fil", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
@@ -72,11 +450,10 @@ class CSVVisualizerApp:
             messagebox.showerror("Feil", "Velg en CSV-fil først!")
             return
         try:
-            df = pd.read_csv(csv_path)
+            channels = list_channels(csv_path)        # bare headeren
         except Exception as e:
             messagebox.showerror("Feil", f"Kunne ikke laste CSV: {e}")
             return
-        channels = [col for col in df.columns if col not in ['time', 'annotation']]
         self.channel_listbox.delete(0, tk.END)
         for ch in channels:
             self.channel_listbox.insert(tk.END, ch)
@@ -95,45 +472,66 @@ class CSVVisualizerApp:
             return
 
         selected_indices = self.channel_listbox.curselection()
+        channels_to_plot = [self.channel_listbox.get(i) for i in selected_indices] or None
+        key = (csv_path, tuple(channels_to_plot or ()))
         try:
-            df = pd.read_csv(csv_path)
+            if self._loaded is None or self._loaded[0] != key:
+                self._loaded = (key, load_data(csv_path, channels_to_plot))
         except Exception as e:
             messagebox.showerror("Feil", f"Kunne ikke laste CSV: {e}")
             return
 
-        if 'time' not in df.columns:
-            messagebox.showerror("Feil", "CSV-filen mangler 'time'-kolonne!")
+        visualize_csv(self._loaded[1], fps=fps_val, init_window=win_val, init_gain=gain_val)
+
+
+    def start_live(self):
+        try:
+            fps_val = float(self.fps.get())
+            win_val = float(self.window_size.get())
+            gain_val = float(self.gain.get())
+        except ValueError:
+            messagebox.showerror("Feil", "FPS, vindusstørrelse og gain må være tall!")
             return
-        if 'annotation' not in df.columns:
-            df['annotation'] = ""
-        all_channels = [col for col in df.columns if col not in ['time', 'annotation']]
-        if selected_indices:
-            channels_to_plot = [self.channel_listbox.get(i) for i in selected_indices]
-        else:
-            channels_to_plot = all_channels
+        channels = [self.channel_listbox.get(i) for i in self.channel_listbox.curselection()] or None
+        try:
+            visualize_live(channels=channels, fps=fps_val, init_window=win_val, init_gain=gain_val)
+        except Exception as e:
+            messagebox.showerror("Feil", f"Live-visning feilet: {e}")
 
-        visualize_csv(df, channels_to_plot, fps=fps_val, init_window=win_val, init_gain=gain_val)
 
-def visualize_csv(df, channels, fps=10.0, init_window=5.0, init_gain=1.0):
+def visualize_csv(eeg, fps=10.0, init_window=5.0, init_gain=1.0):
     """
     Åpner et matplotlib-vindu med interaktiv avspilling.
     Hver valgt kanal vises i sitt eget subplot (vertikalt stablet med delt x-akse).
     Inkluderer sliders for tid, vindusstørrelse og gain, samt Play/Pause og en knapp for annotasjoner.
+
+    Linjene er animerte: en full tegning (ved resize, nytt vindu, annotasjoner)
+    lagrer bakgrunnen, hver frame etterpå er restore_region + draw_artist + blit.
+    x-aksen er tid i vinduet (0 … vindusstørrelse), så aksene ikke endres under avspilling.
     """
-    time_col = df['time'].values
+    time_col, X, channels = eeg.time, eeg.data, eeg.channels
     t_min = time_col[0]
     t_max = time_col[-1]
-    
+
     n_channels = len(channels)
     if n_channels == 0:
         print("Ingen kanaler valgt for plotting.")
         return
+    center, half = channel_scale(X)
 
     # Opprett subplots: en for hver kanal
-    fig, axes = plt.subplots(n_channels, 1, figsize=(10, 2*n_channels), sharex=True)
+    fig, axes = plt.subplots(n_channels, 1, figsize=(10, min(2*n_channels, 14)), sharex=True)
     if n_channels == 1:
         axes = [axes]
-    plt.subplots_adjust(bottom=0.35, top=0.95, hspace=0.5)
+    plt.subplots_adjust(bottom=0.35, top=0.95, hspace=0.5 if n_channels <= 8 else 0.15)
+
+    traces = Traces(axes, channels, legend=n_channels <= 8)
+    for i, ch in enumerate(channels):
+        axes[i].set_ylim(center[i] - half[i], center[i] + half[i])
+        axes[i].set_ylabel(ch)
+    axes[-1].set_xlim(0, init_window)
+    axes[-1].set_xlabel("Tid i vinduet (s)")
+    t_text = fig.text(0.01, 0.97, "", animated=True)
 
     # Opprett sliders:
     ax_slider_time = plt.axes([0.15, 0.27, 0.65, 0.03])
@@ -156,34 +554,35 @@ def visualize_csv(df, channels, fps=10.0, init_window=5.0, init_gain=1.0):
 
     is_playing = [False]
     last_update_time = [time.time()]
+    pos = [t_min]               # starttid for vinduet; slideren synkes først ved pause
+    canvas = fig.canvas
+
+    def update_lines():
+        t_start, window_size = pos[0], slider_win.val
+        i0 = np.searchsorted(time_col, t_start, side="left")
+        i1 = np.searchsorted(time_col, t_start + window_size, side="right")
+        x, lo, hi = minmax_decimate(time_col, X, i0, i1, max(1, int(axes[0].bbox.width)))
+        traces.set(x - t_start, lo, hi, center, slider_gain.val)
+        t_text.set_text(f"t = {t_start:.2f} s")
+
+    blitter = Blitter(fig, update_lines, lambda: traces.artists() + [t_text])
+    blit_frame = blitter.frame
 
-    def plot_all(t_start, window_size, gain):
-        for i, ch in enumerate(channels):
-            axes[i].clear()
-            t_end = t_start + window_size
-            mask = (time_col >= t_start) & (time_col <= t_end)
-            sig = df[ch].values[mask] * gain
-            axes[i].plot(time_col[mask], sig, label=ch)
-            axes[i].set_ylabel(ch)
-            axes[i].legend(loc='upper right', fontsize='x-small')
-        axes[-1].set_xlabel("Tid (s)")
-        fig.canvas.draw_idle()
-
-    # Initialt plott
-    plot_all(t_min, init_window, init_gain)
-
-    def update_sliders(val):
-        t_start = slider_time.val
-        window_size = slider_win.val
-        gain = slider_gain.val
-        if t_start + window_size > t_max:
-            t_start = t_max - window_size
-            slider_time.set_val(t_start)
-        plot_all(t_start, window_size, gain)
-
-    slider_time.on_changed(update_sliders)
-    slider_win.on_changed(update_sliders)
-    slider_gain.on_changed(update_sliders)
+    def clamp(t_start):
+        return min(max(t_start, t_min), max(t_min, t_max - slider_win.val))
+
+    def on_time(val):
+        pos[0] = clamp(val)
+        blit_frame()
+
+    def on_window(val):
+        pos[0] = clamp(pos[0])
+        axes[-1].set_xlim(0, val)        # aksene endres → full tegning (henter ny bakgrunn)
+        canvas.draw_idle()
+
+    slider_time.on_changed(on_time)
+    slider_win.on_changed(on_window)
+    slider_gain.on_changed(lambda val: blit_frame())
 
     def play_callback(event):
         is_playing[0] = True
@@ -191,23 +590,24 @@ def visualize_csv(df, channels, fps=10.0, init_window=5.0, init_gain=1.0):
 
     def pause_callback(event):
         is_playing[0] = False
+        slider_time.set_val(pos[0])
 
     button_play.on_clicked(play_callback)
     button_pause.on_clicked(pause_callback)
 
     def show_annotation(event):
-        t_start = slider_time.val
-        window_size = slider_win.val
-        t_end = t_start + window_size
-        mask = (time_col >= t_start) & (time_col <= t_end)
-        annot_vals = df.loc[mask, 'annotation'].unique()
-        annot_vals = [str(a) for a in annot_vals if str(a).strip() != ""]
+        if eeg.ann_codes is None:
+            annot_vals = []
+        else:
+            i0 = np.searchsorted(time_col, pos[0], side="left")
+            i1 = np.searchsorted(time_col, pos[0] + slider_win.val, side="right")
+            annot_vals = [str(a) for a in eeg.ann_names[np.unique(eeg.ann_codes[i0:i1])] if str(a).strip() != ""]
         for ax in axes:
             if annot_vals:
                 ax.set_title(f"Annotasjoner: {', '.join(annot_vals)}", fontsize=9)
             else:
                 ax.set_title("Ingen annotasjoner", fontsize=9)
-        fig.canvas.draw_idle()
+        canvas.draw_idle()
 
     button_annot.on_clicked(show_annotation)
 
@@ -216,20 +616,40 @@ def visualize_csv(df, channels, fps=10.0, init_window=5.0, init_gain=1.0):
             now = time.time()
             elapsed = now - last_update_time[0]
             last_update_time[0] = now
-            step = 1.0 / fps
-            new_start = slider_time.val + step
-            # Sørg for at vi ikke går forbi slutten
-            if new_start + slider_win.val > t_max:
-                new_start = t_max - slider_win.val
-            slider_time.set_val(new_start)
-
-    timer = fig.canvas.new_timer(interval=int(1000 / fps))
+            # sanntid uavhengig av hvor mange frames som faktisk ble tegnet
+            new_start = clamp(pos[0] + elapsed)
+            if new_start != pos[0]:
+                pos[0] = new_start
+                blit_frame()
+
+    timer = canvas.new_timer(interval=int(1000 / fps))
     timer.add_callback(update_playback, None)
     timer.start()
 
     plt.show()
 
+
 def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", nargs="?", help="CSV-fil eller store-mappe; uten den åpnes skjemaet")
+    ap.add_argument("--channels", nargs="+", default=None)
+    ap.add_argument("--fps", type=float, default=10.0)
+    ap.add_argument("--window", type=float, default=5.0, help="vindusstørrelse (s)")
+    ap.add_argument("--gain", type=float, default=1.0)
+    ap.add_argument("--live", action="store_true", help="live fra LSL i stedet for fil")
+    ap.add_argument("--eeg-stream", default="BrainVision RDA")
+    ap.add_argument("--pred-stream", default="MI_Pred")
+    ap.add_argument("--buffer", type=float, default=30.0, help="sekunder i live-ringen")
+    args = ap.parse_args()
+
+    if args.live:
+        visualize_live(args.eeg_stream, args.pred_stream, args.channels, fps=args.fps,
+                       init_window=args.window, init_gain=args.gain, buffer_s=args.buffer)
+        return
+    if args.path:
+        visualize_csv(load_data(args.path, args.channels), fps=args.fps,
+                      init_window=args.window, init_gain=args.gain)
+        return
     root = tk.Tk()
     app = CSVVisualizerApp(root)
     root.mainloop()
@@ -19,3 +19,13 @@ class CovTransport(BaseEstimator, TransformerMixin):
     def transform(self, X):
         Gm = self.G_inv_sqrt_
         return np.array([Gm @ C @ Gm.T for C in X])
+
+class BandSelector(TransformerMixin, BaseEstimator):
+    """
+    Pick one band out of a filterbank epoch array (n_epochs, n_bands, n_ch, n_times).
+    Samme klasse som i treningsnotebooken (filterbank_multiclass_new).
+    """
+    def __init__(self, band_idx): self.band_idx = band_idx
+    def fit(self, X, y=None):       return self
+    def transform(self, X):
+        return X[:, self.band_idx, :, :]